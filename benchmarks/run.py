@@ -0,0 +1,160 @@
+"""Benchmarks do TeXFlow: mede os caminhos quentes com cargas sintéticas.
+
+Uso (da raiz do repositório):
+
+    python benchmarks/run.py                  # tudo, menos compile
+    python benchmarks/run.py render copy      # só alguns grupos
+    python benchmarks/run.py --compile        # + build com TeX de verdade
+    python benchmarks/run.py compare A.json B.json
+
+Cada execução grava um JSON em benchmarks/results/ (ou em --output), com o
+commit atual no nome: dois desses arquivos comparados com `compare` dizem
+se uma mudança deixou o TeXFlow mais rápido ou mais lento.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+# Roda direto do checkout: src/ (classes, scripts...), a raiz (assets) e
+# esta pasta (workloads).
+sys.path[:0] = [str(ROOT / "src"), str(ROOT), str(ROOT / "benchmarks")]
+
+import workloads
+
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+
+# Diferença de mediana abaixo disso é ruído, não regressão.
+NOISE = 0.10
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def measure(bench: workloads.Benchmark, repeat: int) -> dict:
+    # Spinners e prints das tarefas não entram na medição nem no terminal.
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+        if bench.setup is None:
+            bench.run()  # aquecimento: deixa o destino "em dia"
+        runs = []
+        for _ in range(repeat):
+            if bench.setup is not None:
+                bench.setup()
+            start = time.perf_counter()
+            bench.run()
+            runs.append(time.perf_counter() - start)
+    return {
+        "size": bench.size,
+        "min": min(runs),
+        "median": statistics.median(runs),
+        "mean": statistics.fmean(runs),
+        "runs": runs,
+    }
+
+
+def run(groups: list[str], *, repeat: int, scale: float) -> dict:
+    from configs.version import __version__
+
+    results = {}
+    for group in groups:
+        factory = workloads.GROUPS.get(group) or workloads.OPTIONAL_GROUPS[group]
+        workdir = Path(tempfile.mkdtemp(prefix=f"texflow-bench-{group}-"))
+        try:
+            for bench in factory(workdir, scale):
+                result = measure(bench, repeat)
+                results[bench.name] = result
+                print(f"⏱️  {bench.name:<34} {result['median'] * 1000:9.1f} ms  ({bench.size})", file=sys.stderr)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "texflow": __version__,
+        "commit": _git_commit(),
+        "created": int(time.time()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": scale,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(old: dict, new: dict) -> list[str]:
+    """Linhas do relatório de `old` -> `new`, pela mediana de cada benchmark."""
+    lines = [f"{'benchmark':<34} {old.get('commit') or 'A':>10} {new.get('commit') or 'B':>10}  mudança"]
+    for name in sorted(set(old["results"]) | set(new["results"])):
+        a = old["results"].get(name)
+        b = new["results"].get(name)
+        if a is None or b is None:
+            lines.append(f"{name:<34} {'—' if a is None else _ms(a):>10} {'—' if b is None else _ms(b):>10}")
+            continue
+        ratio = b["median"] / a["median"] if a["median"] else 1.0
+        mark = ""
+        if ratio > 1 + NOISE:
+            mark = "  🐢 mais lento"
+        elif ratio < 1 - NOISE:
+            mark = "  🚀 mais rápido"
+        lines.append(f"{name:<34} {_ms(a):>10} {_ms(b):>10}  {ratio - 1:+7.1%}{mark}")
+    if old.get("scale") != new.get("scale"):
+        lines.append(f"⚠️  Escalas diferentes ({old.get('scale')} vs {new.get('scale')}): os tempos não são comparáveis.")
+    return lines
+
+
+def _ms(result: dict) -> str:
+    return f"{result['median'] * 1000:.1f}ms"
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["compare"]:
+        parser = argparse.ArgumentParser(prog="benchmarks/run.py compare")
+        parser.add_argument("old", type=Path)
+        parser.add_argument("new", type=Path)
+        args = parser.parse_args(argv[1:])
+        old, new = (json.loads(p.read_text(encoding="utf-8")) for p in (args.old, args.new))
+        print("\n".join(compare(old, new)))
+        return 0
+
+    groups = [*workloads.GROUPS, *workloads.OPTIONAL_GROUPS]
+    parser = argparse.ArgumentParser(prog="benchmarks/run.py", description="Benchmarks dos caminhos quentes do TeXFlow.")
+    parser.add_argument("groups", nargs="*", choices=groups, metavar="GRUPO", help=f"Grupos a rodar: {', '.join(groups)}.")
+    parser.add_argument("--repeat", type=int, default=5, help="Execuções medidas por benchmark (padrão: 5).")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplica o tamanho das cargas (padrão: 1).")
+    parser.add_argument("--compile", action="store_true", help="Inclui o build do template journal com o TeX instalado.")
+    parser.add_argument("-o", "--output", type=Path, help="Arquivo JSON de saída (padrão: benchmarks/results/<commit>.json).")
+    args = parser.parse_args(argv)
+
+    selected = args.groups or list(workloads.GROUPS)
+    if args.compile and "compile" not in selected:
+        selected.append("compile")
+    if "compile" in selected and shutil.which("latexmk") is None:
+        print("⚠️  latexmk não encontrado: pulando o grupo compile.", file=sys.stderr)
+        selected.remove("compile")
+
+    report = run(selected, repeat=args.repeat, scale=args.scale)
+
+    output = args.output or RESULTS_DIR / f"{report['commit'] or report['created']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"💾 Resultados em {output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
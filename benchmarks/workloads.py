@@ -0,0 +1,244 @@
+"""Cargas sintéticas dos caminhos quentes do build.
+
+Cada função recebe uma pasta de trabalho vazia e o fator de escala e
+devolve os Benchmark daquele grupo. Tudo é gerado localmente (sem rede,
+sem TeX): o que vale medir aqui é o custo do TeXFlow em volta do engine.
+Em escala 1 os tamanhos são os de um documento grande de verdade.
+"""
+
+import contextlib
+import json
+import random
+import shutil
+from collections.abc import Callable
+from pathlib import Path
+
+from classes.data import Data
+from classes.task import CopyTree, FnTask, RenderTemplate, Task
+from scripts.builder import _jinja_env, summarize_latex_log
+
+# Tamanhos em escala 1.
+LOOP_ROWS = 20_000
+TREE_FILES = 10_000
+LOG_BYTES = 4 * 1024 * 1024
+PAYLOAD_ROWS = 100_000
+RUNNER_TASKS = 500
+
+
+class Benchmark:
+    """Uma medição: `setup` (fora do cronômetro) roda antes de cada `run`.
+
+    Sem setup, a primeira execução é só aquecimento e as seguintes medem o
+    caso "em dia" (ex: segunda cópia de uma árvore que não mudou).
+    """
+
+    def __init__(self, name: str, run: Callable[[], object], *, setup: Callable[[], None] | None = None, size: str = ""):
+        self.name = name
+        self.run = run
+        self.setup = setup
+        self.size = size
+
+
+def _scaled(n: int, scale: float) -> int:
+    return max(1, int(n * scale))
+
+
+def _reset(path: Path) -> Callable[[], None]:
+    def setup() -> None:
+        shutil.rmtree(path, ignore_errors=True)
+    return setup
+
+
+def render(workdir: Path, scale: float) -> list[Benchmark]:
+    """main.tex com uma tabela gerada por um loop grande, como um relatório."""
+    rows = _scaled(LOOP_ROWS, scale)
+    (workdir / "main.tex").write_text(
+        "\\documentclass{article}\n"
+        "\\begin{document}\n"
+        "<<% block tabela %>>\n"
+        "\\begin{longtable}{lrrl}\n"
+        "<<% for row in rows %>>\n"
+        "<< row.name >> & << row.qty >> & << '%.2f' | format(row.price) >> & "
+        "<<% if row.ok %>>sim<<% else %>>não<<% endif %>> \\\\\n"
+        "<<% endfor %>>\n"
+        "\\end{longtable}\n"
+        "<<% endblock %>>\n"
+        "<<% block autor %>>\\author{<< author >>}<<% endblock %>>\n"
+        "\\end{document}\n",
+        encoding="utf-8",
+    )
+    rng = random.Random(0)
+    context = {
+        "author": "Fulano",
+        "rows": [
+            {"name": f"item {i}", "qty": rng.randint(1, 999), "price": rng.random() * 1000, "ok": i % 3 == 0}
+            for i in range(rows)
+        ],
+    }
+    template = _jinja_env(str(workdir)).get_template("main.tex")
+    out = workdir / "build" / "main.tex"
+    fragments = workdir / "build" / ".texflow-fragments.json"
+
+    def task(fragment_cache=None) -> Callable[[], None]:
+        return lambda: RenderTemplate(template, context, out, fragment_cache=fragment_cache).run()
+
+    size = f"{rows} linhas"
+    return [
+        Benchmark("render/loop-cold", task(), setup=_reset(out.parent), size=size),
+        Benchmark("render/loop-unchanged", task(), size=size),
+        Benchmark("render/loop-fragments-unchanged", task(fragments), size=size),
+    ]
+
+
+def copy(workdir: Path, scale: float) -> list[Benchmark]:
+    """Árvore de assets com muitos arquivos pequenos em pastas aninhadas."""
+    files = _scaled(TREE_FILES, scale)
+    src = workdir / "src"
+    for i in range(files):
+        path = src / f"d{i % 50:02d}" / f"s{i % 7}" / f"f{i}.dat"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(f"arquivo {i}\n".encode() * (1 + i % 16))
+
+    def task(dst: Path, **kwargs) -> Callable[[], None]:
+        return lambda: CopyTree(src, dst, **kwargs).run()
+
+    copied = workdir / "copied"
+    linked = workdir / "linked"
+    manifest = workdir / "manifested"
+    size = f"{files} arquivos"
+    return [
+        Benchmark("copy/filecmp-cold", task(copied), setup=_reset(copied), size=size),
+        Benchmark("copy/filecmp-unchanged", task(copied), size=size),
+        Benchmark("copy/symlink-cold", task(linked, symlink=True), setup=_reset(linked), size=size),
+        Benchmark("copy/symlink-unchanged", task(linked, symlink=True), size=size),
+        Benchmark(
+            "copy/manifest-unchanged",
+            task(manifest, manifest=workdir / "manifest.json"),
+            size=size,
+        ),
+    ]
+
+
+def failing_log(target_bytes: int) -> str:
+    """Log de um build que falhou: muito ruído de warnings e erros no fim."""
+    chunk = []
+    for i in range(200):
+        chunk.append(f"(./capitulos/cap{i % 12}.tex [{i + 1}]")
+        chunk.append(f"Overfull \\hbox ({i % 9}.{i % 10}pt too wide) in paragraph at lines {i}--{i + 3}")
+        chunk.append("[]\\TU/lmr/m/n/10 Um parágrafo qualquer com palavras demais na linha")
+        chunk.append(f"LaTeX Warning: Citation 'ref{i}' on page {i + 1} undefined on input line {i * 7}.")
+        chunk.append(f"LaTeX Warning: Reference `fig:{i}' on page {i + 1} undefined on input line {i * 7 + 1}.")
+        chunk.append("Missing character: There is no ç in font cmr10!")
+        chunk.append("Underfull \\vbox (badness 10000) has occurred while \\output is active []")
+        chunk.append(")")
+    block = "\n".join(chunk) + "\n"
+    log = block * max(1, target_bytes // len(block))
+    errors = "".join(
+        f"! Undefined control sequence.\nl.{100 + i} \\comandoinexistente{i}\n\n" for i in range(50)
+    )
+    return log + errors + "! Emergency stop.\n<*> main.tex\n\nOutput written on main.pdf (1 pages).\n"
+
+
+def log_summary(workdir: Path, scale: float) -> list[Benchmark]:
+    log = failing_log(_scaled(LOG_BYTES, scale))
+    size = f"{len(log) / 1024 / 1024:.1f} MiB"
+    return [Benchmark("log/summarize-failing", lambda: summarize_latex_log(log), size=size)]
+
+
+def data_load(workdir: Path, scale: float) -> list[Benchmark]:
+    """input.json grande: uma lista de registros aninhados no payload."""
+    rows = _scaled(PAYLOAD_ROWS, scale)
+    path = workdir / "input.json"
+    payload = {
+        "author": "Fulano",
+        "rows": [{"id": i, "name": f"item {i}", "tags": ["a", "b", str(i % 10)], "price": i * 1.5} for i in range(rows)],
+    }
+    path.write_text(json.dumps({"payload": payload}), encoding="utf-8")
+    size = f"{path.stat().st_size / 1024 / 1024:.1f} MiB"
+    return [Benchmark("data/load-from-file", lambda: Data().load_from_file(path), size=size)]
+
+
+def _noop() -> None:
+    pass
+
+
+def runner(workdir: Path, scale: float) -> list[Benchmark]:
+    """Custo do Task.runner em si: tarefas vazias em leque e em cadeia."""
+    n = _scaled(RUNNER_TASKS, scale)
+
+    def fan_out() -> list[Task]:
+        root = FnTask(_noop, mode="chain")
+        return [root] + [FnTask(_noop, dependencies=[root]) for _ in range(n - 1)]
+
+    def chain() -> list[Task]:
+        tasks: list[Task] = []
+        for _ in range(n):
+            tasks.append(FnTask(_noop, mode="chain", dependencies=tasks[-1:]))
+        return tasks
+
+    size = f"{n} tarefas"
+    return [
+        Benchmark("runner/fan-out", lambda: Task.runner(fan_out()), size=size),
+        Benchmark("runner/chain", lambda: Task.runner(chain()), size=size),
+    ]
+
+
+@contextlib.contextmanager
+def _private_caches(cache_dir: Path):
+    """Cache de PDFs, store de objetos e histórico dentro de `cache_dir`.
+
+    Sem isso o benchmark encheria o ~/.cache/texflow de quem roda, poria
+    builds falsos no --stats e o "unchanged" poderia acertar no cache de
+    PDFs de builds de verdade.
+    """
+    from scripts import builder
+
+    paths = {
+        "PDF_CACHE_DIR": cache_dir / "pdf-cache",
+        "OBJECTS_DIR": cache_dir / "objects",
+        "HISTORY_DB": cache_dir / "history.sqlite3",
+    }
+    previous = {name: getattr(builder, name) for name in paths}
+    for name, path in paths.items():
+        setattr(builder, name, path)
+    try:
+        yield
+    finally:
+        for name, path in previous.items():
+            setattr(builder, name, path)
+
+
+def compile_journal(workdir: Path, scale: float) -> list[Benchmark]:
+    """Build completo do template journal com um engine TeX de verdade."""
+    import importlib.resources as res
+
+    from scripts.builder import BuildSession
+
+    template = workdir / "journal"
+    shutil.copytree(str(res.files("assets").joinpath("templates", "journal")), template)
+    data_path = template / "input.json"
+
+    def clean() -> None:
+        shutil.rmtree(template / "build", ignore_errors=True)
+
+    def build(use_cache: bool) -> Callable[[], None]:
+        def run() -> None:
+            with _private_caches(workdir / "cache"):
+                BuildSession(str(template), use_cache=use_cache).run(data_path)
+        return run
+
+    return [
+        Benchmark("compile/journal-cold", build(False), setup=clean, size="journal"),
+        Benchmark("compile/journal-unchanged", build(True), size="journal"),
+    ]
+
+
+# Grupos rodados por padrão, na ordem do relatório; "compile" é opcional.
+GROUPS: dict[str, Callable[[Path, float], list[Benchmark]]] = {
+    "render": render,
+    "copy": copy,
+    "log": log_summary,
+    "data": data_load,
+    "runner": runner,
+}
+OPTIONAL_GROUPS = {"compile": compile_journal}
@@ -0,0 +1,89 @@
+import re
+
+# Início de uma entrada: "@article{", "@string(", "@ preamble {"...
+_ENTRY_START = re.compile(r"@\s*([A-Za-z]+)\s*([{(])")
+_BRACES = re.compile(r"[{}]")
+_BRACES_PARENS = re.compile(r"[{}()]")
+# Campos que puxam outras entradas junto: o biber precisa do pai de um
+# crossref/xref e dos conjuntos de xdata pra montar a entrada filha.
+_PARENT_FIELDS = re.compile(r"\b(?:crossref|xref|xdata)\s*=\s*[{\"]\s*([^{}\"]+?)\s*[}\"]", re.IGNORECASE)
+
+# Entradas sem chave, que valem pro arquivo todo e sempre ficam.
+GLOBAL_KINDS = {"string", "preamble"}
+
+
+class BibEntry:
+    """Uma entrada de um .bib, com o texto original intacto."""
+
+    def __init__(self, kind: str, key: str | None, text: str):
+        self.kind = kind
+        self.key = key
+        self.text = text
+
+    def parents(self) -> list[str]:
+        return [key.strip() for group in _PARENT_FIELDS.findall(self.text) for key in group.split(",") if key.strip()]
+
+
+def parse_bib(text: str) -> list[BibEntry]:
+    """Separa um .bib em entradas, na ordem do arquivo.
+
+    Só acha os limites de cada entrada (chaves balanceadas, ou parênteses
+    no formato "@tipo( ... )"), sem interpretar os campos: o custo é linear
+    no tamanho do arquivo. Texto solto entre entradas e @comment somem.
+    """
+    entries = []
+    pos = 0
+    while True:
+        m = _ENTRY_START.search(text, pos)
+        if m is None:
+            break
+        kind = m.group(1).lower()
+        parens = m.group(2) == "("
+        depth = 0
+        end = len(text)
+        for b in (_BRACES_PARENS if parens else _BRACES).finditer(text, m.end()):
+            ch = b.group()
+            if ch == "{":
+                depth += 1
+            elif ch == "}":
+                if depth == 0 and not parens:
+                    end = b.end()
+                    break
+                depth -= 1
+            elif ch == ")" and depth == 0:
+                end = b.end()
+                break
+        pos = end
+        if kind == "comment":
+            continue
+        body = text[m.end():end - 1]
+        key = None
+        if kind not in GLOBAL_KINDS:
+            key = body.split(",", 1)[0].strip() or None
+        entries.append(BibEntry(kind, key, text[m.start():end]))
+    return entries
+
+
+def prune_bib(text: str, keys: set[str]) -> tuple[str, int, int]:
+    """Mantém só as entradas citadas em `keys`, seus pais e os @string/@preamble.
+
+    Devolve (novo .bib, entradas mantidas, entradas no total). Com "*" em
+    `keys` (\\nocite{*}) nada é removido.
+    """
+    entries = parse_bib(text)
+    total = sum(e.key is not None for e in entries)
+    if "*" in keys:
+        return text, total, total
+
+    by_key = {e.key: e for e in entries if e.key is not None}
+    wanted: set[str] = set()
+    stack = [k for k in keys if k in by_key]
+    while stack:
+        key = stack.pop()
+        if key in wanted:
+            continue
+        wanted.add(key)
+        stack.extend(p for p in by_key[key].parents() if p in by_key and p not in wanted)
+
+    kept = [e.text for e in entries if e.key is None or e.key in wanted]
+    return "\n\n".join(kept) + "\n", len(wanted), total
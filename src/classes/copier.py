@@ -0,0 +1,144 @@
+import concurrent.futures
+import os
+import shutil
+import sys
+import threading
+from collections.abc import Callable, Iterable
+from pathlib import Path
+
+from classes import trace
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# ioctl do Linux que faz o destino compartilhar os blocos da origem
+# (reflink): btrfs, XFS, bcachefs... Cópia instantânea, copy-on-write.
+FICLONE = 0x40049409
+
+# Cópia é limitada por I/O, não por CPU: mais threads que núcleos compensa.
+COPY_JOBS = min(32, (os.cpu_count() or 1) + 4)
+
+Pair = tuple[Path, Path]
+# copy_function no estilo de shutil.copytree; devolve True se escreveu o destino.
+CopyFn = Callable[[Path, Path], bool | None]
+
+
+def _reflink(fsrc, fdst) -> bool:
+    if fcntl is None or not sys.platform.startswith("linux"):
+        return False
+    try:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    except OSError:
+        return False  # filesystem sem reflink ou origem/destino em devices diferentes
+    return True
+
+
+def _kernel_copy(fsrc, fdst, size: int) -> None:
+    """Copia dentro do kernel, sem passar os bytes pelo Python."""
+    infd, outfd = fsrc.fileno(), fdst.fileno()
+    offset = 0
+    for syscall in ("copy_file_range", "sendfile"):
+        fn = getattr(os, syscall, None)
+        if fn is None:
+            continue
+        try:
+            while offset < size:
+                if syscall == "sendfile":
+                    sent = fn(outfd, infd, offset, size - offset)
+                else:
+                    sent = fn(infd, outfd, size - offset, offset_src=offset)
+                if sent == 0:
+                    break
+                offset += sent
+            return
+        except OSError:
+            if offset:
+                raise  # falhou no meio: não dá pra continuar de outro jeito
+            # ENOSYS/EXDEV/EINVAL: tenta o próximo mecanismo
+    shutil.copyfileobj(fsrc, fdst, 1 << 20)
+
+
+def fast_copy(src: Path, dst: Path) -> None:
+    """Equivalente a shutil.copy2, usando o caminho mais rápido disponível.
+
+    Ordem: reflink (FICLONE) → copy_file_range → sendfile → cópia em
+    userspace. Um symlink ou hardlink no destino (modo symlink, store de
+    objetos) é substituído, nunca escrito por dentro: isso alteraria a
+    origem ou os outros build dirs que compartilham o arquivo.
+    """
+    if dst.is_symlink() or (dst.exists() and dst.stat().st_nlink > 1):
+        dst.unlink()
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        if not _reflink(fsrc, fdst):
+            _kernel_copy(fsrc, fdst, os.fstat(fsrc.fileno()).st_size)
+    shutil.copystat(src, dst)
+
+
+def _format_bytes(size: float) -> str:
+    if size < 1024:
+        return f"{size:.0f} B"
+    for unit in ("KB", "MB", "GB"):
+        size /= 1024
+        if size < 1024 or unit == "GB":
+            break
+    return f"{size:.1f} {unit}"
+
+
+class CopyStats:
+    """Quanto um CopyTree moveu: arquivos escritos, bytes e arquivos em dia."""
+
+    def __init__(self) -> None:
+        self.files = 0
+        self.bytes = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def add(self, copied: bool, size: int) -> None:
+        with self._lock:
+            if copied:
+                self.files += 1
+                self.bytes += size
+            else:
+                self.skipped += 1
+
+    def __str__(self) -> str:
+        return f"{self.files} arquivo(s), {_format_bytes(self.bytes)} copiados, {self.skipped} em dia"
+
+
+def copy_files(pairs: Iterable[Pair], copy_fn: CopyFn, *, jobs: int = COPY_JOBS) -> CopyStats:
+    """Aplica `copy_fn` a cada (origem, destino) em paralelo.
+
+    As pastas de destino já devem existir. A primeira exceção de uma cópia
+    é propagada depois que as demais terminam.
+    """
+    stats = CopyStats()
+    pairs = list(pairs)
+
+    def one(pair: Pair) -> None:
+        src, dst = pair
+        copied = copy_fn(src, dst) is not False
+        # Symlinks não movem bytes; o tamanho vem do destino porque a origem
+        # pode ser um Traversable (recurso dentro de um zip).
+        stats.add(copied, 0 if not copied or dst.is_symlink() else dst.stat().st_size)
+
+    if trace.current() is not None:
+        # Com --trace, cada arquivo vira um trecho na thread de cópia que o
+        # levou; sem trace, nem o wrapper existe.
+        untraced = one
+
+        def one(pair: Pair) -> None:
+            with trace.span(pair[1].name, "copy-file", src=str(pair[0])):
+                untraced(pair)
+
+    if len(pairs) <= 1 or jobs <= 1:
+        for pair in pairs:
+            one(pair)
+        return stats
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="texflow-copy") as pool:
+        futures = [pool.submit(one, pair) for pair in pairs]
+    for future in futures:
+        future.result()
+    return stats
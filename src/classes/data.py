@@ -1,4 +1,5 @@
 import json
+from collections.abc import Iterator
 from pathlib import Path
 from typing import Any, TypedDict
 
@@ -32,6 +33,11 @@ class Data:
         self._validate(raw)
         self._data = raw
 
+    def load_from_dict(self, raw: Any) -> None:
+        """Carrega um objeto já parseado (ex: um item de um lote)."""
+        self._validate(raw)
+        self._data = raw
+
     def _validate(self, data: Any) -> None:
         if not isinstance(data, dict):
             raise TypeError("JSON deve ser um objeto")
@@ -42,6 +48,33 @@ class Data:
         if not isinstance(data["payload"], dict):
             raise TypeError("payload deve ser um objeto")
 
+    @classmethod
+    def iter_jsonl(cls, file_path: Path) -> Iterator[tuple[int, "Data | Exception"]]:
+        """Lê um arquivo JSON Lines sob demanda, uma linha por documento.
+
+        Cada linha passa pelas mesmas regras de _validate e é entregue assim
+        que é lida, então a memória não cresce com o tamanho do arquivo.
+        Linhas inválidas viram `(nº da linha, exceção)` em vez de abortar a
+        leitura; linhas em branco são ignoradas.
+        """
+        with open(file_path, encoding="utf-8") as f:
+            for lineno, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                data = cls()
+                try:
+                    data.load_from_string(line)
+                except (ValueError, TypeError) as e:
+                    yield lineno, e
+                    continue
+                yield lineno, data
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Campo de topo fora do payload (ex: "name" de um item de lote)."""
+        if self._data is None:
+            raise RuntimeError("Dados não carregados")
+        return self._data.get(key, default)
+
     def get_payload(self) -> dict[str, Any]:
         if self._data is None:
             raise RuntimeError("Dados não carregados")
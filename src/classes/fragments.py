@@ -0,0 +1,188 @@
+import hashlib
+import json
+import threading
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+from jinja2.runtime import Context
+from jinja2.utils import missing
+
+# Pilha (por thread) de conjuntos de nomes lidos pelo fragmento em
+# renderização. RenderTemplate roda em threads, então cada thread tem a sua.
+_tracking = threading.local()
+_save_lock = threading.Lock()
+
+# Versão do formato das entradas: entradas de outra versão são descartadas.
+FORMAT = 2
+
+
+def _frames() -> list[set[str]]:
+    frames = getattr(_tracking, "frames", None)
+    if frames is None:
+        frames = _tracking.frames = []
+    return frames
+
+
+class TrackingContext(Context):
+    """Context do Jinja que anota cada nome resolvido no fragmento atual.
+
+    O código gerado pelo Jinja resolve todas as variáveis de um bloco via
+    resolve_or_missing() logo no início da função do bloco (inclusive as de
+    ramos de {% if %} não tomados), então o conjunto anotado é um
+    superconjunto seguro do que o bloco de fato lê. Fora de um render com
+    fragmentos a pilha está vazia e isto é um Context comum.
+    """
+
+    def resolve_or_missing(self, key: str) -> Any:
+        frames = _frames()
+        if frames:
+            frames[-1].add(key)
+        return super().resolve_or_missing(key)
+
+
+def _digest(values: Any) -> str:
+    payload = json.dumps(values, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def sources_digest(paths: Iterable[Path]) -> str:
+    """Checksum do CONTEÚDO dos fontes do template: qualquer edição neles
+    invalida todos os fragmentos cacheados."""
+    h = hashlib.blake2b(digest_size=16)
+    for path in sorted(paths):
+        h.update(str(path).encode("utf-8") + b"\0")
+        try:
+            h.update(path.read_bytes())
+        except OSError:
+            h.update(b"-")
+    return h.hexdigest()
+
+
+class FragmentCache:
+    """Cache de saída por {% block %}, chaveado pelas chaves do payload lidas.
+
+    A cada render, cada bloco registra quais chaves do payload ele resolveu
+    (e, se usou algo definido no próprio template — macro, {% set %},
+    {% import %} —, passa a depender também das chaves lidas no nível de
+    topo, de onde esses valores vêm). No próximo render, um bloco cujas
+    chaves têm os mesmos valores devolve a saída anterior sem executar:
+    mudar o título não re-renderiza 50 páginas de tabelas.
+
+    Um bloco que lê algo local de onde foi chamado (ex: a variável de um
+    {% for %} em volta de um {% block ... scoped %}) não é cacheado: a saída
+    dele depende de valores que não estão no payload.
+
+    O arquivo guarda um registro por template renderizado (`key`), e tudo é
+    descartado quando o checksum dos fontes (`salt`) muda.
+    """
+
+    def __init__(self, path: Path, key: str, salt: str):
+        self.path = path
+        self.key = key
+        self.salt = salt
+        self.hits = 0
+        self.misses = 0
+        entry = self._load().get(key, {})
+        valid = entry.get("salt") == salt and entry.get("format") == FORMAT
+        self.blocks: dict[str, dict] = entry.get("blocks", {}) if valid else {}
+
+    def _load(self) -> dict:
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def save(self) -> None:
+        # Relê antes de gravar: outros RenderTemplate (outros `key`) podem ter
+        # gravado o mesmo arquivo desde que este foi carregado.
+        with _save_lock:
+            data = self._load()
+            data[self.key] = {"salt": self.salt, "format": FORMAT, "blocks": self.blocks}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            tmp.replace(self.path)
+
+    def render(self, template, context: dict) -> str:
+        """Renderiza `template` reaproveitando blocos cujas entradas não mudaram."""
+        ctx = template.new_context(context)
+        if not isinstance(ctx, TrackingContext):
+            # Environment sem TrackingContext: não há como rastrear leituras.
+            return template.render(**context)
+
+        root_keys: set[str] = set()
+        concat = template.environment.concat
+
+        def key_values(keys: list[str], uses_root: bool) -> str:
+            names = set(keys) | (root_keys if uses_root else set())
+            return _digest({k: context[k] for k in sorted(names) if k in context})
+
+        def classify(block_ctx, read: set[str]) -> tuple[list[str], bool] | None:
+            """(chaves do payload, usa o root?) das leituras, ou None se o
+            bloco leu um valor local de quem o chamou (não cacheável)."""
+            keys, uses_root = [], False
+            for k in sorted(read):
+                value = block_ctx.vars[k] if k in block_ctx.vars else block_ctx.parent.get(k, missing)
+                if value is missing:
+                    keys.append(k)  # indefinido agora; se entrar no payload, muda o digest
+                elif k in ctx.vars and value is ctx.vars[k]:
+                    # Macros, {% set %} e {% import %} de nível de topo vivem
+                    # em ctx.vars e carregam valores lidos pelo root.
+                    uses_root = True
+                elif k in ctx.parent and value is ctx.parent[k]:
+                    if k in context:
+                        keys.append(k)  # o resto é global do Environment
+                else:
+                    return None
+            return keys, uses_root
+
+        def propagate(frames: list[set[str]], keys: Iterable[str]) -> None:
+            # Um bloco aninhado depende do que o bloco externo lê, mas o nível
+            # de topo (frames[0]) só guarda o que o root_render_func resolve.
+            if len(frames) > 1:
+                frames[-1].update(keys)
+
+        def wrap(name, real):
+            def cached_block(block_ctx):
+                frames = _frames()
+                entry = self.blocks.get(name)
+                if entry is not None and entry["digest"] == key_values(entry["keys"], entry["uses_root"]):
+                    self.hits += 1
+                    propagate(frames, [*entry["keys"], *(root_keys if entry["uses_root"] else ())])
+                    yield entry["output"]
+                    return
+
+                self.misses += 1
+                frames.append(set())
+                try:
+                    output = concat(real(block_ctx))
+                finally:
+                    read = frames.pop()
+                propagate(frames, read)
+
+                deps = classify(block_ctx, read)
+                if deps is None:
+                    self.blocks.pop(name, None)
+                    yield output
+                    return
+                keys, uses_root = deps
+                self.blocks[name] = {
+                    "keys": keys,
+                    "uses_root": uses_root,
+                    "digest": key_values(keys, uses_root),
+                    "output": output,
+                }
+                yield output
+
+            return cached_block
+
+        for name, stack in ctx.blocks.items():
+            stack[0] = wrap(name, stack[0])
+
+        frames = _frames()
+        frames.append(root_keys)
+        try:
+            return concat(template.root_render_func(ctx))
+        finally:
+            frames.pop()
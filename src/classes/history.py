@@ -0,0 +1,270 @@
+import contextlib
+import os
+import sqlite3
+import sys
+import time
+from collections.abc import Iterable
+from pathlib import Path
+
+# Um build é uma regressão quando leva mais que SLOWDOWN × a mediana dos
+# BASELINE_BUILDS anteriores comparáveis (e pelo menos MIN_SLOWDOWN
+# segundos a mais: em builds de 0,3s, 2× é ruído de disco).
+SLOWDOWN = 1.5
+MIN_SLOWDOWN = 0.5
+BASELINE_BUILDS = 10
+MIN_BASELINE = 3
+
+# Builds guardados por template; os mais antigos saem.
+MAX_BUILDS = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    template TEXT NOT NULL,
+    template_digest TEXT,
+    payload_digest TEXT,
+    engine TEXT,
+    profile TEXT,
+    ok INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    passes INTEGER,
+    pages INTEGER,
+    pdf_cache TEXT,
+    tasks_run INTEGER,
+    tasks_skipped INTEGER,
+    files_copied INTEGER,
+    bytes_copied INTEGER,
+    version TEXT
+);
+CREATE INDEX IF NOT EXISTS builds_template ON builds (template, started);
+CREATE TABLE IF NOT EXISTS tasks (
+    build_id INTEGER NOT NULL REFERENCES builds (id) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    name TEXT NOT NULL,
+    seconds REAL,
+    skipped INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_build ON tasks (build_id);
+"""
+
+_BUILD_COLUMNS = (
+    "started", "template", "template_digest", "payload_digest", "engine", "profile", "ok", "seconds",
+    "passes", "pages", "pdf_cache", "tasks_run", "tasks_skipped", "files_copied", "bytes_copied", "version",
+)
+
+# Build sendo medido agora (ver recording); run_latex_command e o cache de
+# PDFs anotam nele passadas, páginas e hit/miss.
+_ACTIVE: "BuildRecord | None" = None
+
+
+class BuildRecord:
+    """O que um build mediu, preenchido enquanto ele roda."""
+
+    def __init__(self, template: Path, *, engine: str, profile: str, template_digest: str, payload_digest: str):
+        self.template = str(template)
+        self.engine = engine
+        self.profile = profile
+        self.template_digest = template_digest
+        self.payload_digest = payload_digest
+        self.started = time.time()
+        self.seconds = 0.0
+        self.ok = False
+        self.passes = 0
+        self.pages: int | None = None
+        self.pdf_cache: str | None = None  # "hit", "miss" ou None (sem cache)
+        self.files_copied = 0
+        self.bytes_copied = 0
+        self.tasks: list[tuple[str, str, float | None, bool]] = []
+
+    def latex_run(self, passes: int, pages: int | None) -> None:
+        self.passes += passes
+        if pages is not None:
+            self.pages = pages
+
+    def collect(self, tasks: Iterable, build_dir: Path) -> None:
+        """Duração, pulo e bytes copiados de cada tarefa, depois do runner."""
+        for t in tasks:
+            key = t.key.replace(str(build_dir), "build")
+            self.tasks.append((key, t.name, t.elapsed, t.skipped))
+            stats = getattr(t, "stats", None)
+            if stats is not None:
+                self.files_copied += stats.files
+                self.bytes_copied += stats.bytes
+
+    def row(self) -> dict:
+        from configs.version import __version__
+
+        return {
+            "started": self.started,
+            "template": self.template,
+            "template_digest": self.template_digest,
+            "payload_digest": self.payload_digest,
+            "engine": self.engine,
+            "profile": self.profile,
+            "ok": int(self.ok),
+            "seconds": self.seconds,
+            "passes": self.passes,
+            "pages": self.pages,
+            "pdf_cache": self.pdf_cache,
+            "tasks_run": sum(1 for t in self.tasks if t[2] is not None and not t[3]),
+            "tasks_skipped": sum(1 for t in self.tasks if t[3]),
+            "files_copied": self.files_copied,
+            "bytes_copied": self.bytes_copied,
+            "version": __version__,
+        }
+
+
+class BuildHistory:
+    """Histórico de builds em SQLite (um arquivo por usuário, todos os templates)."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._conn: sqlite3.Connection | None = None
+
+    @contextlib.contextmanager
+    def session(self):
+        """Uma conexão só para tudo o que rodar no bloco (ex: o --stats)."""
+        with self._connect() as conn:
+            self._conn = conn
+            try:
+                yield self
+            finally:
+                self._conn = None
+
+    @contextlib.contextmanager
+    def _connect(self):
+        if self._conn is not None:
+            with self._conn:
+                yield self._conn
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA foreign_keys = ON")
+            conn.executescript(SCHEMA)
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def add(self, record: BuildRecord) -> int:
+        row = record.row()
+        with self._connect() as conn:
+            cur = conn.execute(
+                f"INSERT INTO builds ({', '.join(_BUILD_COLUMNS)}) VALUES ({', '.join('?' * len(_BUILD_COLUMNS))})",
+                [row[c] for c in _BUILD_COLUMNS],
+            )
+            build_id = cur.lastrowid
+            conn.executemany(
+                "INSERT INTO tasks (build_id, key, name, seconds, skipped) VALUES (?, ?, ?, ?, ?)",
+                [(build_id, key, name, seconds, int(skipped)) for key, name, seconds, skipped in record.tasks],
+            )
+            conn.execute(
+                "DELETE FROM builds WHERE template = ? AND id NOT IN "
+                "(SELECT id FROM builds WHERE template = ? ORDER BY id DESC LIMIT ?)",
+                (record.template, record.template, MAX_BUILDS),
+            )
+        return build_id
+
+    def builds(self, template: str | None = None, limit: int = MAX_BUILDS) -> list[sqlite3.Row]:
+        """Builds mais recentes primeiro, de um template ou de todos."""
+        if not self.path.exists():
+            return []
+        query = "SELECT * FROM builds"
+        params: list = []
+        if template is not None:
+            query += " WHERE template = ?"
+            params.append(template)
+        with self._connect() as conn:
+            return conn.execute(query + " ORDER BY id DESC LIMIT ?", [*params, limit]).fetchall()
+
+    def tasks(self, build_id: int) -> list[sqlite3.Row]:
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT * FROM tasks WHERE build_id = ? ORDER BY seconds DESC", (build_id,)
+            ).fetchall()
+
+    def baseline(self, build) -> float | None:
+        """Mediana dos builds anteriores comparáveis a `build` (linha ou BuildRecord).
+
+        Comparáveis: mesmo template, engine e perfil (build/--draft/--only),
+        que terminaram sem erro e do mesmo lado do cache de PDFs — um hit
+        leva milissegundos e derrubaria a mediana dos builds de verdade.
+        """
+        row = build.row() if isinstance(build, BuildRecord) else dict(build)
+        query = (
+            "SELECT seconds FROM builds WHERE template = ? AND engine IS ? AND profile IS ? AND ok = 1 "
+            "AND (COALESCE(pdf_cache, '') = 'hit') = ? AND started < ? ORDER BY started DESC LIMIT ?"
+        )
+        with self._connect() as conn:
+            seconds = [
+                r["seconds"] for r in conn.execute(
+                    query,
+                    (row["template"], row["engine"], row["profile"], row["pdf_cache"] == "hit", row["started"], BASELINE_BUILDS),
+                )
+            ]
+        return median(seconds) if len(seconds) >= MIN_BASELINE else None
+
+    def slowdown(self, build) -> tuple[float, float] | None:
+        """(razão, mediana) se `build` foi bem mais lento que a mediana recente."""
+        row = build.row() if isinstance(build, BuildRecord) else dict(build)
+        median = self.baseline(row)
+        if median is None or not row["ok"] or not is_regression(row["seconds"], median):
+            return None
+        return row["seconds"] / median, median
+
+
+def is_regression(seconds: float, median: float) -> bool:
+    return seconds > SLOWDOWN * median and seconds - median > MIN_SLOWDOWN
+
+
+def median(values: list[float]) -> float:
+    # Sem o módulo statistics: ele custa ~7ms de import em todo build (e o
+    # --stats usa esta mesma função).
+    ordered = sorted(values)
+    mid = len(ordered) // 2
+    return ordered[mid] if len(ordered) % 2 else (ordered[mid - 1] + ordered[mid]) / 2
+
+
+def enabled() -> bool:
+    # TEXFLOW_HISTORY=0 desliga (ex: CI, ou builds em disco somente leitura).
+    return os.getenv("TEXFLOW_HISTORY", "1") != "0"
+
+
+def current() -> BuildRecord | None:
+    return _ACTIVE
+
+
+@contextlib.contextmanager
+def recording(record: BuildRecord, tasks: list, build_dir: Path, history: BuildHistory):
+    """Mede o bloco (um Task.runner) e anexa o build ao histórico, mesmo se falhar.
+
+    Avisa no stderr quando o build foi bem mais lento que a mediana recente
+    do mesmo template. Falhas do histórico nunca derrubam o build.
+    """
+    global _ACTIVE
+    previous, _ACTIVE = _ACTIVE, record
+    start = time.perf_counter()
+    try:
+        yield record
+        record.ok = True
+    finally:
+        _ACTIVE = previous
+        record.seconds = time.perf_counter() - start
+        record.collect(tasks, build_dir)
+        try:
+            with history.session():
+                history.add(record)
+                slow = history.slowdown(record)
+        except (sqlite3.Error, OSError) as e:
+            print(f"⚠️  Histórico de builds indisponível ({e})", file=sys.stderr)
+            slow = None
+        if slow is not None:
+            ratio, median = slow
+            print(
+                f"🐢 Build {ratio:.1f}× mais lento que a mediana recente deste template "
+                f"({record.seconds:.2f}s vs {median:.2f}s). Veja `texflow --stats`.",
+                file=sys.stderr,
+            )
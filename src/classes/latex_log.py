@@ -0,0 +1,251 @@
+import re
+from pathlib import Path
+
+# Quantos caracteres depois de um "! erro" procuramos o "l.<n> trecho".
+ERROR_CONTEXT = 600
+
+_ERROR = re.compile(r"^! (.+)$")
+_LINE_REF = re.compile(r"l\.(\d+)\s*(.*)")
+_PLACEHOLDER = re.compile(r"<<\s*([^<>]+?)\s*>>")
+_MISSING_CHAR = re.compile(r"Missing character: There is no (.+?) in font (.+?)!")
+_CITATION = re.compile(r"LaTeX Warning: Citation '([^']+)' .*undefined(?: on input line (\d+))?")
+_REFERENCE = re.compile(r"LaTeX Warning: Reference `([^`]+)' .* undefined(?: on input line (\d+))?")
+_NO_FILE = re.compile(r"No file ([\w\./-]+)\.")
+_OVERFULL = re.compile(r"Overfull \\hbox.*")
+_OUTPUT = re.compile(r"Output written on (.+?) \((\d+) pages\)\.")
+# Página despachada pro PDF: "[1] [2{/usr/.../pdftex.map}]".
+_PAGE = re.compile(r"(?:^|\s)\[(\d+)")
+
+# Erros depois dos quais o engine não se recupera: continuar a passada (ou
+# as próximas, com o -f do latexmk) não produz nada de útil.
+FATAL_MARKERS = (
+    "! Emergency stop.",
+    "Fatal error occurred",
+    "! TeX capacity exceeded",
+    "*** (job aborted",
+)
+
+
+class _LineRef:
+    """Um "l.<n> trecho" do log."""
+
+    def __init__(self, line: str, snippet: str):
+        self.line = line
+        self.snippet = snippet.strip()
+
+
+class LatexLogAnalyzer:
+    """Resumo de um log do LaTeX montado enquanto ele é lido, numa passada só.
+
+    Cada linha passa por checagens baratas de substring antes de qualquer
+    regex, e cada "! erro" procura seu "l.<n>" só nas linhas seguintes (até
+    ERROR_CONTEXT caracteres): o custo é linear no tamanho do log, mesmo em
+    logs de 100k linhas cheios de erros.
+
+    `feed()` aceita pedaços arbitrários de texto (ex: saída de um processo
+    em andamento); `feed_file()` lê só o que foi acrescentado a um arquivo
+    desde a última chamada, guardando o offset.
+    """
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.errors: list[dict] = []
+        self.placeholders: dict[str, None] = {}
+        self.missing_chars: dict[str, dict[str, None]] = {}
+        self.cite_keys: dict[str, None] = {}
+        self.ref_keys: dict[str, None] = {}
+        self.no_bbl: list[str] = []
+        self.empty_bib = False
+        self.ask_biber = False
+        self.overfull = 0
+        self.output: tuple[str, str] | None = None
+        # Progresso ao vivo: última página despachada e se houve erro fatal.
+        self.pages = 0
+        self.fatal = False
+
+        self._partial = ""
+        self._last_ref: _LineRef | None = None
+        # "l.<n>" no fim da linha: o \s* da regex original atravessa a quebra
+        # de linha, então o trecho é a próxima linha não vazia.
+        self._awaiting: list[_LineRef] = []
+        # Erros ainda procurando o "l.<n>": [erro, caracteres já vistos, fallback]
+        self._pending: list[list] = []
+        self._file_id: tuple[int, int] | None = None
+        self.offset = 0
+
+    # ------------------------------------------------------------------ entrada
+
+    def feed(self, text: str) -> None:
+        """Processa um pedaço de texto; linhas incompletas esperam o próximo."""
+        text = self._partial + text
+        lines = text.split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self.feed_line(line)
+
+    def close(self) -> None:
+        """Fim da entrada: processa a última linha e resolve erros pendentes."""
+        if self._partial:
+            line, self._partial = self._partial, ""
+            self.feed_line(line)
+        for error, _, fallback in self._pending:
+            error["ref"] = fallback
+        self._pending = []
+
+    def feed_file(self, path: Path) -> bool:
+        """Lê de `path` só o que foi escrito desde a última chamada.
+
+        O offset vale enquanto o arquivo só cresce: se ele foi recriado
+        (outro inode) ou truncado (nova passada do engine), a análise
+        recomeça do zero. Devolve True nesse caso.
+        """
+        try:
+            st = path.stat()
+        except OSError:
+            return False
+        file_id = (st.st_dev, st.st_ino)
+        restarted = file_id != self._file_id or st.st_size < self.offset
+        if restarted:
+            self.reset()
+            self._file_id = file_id
+
+        with open(path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read()
+        # Só consome até a última quebra de linha: uma linha (ou um caractere
+        # UTF-8) pela metade fica para a próxima leitura.
+        end = data.rfind(b"\n") + 1
+        self.offset += end
+        self.feed(data[:end].decode("utf-8", errors="replace"))
+        return restarted
+
+    def feed_line(self, line: str) -> None:
+        m = _ERROR.match(line) if line.startswith("! ") else None
+        if m:
+            # O fallback só enxerga o log ANTES do erro: um "l.<n>" ainda sem
+            # trecho fica sem trecho para este erro.
+            fallback = self._last_ref
+            if fallback is not None and fallback in self._awaiting:
+                fallback = _LineRef(fallback.line, "")
+
+        if self._awaiting and line.strip():
+            for ref in self._awaiting:
+                ref.snippet = line.strip()
+            self._awaiting = []
+
+        self._advance_pending(line)
+
+        if m:
+            error = {"msg": m.group(1).strip(), "ref": None}
+            self.errors.append(error)
+            self._pending.append([error, 0, fallback])
+
+        if not self.fatal and any(marker in line for marker in FATAL_MARKERS):
+            self.fatal = True
+        if "[" in line:
+            for page in _PAGE.findall(line):
+                self.pages = max(self.pages, int(page))
+
+        if "l." in line:
+            self._track_line_ref(line)
+        if "<<" in line:
+            for name in _PLACEHOLDER.findall(line):
+                self.placeholders.setdefault(name)
+        if "Missing character" in line:
+            for ch, font in _MISSING_CHAR.findall(line):
+                self.missing_chars.setdefault(font.strip(), {}).setdefault(ch.strip())
+        if "LaTeX Warning" in line:
+            self._warning(line)
+        if "No file" in line:
+            self.no_bbl.extend(_NO_FILE.findall(line))
+        if "Please (re)run Biber" in line:
+            self.ask_biber = True
+        if "Overfull" in line:
+            self.overfull += len(_OVERFULL.findall(line))
+        if self.output is None and "Output written" in line:
+            m = _OUTPUT.search(line)
+            if m:
+                self.output = (m.group(1), m.group(2))
+
+    def _warning(self, line: str) -> None:
+        if "Empty bibliography" in line:
+            self.empty_bib = True
+        for key, _ in _CITATION.findall(line):
+            self.cite_keys.setdefault(key)
+        for key, _ in _REFERENCE.findall(line):
+            self.ref_keys.setdefault(key)
+
+    def _track_line_ref(self, line: str) -> None:
+        # O último "l.<n>" visto é o fallback de um erro sem "l.<n>" depois dele.
+        matches = list(_LINE_REF.finditer(line))
+        if matches:
+            self._last_ref = self._line_ref(matches[-1])
+
+    def _line_ref(self, m: re.Match) -> _LineRef:
+        ref = _LineRef(m.group(1), m.group(2))
+        if not ref.snippet:
+            self._awaiting.append(ref)
+        return ref
+
+    def _advance_pending(self, line: str) -> None:
+        still_pending = []
+        for entry in self._pending:
+            error, seen, fallback = entry
+            # +1: o "\n" que separa esta linha da anterior.
+            budget = ERROR_CONTEXT - seen - 1
+            m = _LINE_REF.search(line[:budget]) if budget > 0 and "l." in line else None
+            if m:
+                error["ref"] = self._line_ref(m)
+                continue
+            entry[1] = seen + len(line) + 1
+            if entry[1] >= ERROR_CONTEXT:
+                error["ref"] = fallback
+            else:
+                still_pending.append(entry)
+        self._pending = still_pending
+
+    # ------------------------------------------------------------------ saída
+
+    def summary(self, max_examples: int = 6) -> str:
+        """Mesmo texto do antigo summarize_latex_log (chame close() antes)."""
+        parts = []
+        if self.errors:
+            parts.append("Erros LaTeX (primeiros):")
+            for e in self.errors[:max_examples]:
+                ref = e["ref"]
+                if ref is not None:
+                    parts.append(f" • linha {ref.line}: {e['msg']}  — trecho: {ref.snippet!s}")
+                else:
+                    parts.append(f" • {e['msg']}")
+        if self.placeholders:
+            parts.append("Placeholders não resolvidos:")
+            parts.append(" • " + ", ".join(list(self.placeholders)[:max_examples]))
+        if self.missing_chars:
+            parts.append("Caracteres faltando (provavelmente por math-mode):")
+            for font, chars in self.missing_chars.items():
+                parts.append(f" • {font}: {', '.join(list(chars)[:10])}")
+        cite_keys = list(self.cite_keys)
+        if cite_keys:
+            parts.append(f"Citações não encontradas ({len(cite_keys)}):")
+            parts.append(" • " + ", ".join(cite_keys[:max_examples]))
+            if len(cite_keys) > max_examples:
+                parts.append(f" • ... +{len(cite_keys)-max_examples} outros")
+        ref_keys = list(self.ref_keys)
+        if ref_keys:
+            parts.append(f"Referências não resolvidas ({len(ref_keys)}):")
+            parts.append(" • " + ", ".join(ref_keys[:max_examples]))
+        if self.no_bbl:
+            parts.append(f"Aviso: arquivo(s) de bibliografia ausente(s): {', '.join(self.no_bbl[:max_examples])}")
+        if self.empty_bib:
+            parts.append("Bibliografia vazia.")
+        if self.ask_biber:
+            parts.append("biblatex pede: rodar `biber output` e recompilar (biber + 2x xelatex).")
+        if self.overfull:
+            parts.append(f"Overfull \\hbox: {self.overfull} ocorrência(s) (avisos de layout).")
+        if self.output:
+            parts.append(f"PDF gerado: {self.output[0]} ({self.output[1]} páginas).")
+        if not parts:
+            return "Nenhuma indicação clara de erro encontrada no stdout."
+        return "\n".join(parts)
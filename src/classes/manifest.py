@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import threading
+from collections.abc import Callable
+from pathlib import Path
+
+# (tamanho, mtime_ns, inode): muda sempre que o arquivo é reescrito,
+# substituído ou trocado por outro com o mesmo nome.
+Stat = list[int]
+
+
+def _stat(path: Path) -> Stat | None:
+    try:
+        st = path.lstat()
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+
+def _hash(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=16)).hexdigest()
+
+
+class CopyManifest:
+    """Registro do que um CopyTree já copiou, gravado no destino.
+
+    Para cada arquivo (caminho relativo ao destino) guarda o stat da origem,
+    o stat do destino e um hash do conteúdo. No build seguinte, um arquivo
+    cujos dois stats não mudaram é pulado sem ler nenhum byte; se só a origem
+    mudou (ex: `touch`, checkout), basta hashear a origem para saber se a
+    cópia é necessária. O destino só é comparado byte a byte (via copy_fn)
+    quando não há registro ou quando foi mexido por fora.
+
+    Arquivos registrados que sumiram da origem são apagados do destino em
+    `prune()`: o custo de um build sem mudanças passa a ser um stat() por
+    arquivo, não o tamanho total do template.
+    """
+
+    def __init__(self, path: Path, root: Path):
+        self.path = path
+        self.root = root
+        self.entries: dict[str, dict] = self._load()
+        self.seen: set[str] = set()
+        # copy() é chamado em paralelo pelas threads de classes/copier.py.
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        # Um manifest de outro destino (pasta movida/renomeada) não vale.
+        if data.get("root") != str(self.root):
+            return {}
+        return data.get("files", {})
+
+    def copy(self, src, dst, *, copy_fn: Callable) -> bool:
+        """copy_function que consulta o manifest antes; True se copiou."""
+        src, dst = Path(src), Path(dst)
+        rel = os.path.relpath(dst, self.root)
+        with self._lock:
+            self.seen.add(rel)
+            entry = self.entries.get(rel)
+
+        src_stat = _stat(src)
+        dst_stat = _stat(dst)
+        digest = None
+
+        if entry is not None and dst_stat is not None and entry["dst"] == dst_stat:
+            if entry["src"] == src_stat:
+                return False  # nada mudou dos dois lados
+            digest = _hash(src)
+            if digest == entry["hash"]:
+                entry["src"] = src_stat  # só o mtime mudou: o destino já está certo
+                return False
+
+        copied = copy_fn(src, dst) is not False
+        record = {"src": src_stat, "dst": _stat(dst), "hash": digest or _hash(src)}
+        with self._lock:
+            self.entries[rel] = record
+        return copied
+
+    def stale(self) -> list[str]:
+        """Arquivos registrados cujo destino sumiu ou foi mexido desde a cópia."""
+        return sorted(rel for rel, entry in self.entries.items() if _stat(self.root / rel) != entry["dst"])
+
+    def prune(self, source: Path | None = None) -> list[str]:
+        """Apaga do destino o que foi copiado antes mas não existe mais na origem.
+
+        Com `source`, o que ainda existe lá mas não foi copiado desta vez
+        (passou a ser ignorado) só sai do manifesto: esse arquivo do destino
+        agora é escrito por outra tarefa (ex: o render de um .tex).
+        """
+        removed = []
+        for rel in sorted(rel for rel in self.entries if rel not in self.seen):
+            del self.entries[rel]
+            if source is None or not (source / rel).exists():
+                removed.append(rel)
+        for rel in removed:
+            target = self.root / rel
+            if target.is_symlink() or target.is_file():
+                target.unlink()
+            # Remove as pastas que ficaram vazias, sem nunca sair do destino.
+            parent = target.parent
+            while parent != self.root and parent.is_relative_to(self.root):
+                try:
+                    parent.rmdir()
+                except OSError:
+                    break
+                parent = parent.parent
+        return removed
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps({"root": str(self.root), "files": self.entries}), encoding="utf-8")
+        tmp.replace(self.path)
@@ -0,0 +1,106 @@
+import errno
+import hashlib
+import os
+import stat
+import tempfile
+import time
+from pathlib import Path
+
+from classes.copier import fast_copy
+
+# Erros de os.link() que significam "hardlink impossível aqui", não falha:
+# store em outro filesystem, filesystem sem hardlink, limite de links.
+_NO_LINK = {errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP, errno.EOPNOTSUPP}
+
+
+def _hash(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=20)).hexdigest()
+
+
+class ObjectStore:
+    """Store de arquivos endereçado por conteúdo, compartilhado entre builds.
+
+    Cada arquivo vira `<root>/<2 primeiros>/<resto do hash>` uma única vez,
+    somente leitura, e os build dirs recebem hardlinks para ele: N templates
+    ou N documentos de um lote com as mesmas fontes/logos/.bib ocupam o
+    disco uma vez só, e popular um build dir novo é só metadado.
+
+    Se o store estiver em outro filesystem (EXDEV) ou o filesystem não
+    suportar hardlinks, `link()` cai de volta para uma cópia comum.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def object_path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:]
+
+    def add(self, src: Path) -> Path:
+        """Garante que o conteúdo de `src` está no store; devolve o objeto."""
+        obj = self.object_path(_hash(src))
+        if obj.exists():
+            return obj
+
+        obj.parent.mkdir(parents=True, exist_ok=True)
+        # Copia pra um temporário e renomeia: outro build adicionando o mesmo
+        # conteúdo ao mesmo tempo nunca vê um objeto pela metade.
+        fd, tmp = tempfile.mkstemp(dir=obj.parent, prefix=".tmp-")
+        os.close(fd)
+        try:
+            fast_copy(src, Path(tmp))
+            # Somente leitura: editar o arquivo em um build dir alteraria
+            # todos os outros que apontam pro mesmo objeto.
+            os.chmod(tmp, stat.S_IMODE(os.stat(tmp).st_mode) & ~0o222)
+            os.replace(tmp, obj)
+        finally:
+            Path(tmp).unlink(missing_ok=True)
+        return obj
+
+    def link(self, src, dst) -> bool:
+        """copy_function do CopyTree: hardlink do objeto de `src` em `dst`."""
+        src, dst = Path(src), Path(dst)
+        try:
+            obj = self.add(src)
+        except OSError:
+            fast_copy(src, dst)  # store inacessível (disco cheio, permissão...)
+            return True
+
+        try:
+            if os.path.samefile(obj, dst):
+                return False
+        except OSError:
+            pass  # dst ainda não existe
+
+        if dst.is_symlink() or dst.exists():
+            dst.unlink()
+        try:
+            os.link(obj, dst)
+        except OSError as e:
+            if e.errno not in _NO_LINK:
+                raise
+            fast_copy(src, dst)
+        return True
+
+    def gc(self, grace: float = 3600) -> int:
+        """Remove objetos que nenhum build dir referencia mais (st_nlink == 1).
+
+        Objetos cujo inode mudou há menos de `grace` segundos (ctime: criação
+        ou novo link) ficam: podem ter acabado de entrar no store e ainda não
+        ter sido linkados por um build em andamento.
+        """
+        removed = 0
+        if not self.root.is_dir():
+            return removed
+        cutoff = time.time() - grace
+        for obj in self.root.glob("*/*"):
+            if obj.name.startswith(".tmp-"):
+                continue
+            try:
+                st = obj.stat()
+                if st.st_nlink == 1 and st.st_ctime < cutoff:
+                    obj.unlink()
+                    removed += 1
+            except OSError:
+                continue
+        return removed
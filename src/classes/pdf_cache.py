@@ -0,0 +1,134 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from collections.abc import Iterable
+from pathlib import Path
+
+# Artefatos que o compile produz e que o cache guarda/restaura.
+ARTIFACTS = ("main.pdf", "main.log", "main.synctex.gz")
+
+# Jobs que o compile roda em build/: o final, o rascunho do --draft e o
+# parcial do --only (que guarda as seções em build/main-only/).
+JOBNAMES = ("main", "main-draft", "main-only")
+
+# Extensões geradas pelo LaTeX/biber em qualquer lugar de build/ (ex: o .aux
+# de um \include): nunca entram no digest das entradas.
+GENERATED_SUFFIXES = {
+    ".aux", ".bbl", ".bcf", ".blg", ".fdb_latexmk", ".fls", ".glg", ".glo",
+    ".gls", ".idx", ".ilg", ".ind", ".ist", ".lof", ".log", ".lot", ".nav",
+    ".out", ".run.xml", ".snm", ".synctex.gz", ".toc", ".vrb", ".xdv",
+}
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def _is_generated(rel: Path) -> bool:
+    name = rel.name
+    if any(part.startswith(".texflow") for part in rel.parts):
+        return True  # estado interno do TexFlow (state file, cache do Jinja...)
+    if len(rel.parts) == 1 and name.startswith(tuple(f"{job}." for job in JOBNAMES)) and name != "main.tex":
+        return True  # produtos dos jobs (pdf, log, aux...)
+    if len(rel.parts) > 1 and rel.parts[0] in JOBNAMES:
+        return True  # seções geradas pelo --only
+    return any(name.endswith(suffix) for suffix in GENERATED_SUFFIXES)
+
+
+def inputs_digest(build_dir: Path, extra: Iterable[str] = ()) -> str:
+    """Digest do CONTEÚDO de tudo o que entra no compile.
+
+    Cobre todo arquivo de build/ que não é produto do próprio compile
+    (main.tex renderizado, .sty, .bib, imagens — seguindo symlinks), mais
+    `extra` (ex: o comando do engine). O caminho absoluto de build/ também
+    entra: o .synctex.gz guarda caminhos absolutos, então um PDF compilado
+    em outra pasta não serviria pro SyncTeX do editor.
+    """
+    h = hashlib.blake2b(digest_size=20)
+    h.update(str(build_dir.resolve()).encode("utf-8"))
+    for item in extra:
+        h.update(b"\0" + item.encode("utf-8"))
+
+    files = []
+    for dirpath, dirnames, filenames in os.walk(build_dir, followlinks=True):
+        dirnames.sort()
+        for f in filenames:
+            path = Path(dirpath) / f
+            rel = path.relative_to(build_dir)
+            if not _is_generated(rel):
+                files.append((rel.as_posix(), path))
+
+    for rel, path in sorted(files):
+        h.update(b"\0" + rel.encode("utf-8") + b"\0")
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+class PdfCache:
+    """Store local endereçado por conteúdo: digest das entradas → PDF.
+
+    Cada entrada é uma pasta `<root>/<digest>/` com os ARTIFACTS. O mtime da
+    pasta marca o último uso (atualizado a cada hit), e o tamanho total é
+    limitado por `max_bytes` com despejo LRU: as entradas usadas há mais
+    tempo saem primeiro.
+    """
+
+    def __init__(self, root: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def restore(self, digest: str, build_dir: Path) -> bool:
+        entry = self.root / digest
+        if not (entry / "main.pdf").exists():
+            return False
+
+        for name in ARTIFACTS:
+            cached = entry / name
+            target = build_dir / name
+            if cached.exists():
+                shutil.copy2(cached, target)
+            else:
+                target.unlink(missing_ok=True)  # não deixa um .log de outro build pra trás
+
+        now = time.time()
+        os.utime(entry, (now, now))
+        return True
+
+    def store(self, digest: str, build_dir: Path) -> None:
+        if not (build_dir / "main.pdf").exists():
+            return
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        entry = self.root / digest
+        # Escreve numa pasta temporária e renomeia: um build concorrente (ou
+        # interrompido) nunca deixa uma entrada pela metade.
+        tmp = Path(tempfile.mkdtemp(dir=self.root, prefix=".tmp-"))
+        try:
+            for name in ARTIFACTS:
+                if (build_dir / name).exists():
+                    shutil.copy2(build_dir / name, tmp / name)
+            if entry.exists():
+                shutil.rmtree(entry)
+            tmp.rename(entry)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        self.evict()
+
+    def evict(self) -> None:
+        entries = []
+        total = 0
+        for entry in self.root.iterdir():
+            if not entry.is_dir() or entry.name.startswith(".tmp-"):
+                continue
+            size = sum(f.stat().st_size for f in entry.iterdir())
+            entries.append((entry.stat().st_mtime, size, entry))
+            total += size
+
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
@@ -0,0 +1,187 @@
+import contextlib
+import cProfile
+import os
+import platform
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+# Arquivos do --profile em build/ (fora do digest do cache de PDFs, como
+# todo .texflow-*): o relatório pra ler e o pstats pra abrir no snakeviz etc.
+REPORT_FILE = ".texflow-profile.txt"
+STATS_FILE = ".texflow-profile.pstats"
+
+# Funções listadas no relatório, pela CPU acumulada.
+TOP_FUNCTIONS = 20
+
+# Perfil sendo gravado agora (ver recording); None = --profile desligado.
+_ACTIVE: "Profile | None" = None
+
+
+class TaskUsage:
+    """CPU e memória Python de uma tarefa do runner."""
+
+    def __init__(self, name: str, wall: float, cpu: float, peak: int, net: int, thread: str):
+        self.name = name
+        self.wall = wall
+        self.cpu = cpu
+        self.peak = peak
+        self.net = net
+        self.thread = thread
+
+
+class ChildUsage:
+    """rusage de um processo filho (latexmk e o que ele disparou)."""
+
+    def __init__(self, cmd: list[str], wall: float, rusage, returncode: int | None):
+        self.cmd = cmd
+        self.wall = wall
+        self.rusage = rusage
+        self.returncode = returncode
+
+
+class Profile:
+    """cProfile + tracemalloc do build inteiro, com a conta dividida por tarefa.
+
+    Desde o Python 3.12 um único cProfile enxerga todas as threads, então
+    ele cobre o processo todo; a CPU de cada tarefa vem do relógio da
+    thread que a rodou (time.thread_time). O tracemalloc só tem um pico por
+    processo: ele é zerado quando nenhuma tarefa está rodando, e o pico de
+    uma tarefa é medido acima da memória no início dela, então tarefas
+    simultâneas dividem (e somam) o mesmo pico.
+    """
+
+    def __init__(self) -> None:
+        self.profiler = cProfile.Profile()
+        self.tasks: list[TaskUsage] = []
+        self.children: list[ChildUsage] = []
+        self.wall = self.cpu = 0.0
+        self.peak = 0
+        self._running = 0
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        tracemalloc.start()
+        self._start = time.perf_counter()
+        self._cpu = time.process_time()
+        self.profiler.enable()
+
+    def stop(self) -> None:
+        self.profiler.disable()
+        self.wall = time.perf_counter() - self._start
+        self.cpu = time.process_time() - self._cpu
+        self.peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    @contextlib.contextmanager
+    def task(self, name: str):
+        """Mede o bloco (uma tarefa, na thread do worker) como `name`."""
+        with self._lock:
+            if self._running == 0:
+                tracemalloc.reset_peak()
+            self._running += 1
+            base = tracemalloc.get_traced_memory()[0]
+        start, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - start, time.thread_time() - cpu
+            with self._lock:
+                self._running -= 1
+                current, peak = tracemalloc.get_traced_memory()
+                self.tasks.append(
+                    TaskUsage(name, wall, cpu, max(peak - base, 0), current - base, threading.current_thread().name)
+                )
+
+    def child(self, cmd: list[str], wall: float, rusage, returncode: int | None) -> None:
+        with self._lock:
+            self.children.append(ChildUsage(list(cmd), wall, rusage, returncode))
+
+    def report(self, build_dir: Path | None = None) -> str:
+        from configs.version import __version__
+
+        def short(name: str) -> str:
+            return name.replace(str(build_dir), "build") if build_dir else name
+
+        lines = [
+            f"TeXFlow {__version__} · perfil do build",
+            f"Python {platform.python_version()} · {platform.platform()} · {os.cpu_count()} CPUs",
+            (
+                f"Tempo total: {self.wall:.2f}s · CPU do processo: {self.cpu:.2f}s · "
+                f"pico de memória Python: {_mib(self.peak)}"
+            ),
+            "",
+            "Tarefas (CPU da thread; memória: pico acima do início da tarefa, dividido entre tarefas simultâneas)",
+            f"  {'tarefa':<48} {'parede':>8} {'CPU':>8} {'pico mem':>10} {'retida':>10}  thread",
+        ]
+        for t in sorted(self.tasks, key=lambda t: t.wall, reverse=True):
+            lines.append(
+                f"  {short(t.name)[:48]:<48} {t.wall:7.2f}s {t.cpu:7.2f}s {_mib(t.peak):>10} {_mib(t.net):>10}  {t.thread}"
+            )
+
+        lines += ["", "Processos filhos (rusage: o processo e tudo o que ele disparou, ex: xelatex/biber do latexmk)"]
+        if not self.children:
+            lines.append("  nenhum")
+        else:
+            lines.append(f"  {'comando':<48} {'parede':>8} {'user':>8} {'sys':>8} {'RSS máx':>10}  código")
+        for c in self.children:
+            cmd = " ".join(c.cmd)[:48]
+            if c.rusage is None:
+                lines.append(f"  {cmd:<48} {c.wall:7.2f}s {'—':>8} {'—':>8} {'—':>10}  {c.returncode}")
+                continue
+            # ru_maxrss vem em KiB no Linux e em bytes no macOS.
+            rss = c.rusage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+            lines.append(
+                f"  {cmd:<48} {c.wall:7.2f}s {c.rusage.ru_utime:7.2f}s {c.rusage.ru_stime:7.2f}s "
+                f"{_mib(rss):>10}  {c.returncode}"
+            )
+
+        lines += ["", f"Funções mais caras (CPU acumulada; tudo em {STATS_FILE})"]
+        lines.append(f"  {'acumulado':>10} {'próprio':>10} {'chamadas':>9}  função")
+        stats = pstats.Stats(self.profiler).stats
+        top = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:TOP_FUNCTIONS]
+        for (filename, line, func), (_, calls, tottime, cumtime, _) in top:
+            where = f"{_short_path(filename)}:{line}({func})" if line else func
+            lines.append(f"  {cumtime:9.3f}s {tottime:9.3f}s {calls:>9}  {where}")
+        return "\n".join(lines) + "\n"
+
+    def save(self, build_dir: Path) -> None:
+        build_dir.mkdir(parents=True, exist_ok=True)
+        self.profiler.dump_stats(str(build_dir / STATS_FILE))
+        (build_dir / REPORT_FILE).write_text(self.report(build_dir), encoding="utf-8")
+
+
+def _mib(size: int) -> str:
+    return f"{size / 1024 / 1024:.1f} MiB"
+
+
+def _short_path(filename: str) -> str:
+    # site-packages/jinja2/... e src/classes/... são mais legíveis que o
+    # caminho absoluto, que de todo modo é da máquina de quem mandou o perfil.
+    parts = Path(filename).parts
+    for anchor in ("site-packages", "src"):
+        if anchor in parts:
+            return "/".join(parts[len(parts) - parts[::-1].index(anchor):])
+    return Path(filename).name
+
+
+def current() -> Profile | None:
+    return _ACTIVE
+
+
+@contextlib.contextmanager
+def recording(build_dir: Path):
+    """Perfila o bloco e grava o relatório e o .pstats em `build_dir`, mesmo se falhar."""
+    global _ACTIVE
+    profile = Profile()
+    previous, _ACTIVE = _ACTIVE, profile
+    profile.start()
+    try:
+        yield profile
+    finally:
+        profile.stop()
+        _ACTIVE = previous
+        profile.save(Path(build_dir))
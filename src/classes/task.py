@@ -1,11 +1,23 @@
+import contextlib
 import filecmp
-import shutil
+import fnmatch
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
 from abc import ABC, abstractmethod
-from collections.abc import Iterable
+from collections.abc import Callable, Iterable
 from importlib.abc import Traversable
 from pathlib import Path
 from typing import Literal
 
+from classes import profiler, trace
+from classes.bibliography import prune_bib
+from classes.copier import CopyStats, copy_files, fast_copy
+from classes.manifest import CopyManifest
+from classes.object_store import ObjectStore
 from configs.paths import BUILD_DIR
 
 Mode = Literal["thread", "process", "chain"]
@@ -18,8 +30,8 @@ def _same_content(src: Path, dst: Path) -> bool:
     return dst.exists() and not dst.is_symlink() and filecmp.cmp(src, dst, shallow=False)
 
 
-def _copy_if_changed(src, dst) -> None:
-    """copy_function para shutil.copytree: pula arquivos com conteúdo idêntico.
+def _copy_if_changed(src, dst) -> bool:
+    """copy_function do CopyTree (ver classes/copier.py): pula arquivos com conteúdo idêntico.
 
     Preserva o mtime do destino quando nada mudou, o que permite ao latexmk
     confiar no próprio cache incremental (.fdb_latexmk/.fls) em vez de
@@ -27,12 +39,13 @@ def _copy_if_changed(src, dst) -> None:
     """
     src, dst = Path(src), Path(dst)
     if _same_content(src, dst):
-        return
-    shutil.copy2(src, dst)
+        return False
+    fast_copy(src, dst)
+    return True
 
 
-def _symlink_or_copy(src, dst) -> None:
-    """copy_function para shutil.copytree: linka em vez de duplicar o arquivo.
+def _symlink_or_copy(src, dst) -> bool:
+    """copy_function do CopyTree (ver classes/copier.py): linka em vez de duplicar o arquivo.
 
     Assets binários (imagens/plots) normalmente não mudam entre builds, então
     um symlink evita cópia física redundante em build/. Se o destino já for
@@ -44,7 +57,7 @@ def _symlink_or_copy(src, dst) -> None:
 
     if dst.is_symlink():
         if dst.resolve() == src:
-            return
+            return False
         dst.unlink()
     elif dst.exists():
         dst.unlink()
@@ -52,7 +65,43 @@ def _symlink_or_copy(src, dst) -> None:
     try:
         dst.symlink_to(src)
     except OSError:
-        shutil.copy2(src, dst)
+        fast_copy(src, dst)
+    return True
+
+
+# 🔥 Arquivos .tex que DEVEM ser copiados mesmo com ignore_tex=True
+TEX_WHITELIST = {"glossaries.tex", "abstract.tex", "conclusions.tex"}
+
+# Pastas que nunca fazem parte de um fingerprint (nem de uma cópia).
+# "batch-build" guarda os build dirs do modo lote (scripts/batch.py).
+EXCLUDED_NAMES = {"build", "batch-build", "__pycache__", ".git"}
+
+
+def _fingerprint(paths: Iterable[Path], signature: str = "") -> str:
+    """Digest barato do estado de um conjunto de arquivos/pastas.
+
+    Ao estilo do make, olha só metadados (caminho, tamanho, mtime) em vez do
+    conteúdo: RenderTemplate/CopyTree já preservam o mtime do que não mudou,
+    então isso basta e custa um stat() por arquivo. Pastas são percorridas
+    recursivamente, ignorando EXCLUDED_NAMES. `signature` cobre entradas que
+    não são arquivos (ex: o payload de um RenderTemplate).
+    """
+    h = hashlib.blake2b(signature.encode("utf-8"), digest_size=16)
+    for root in sorted(Path(p) for p in paths):
+        if root.is_dir():
+            files = []
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames[:] = [d for d in dirnames if d not in EXCLUDED_NAMES]
+                files.extend(Path(dirpath) / f for f in filenames)
+        else:
+            files = [root]
+        for f in sorted(files):
+            try:
+                st = f.stat()
+                h.update(f"{f}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+            except OSError:
+                h.update(f"{f}\0-\n".encode())
+    return h.hexdigest()
 
 
 class Task(ABC):
@@ -60,22 +109,66 @@ class Task(ABC):
     mode: Mode
     dependencies: Dependencies
 
-    def __init__(self, dependencies: Dependencies, mode: Mode = "chain"):
+    def __init__(
+        self,
+        dependencies: Dependencies,
+        mode: Mode = "chain",
+        *,
+        inputs: Iterable[Path] | None = None,
+        outputs: Iterable[Path] | None = None,
+    ):
         self.mode = mode
         self.dependencies = dependencies or None
+        # Entradas/saídas declaradas habilitam o "pular se em dia" do
+        # runner: sem outputs, a tarefa sempre roda.
+        self.inputs = list(inputs or [])
+        self.outputs = list(outputs or [])
+        # Preenchidos pelo runner: duração medida no worker e se a tarefa
+        # foi pulada por estar em dia (ver classes/history.py).
+        self.elapsed: float | None = None
+        self.skipped = False
 
     @abstractmethod
     def run(self) -> None:
         pass
 
+    @property
+    def key(self) -> str:
+        """Identidade estável da tarefa entre builds (chave no state file)."""
+        return f"{self.name}:" + ",".join(str(p) for p in self.outputs)
+
+    def signature(self) -> str:
+        """Entradas que não são arquivos; subclasses sobrescrevem."""
+        return ""
+
+    def fingerprint(self) -> str:
+        return _fingerprint(self.inputs, self.signature())
+
     def __call__(self) -> None:
         self.run()
 
     @classmethod
-    def runner(cls, tasks: list["Task"]):
-        import time
-
-        from configs.spinner import spinner
+    def runner(cls, tasks: list["Task"], state: Path | None = None):
+        """Executa o grafo de tarefas respeitando as dependências.
+
+        Cada tarefa começa assim que as SUAS dependências terminam (não há
+        "ondas"): tarefas "thread" e "process" vão para executores de longa
+        duração (um por modo, reaproveitados entre builds) e tarefas "chain"
+        rodam em sequência na thread principal, em paralelo com o que já
+        estiver rodando em segundo plano.
+
+        Com `state` (um JSON dentro de build/), tarefas que declaram outputs
+        são puladas quando estão em dia, como no make: todas as dependências
+        também foram puladas, os outputs existem e o fingerprint das
+        entradas é o mesmo do último sucesso.
+
+        Com um trace ativo (classes/trace.py, `--trace`), cada tarefa vira
+        um trecho na linha do tempo, com início/fim medidos no worker, a
+        thread/processo que a rodou e setas das dependências.
+        """
+        import concurrent.futures
+
+        from configs.spinner import progress_target, spinner
         from scripts.utils import is_tty
 
         # yaspin.spinners só é usado para decorar o spinner interativo: sem
@@ -96,83 +189,208 @@ class Task(ABC):
             "chain": "🔗",
             "default": "⚙",
         }
-
-        completed = set()
-        remaining = set(tasks)
+        COLORS = {"chain": "cyan", "thread": "yellow", "process": "green"}
 
         def icon(t):
             return TASK_ICONS.get(t.name, TASK_ICONS.get(t.mode, TASK_ICONS["default"]))
 
-        while remaining:
-            ready = [
-                t
-                for t in remaining
-                if all(dep in completed for dep in (t.dependencies or []))
-            ]
-            if not ready:
-                raise RuntimeError("Dependências circulares detectadas.")
-
-            # ------- chain -------
-            chain_tasks = [t for t in ready if t.mode == "chain"]
-            if len(ready) == 1 and chain_tasks:
-                t = chain_tasks[0]
-
-                start = time.perf_counter()
-                with spinner(
-                    dots, text=f"{icon(t)} {t.name}", color="cyan"
-                ) as sp:
-                    t.run()
-                    end = time.perf_counter()
-                    sp.ok(f"✔ ({end - start:.2f}s)")
-
-                completed.add(t)
-                remaining.remove(t)
-                continue
+        def report(t, start, end, skipped=False):
+            with spinner(dots, text=f"{icon(t)} {t.name}", color=COLORS.get(t.mode)) as sp:
+                sp.ok("✔ (em dia)" if skipped else f"✔ ({end - start:.2f}s)")
+
+        fingerprints = _load_state(state)
+        ran: set[Task] = set()
+
+        def previous(t):
+            # Se alguma dependência rodou, a tarefa roda também (o fingerprint
+            # antigo não vale mais), mesmo que as próprias entradas batam.
+            if state is None or any(dep in ran for dep in (t.dependencies or [])):
+                return None
+            return fingerprints.get(t.key)
+
+        timeline = trace.current()
+        events: dict[Task, dict] = {}
+
+        def record(t, digest, skipped, start, end, where):
+            t.elapsed, t.skipped = end - start, skipped
+            if not skipped:
+                ran.add(t)
+            if digest is not None:
+                fingerprints[t.key] = digest
+            traced(t, start, end, where, skipped=skipped)
+
+        def traced(t, start, end, where, **args):
+            if timeline is None:
+                return
+            pid, tid, thread_name = where
+            deps = [dep for dep in (t.dependencies or []) if dep in events]
+            events[t] = timeline.complete(
+                t.key, t.name, start, end, pid=pid, tid=tid, thread_name=thread_name,
+                args={"mode": t.mode, **args, "dependencies": [dep.key for dep in deps]},
+            )
+            for dep in deps:
+                timeline.flow(events[dep], events[t])
+
+        def failed(t, e):
+            fingerprints.pop(t.key, None)
+            span = getattr(e, "_texflow_span", None)
+            if span is not None:
+                t.elapsed = span[1] - span[0]
+                traced(t, *span, error=repr(e))
+
+        # Grau de entrada de cada tarefa + arestas reversas (quem depende de
+        # quem), pra liberar os dependentes em O(1) quando algo termina.
+        waiting = {t: len(set(t.dependencies or [])) for t in tasks}
+        dependents: dict[Task, list[Task]] = {t: [] for t in tasks}
+        for t in tasks:
+            for dep in set(t.dependencies or []):
+                if dep in dependents:
+                    dependents[dep].append(t)
+
+        _check_acyclic(tasks, waiting, dependents)
+
+        ready = [t for t in tasks if waiting[t] == 0]
+        running: dict[concurrent.futures.Future, Task] = {}
+        error: BaseException | None = None
+
+        def finish(t):
+            for child in dependents[t]:
+                waiting[child] -= 1
+                if waiting[child] == 0:
+                    ready.append(child)
+
+        while (ready or running) and error is None:
+            # 1. Despacha tudo o que pode rodar em segundo plano.
+            for t in [t for t in ready if t.mode != "chain"]:
+                ready.remove(t)
+                running[_executor(t.mode).submit(_timed_run, t, previous(t))] = t
+
+            # 2. Uma tarefa "chain" roda inline, enquanto o resto trabalha.
+            chain = next((t for t in ready if t.mode == "chain"), None)
+            if chain is not None:
+                ready.remove(chain)
+                label = f"{icon(chain)} {chain.name}"
+                with spinner(dots, text=label, color=COLORS["chain"]) as sp, progress_target(sp, label):
+                    try:
+                        start, end, digest, skipped, where = _timed_run(chain, previous(chain))
+                    except BaseException as e:  # noqa: BLE001 - repassado após drenar as tarefas em andamento
+                        failed(chain, e)
+                        error = e
+                        break
+                    sp.ok("✔ (em dia)" if skipped else f"✔ ({end - start:.2f}s)")
+                record(chain, digest, skipped, start, end, where)
+                finish(chain)
+
+            # 3. Colhe o que terminou em segundo plano, sem bloquear se a
+            # tarefa "chain" acabou de liberar trabalho novo.
+            if running:
+                timeout = 0 if ready else None
+                done, _ = concurrent.futures.wait(
+                    running, timeout=timeout, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    t = running.pop(future)
+                    try:
+                        start, end, digest, skipped, where = future.result()
+                    except BaseException as e:  # noqa: BLE001 - repassado após drenar as tarefas em andamento
+                        failed(t, e)
+                        error = error or e
+                        continue
+                    report(t, start, end, skipped)
+                    record(t, digest, skipped, start, end, where)
+                    finish(t)
 
-            # ------- thread -------
-            thread_tasks = [t for t in ready if t.mode == "thread"]
-            if thread_tasks:
-                import concurrent.futures
+        if error is not None:
+            # Não deixa tarefas escrevendo em build/ depois que o runner
+            # devolveu o controle: espera as que já começaram.
+            concurrent.futures.wait(running)
 
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    future_map = {executor.submit(t.run): t for t in thread_tasks}
+        # Salvo mesmo em caso de erro: as tarefas que terminaram continuam em
+        # dia, e a que falhou já teve o fingerprint removido.
+        _save_state(state, fingerprints)
 
-                    for future in concurrent.futures.as_completed(future_map):
-                        t = future_map[future]
-                        start = time.perf_counter()
+        if error is not None:
+            raise error
 
-                        with spinner(
-                            dots, text=f"{icon(t)} {t.name}", color="yellow"
-                        ) as sp:
-                            future.result()
-                            end = time.perf_counter()
-                            sp.ok(f"✔ ({end - start:.2f}s)")
 
-                        completed.add(t)
-                        remaining.remove(t)
+# Executores de longa duração, um por modo. Criados sob demanda e
+# reaproveitados entre chamadas do runner (ex: builds sucessivos no watch
+# mode/daemon), em vez de um pool novo por "onda" de tarefas.
+_EXECUTORS: dict[str, object] = {}
 
-            # ------- process -------
-            process_tasks = [t for t in ready if t.mode == "process"]
-            if process_tasks:
-                import multiprocessing
 
-                with multiprocessing.Pool() as pool:
-                    async_results = [
-                        (t, pool.apply_async(t.run)) for t in process_tasks
-                    ]
+def _executor(mode: Mode):
+    import concurrent.futures
+
+    executor = _EXECUTORS.get(mode)
+    if executor is None:
+        if mode == "process":
+            executor = concurrent.futures.ProcessPoolExecutor()
+        else:
+            executor = concurrent.futures.ThreadPoolExecutor(thread_name_prefix="texflow")
+        _EXECUTORS[mode] = executor
+    return executor
 
-                    for t, result in async_results:
-                        start = time.perf_counter()
 
-                        with spinner(
-                            dots, text=f"{icon(t)} {t.name}", color="green"
-                        ) as sp:
-                            result.get()
-                            end = time.perf_counter()
-                            sp.ok(f"✔ ({end - start:.2f}s)")
+def _timed_run(task: Task, previous: str | None = None) -> tuple[float, float, str | None, bool, tuple]:
+    """Roda a tarefa no worker e devolve (início, fim, fingerprint, pulou?, onde).
 
-                        completed.add(t)
-                        remaining.remove(t)
+    Os tempos são medidos LÁ: perf_counter usa CLOCK_MONOTONIC, comum a
+    todos os processos da máquina, então tarefas "process" também são
+    comparáveis. O fingerprint também é calculado no worker, pra que o
+    stat() de árvores grandes não serialize na thread principal; ele é
+    tirado ANTES de rodar, então uma edição durante o build invalida o
+    próximo. "onde" é (pid, tid, nome da thread), pra linha do tempo.
+    """
+    where = (os.getpid(), threading.get_native_id(), threading.current_thread().name)
+    profile = profiler.current()
+    # Com --profile, CPU e memória da tarefa são medidas aqui, na thread dela.
+    measured = profile.task(task.key) if profile is not None else contextlib.nullcontext()
+    start = time.perf_counter()
+    try:
+        with measured:
+            digest = task.fingerprint() if task.outputs else None
+            if digest is not None and digest == previous and all(p.exists() for p in task.outputs):
+                return start, time.perf_counter(), digest, True, where
+            task.run()
+    except BaseException as e:
+        # A tarefa que falhou também entra na linha do tempo (--trace).
+        e._texflow_span = (start, time.perf_counter(), where)
+        raise
+    return start, time.perf_counter(), digest, False, where
+
+
+def _load_state(state: Path | None) -> dict[str, str]:
+    if state is None or not state.exists():
+        return {}
+    try:
+        return json.loads(state.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}  # state corrompido: tudo roda de novo
+
+
+def _save_state(state: Path | None, fingerprints: dict[str, str]) -> None:
+    if state is None:
+        return
+    state.parent.mkdir(parents=True, exist_ok=True)
+    state.write_text(json.dumps(fingerprints, indent=2, sort_keys=True), encoding="utf-8")
+
+
+def _check_acyclic(tasks, waiting, dependents) -> None:
+    """Kahn em cima de cópias: falha antes de rodar qualquer coisa se o grafo
+    tiver ciclos (ou dependências fora da lista de tarefas)."""
+    pending = dict(waiting)
+    queue = [t for t in tasks if pending[t] == 0]
+    seen = 0
+    while queue:
+        t = queue.pop()
+        seen += 1
+        for child in dependents[t]:
+            pending[child] -= 1
+            if pending[child] == 0:
+                queue.append(child)
+    if seen != len(tasks):
+        raise RuntimeError("Dependências circulares detectadas.")
 
 
 class CleanBuild(Task):
@@ -198,16 +416,29 @@ class RenderTemplate(Task):
         context: dict,
         output: Path,
         *,
+        inputs: Iterable[Path] | None = None,
+        fragment_cache: Path | None = None,
         mode: Mode = "thread",
         dependencies: Dependencies = None,
     ):
-        super().__init__(mode=mode, dependencies=dependencies)
+        # Por padrão a entrada é o próprio arquivo do template; quem usa
+        # {% include %}/{% import %} deve passar todos os arquivos em inputs.
+        if inputs is None and getattr(template, "filename", None):
+            inputs = [Path(template.filename)]
+        super().__init__(mode=mode, dependencies=dependencies, inputs=inputs, outputs=[output])
         self.template = template
         self.context = context
         self.output = output
+        # JSON com a saída de cada {% block %} do último render (ver
+        # classes/fragments.py); None desliga o render incremental.
+        self.fragment_cache = fragment_cache
+
+    def signature(self) -> str:
+        payload = json.dumps(self.context, sort_keys=True, default=str)
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
 
     def run(self) -> None:
-        rendered = self.template.render(**self.context)
+        rendered = self._render()
 
         # Preserva o mtime quando o conteúdo não mudou: o latexmk usa o mtime
         # de main.tex pra decidir se precisa recompilar, e reescrever o
@@ -215,8 +446,21 @@ class RenderTemplate(Task):
         if self.output.exists() and self.output.read_text(encoding="utf-8") == rendered:
             return
 
+        self.output.parent.mkdir(parents=True, exist_ok=True)
         self.output.write_text(rendered, encoding="utf-8")
 
+    def _render(self) -> str:
+        # Só templates Jinja de verdade têm blocos a reaproveitar.
+        if self.fragment_cache is None or not hasattr(self.template, "root_render_func"):
+            return self.template.render(**self.context)
+
+        from classes.fragments import FragmentCache, sources_digest
+
+        cache = FragmentCache(self.fragment_cache, str(self.output), sources_digest(self.inputs))
+        rendered = cache.render(self.template, self.context)
+        cache.save()
+        return rendered
+
 
 class CopyTree(Task):
     name = "copy-tree"
@@ -228,15 +472,68 @@ class CopyTree(Task):
         ignore_tex=False,
         *,
         symlink=False,
+        manifest: Path | None = None,
+        store: ObjectStore | None = None,
+        exclude: Iterable[str] = (),
+        tex_whitelist: Iterable[str] = TEX_WHITELIST,
         mode: Mode = "thread",
         dependencies: Dependencies = None,
     ):
-        super().__init__(mode=mode, dependencies=dependencies)
+        # Só origens no disco têm fingerprint: recursos dentro de um zip não
+        # têm mtime confiável, então nesse caso a cópia sempre roda. Uma
+        # pasta copiada só pode ser pulada com manifest: o output declarado
+        # é o destino inteiro (ex: build/), que existe mesmo quando um
+        # arquivo copiado foi apagado, e só o manifest sabe o que conferir.
+        on_disk = isinstance(src, Path)
+        skippable = on_disk and (manifest is not None or not src.is_dir())
+        super().__init__(
+            mode=mode,
+            dependencies=dependencies,
+            inputs=[src] if on_disk else None,
+            outputs=[dst] if skippable else None,
+        )
         self.src = src
         self.dst = dst
         self.ignore_tex = ignore_tex
         self.symlink = symlink
-        self.copy_fn = _symlink_or_copy if symlink else _copy_if_changed
+        self.store = store
+        # Padrões (fnmatch, pelo nome) que ficam de fora: outra tarefa
+        # escreve esses arquivos no destino (ex: PruneBibliography).
+        self.exclude = tuple(exclude)
+        # .tex copiados mesmo com ignore_tex (o build renderiza todos os .tex
+        # pelo Jinja e passa uma whitelist vazia).
+        self.tex_whitelist = frozenset(tex_whitelist)
+        if symlink:
+            self.copy_fn = _symlink_or_copy
+        elif store is not None:
+            self.copy_fn = store.link
+        else:
+            self.copy_fn = _copy_if_changed
+        # Com manifest (ver classes/manifest.py), só arquivos cujo stat mudou
+        # são comparados/copiados, e o que sumiu da origem sai do destino.
+        self.manifest = manifest
+        self.stats = CopyStats()
+
+    @property
+    def key(self) -> str:
+        # Sempre pelo destino, com ou sem outputs declarados.
+        return f"{self.name}:{self.dst}"
+
+    def fingerprint(self) -> str:
+        digest = super().fingerprint()
+        if self.manifest is None or not isinstance(self.src, Path) or not self.src.is_dir():
+            return digest
+        # Destino apagado/mexido por fora desde a última cópia: o fingerprint
+        # muda e a tarefa roda (o manifest restaura só o que for preciso).
+        stale = CopyManifest(self.manifest, self.dst.resolve()).stale()
+        return _fingerprint([], f"{digest};stale={stale}") if stale else digest
+
+    def signature(self) -> str:
+        return (
+            f"ignore_tex={self.ignore_tex};symlink={self.symlink};"
+            f"store={self.store is not None};exclude={self.exclude};"
+            f"tex_whitelist={sorted(self.tex_whitelist)}"
+        )
 
     def run(self) -> None:
         # 1. Se a origem for um Path (caminho físico no disco - modo de desenvolvimento)
@@ -250,123 +547,160 @@ class CopyTree(Task):
                     return
                 # Certifica que o destino existe se for um arquivo
                 self.dst.parent.mkdir(parents=True, exist_ok=True)
-                self.copy_fn(self.src, self.dst)
+                self.stats = copy_files([(self.src, self.dst)], self.copy_fn)
                 return
 
-            # 🔥 Arquivos .tex que DEVEM ser copiados mesmo com ignore_tex=True
-            tex_whitelist = {"glossaries.tex", "abstract.tex", "conclusions.tex"}
-            excluded_names = {"build", "__pycache__", ".git"}
-
             src = self.src.resolve()
             dst = self.dst.resolve()
 
-            def should_ignore(path: Path) -> bool:
-                # Evita o loop infinito garantindo que a pasta de destino
-                # jamais seja copiada para dentro dela mesma.
-                if path.resolve() == dst:
-                    return True
-
-                if path.name in excluded_names:
-                    return True
-
-                if self.ignore_tex and path.suffix == ".tex":
-                    if path.name in tex_whitelist:
-                        print(f"✅ LIBERADO: {path.name}")
-                        return False  # Não ignora se estiver na whitelist
-                    print(
-                        f"🚫 IGNORADO: {path.name} (não está na whitelist {tex_whitelist})"
-                    )
-                    return True  # Ignora os demais
-
-                return False
-
-            # Callback compatível com shutil.copytree(ignore=...), reutilizado
-            # em todas as cópias para que a whitelist valha também nas
-            # subpastas e no caso normal (dst fora de src).
-            def ignore(directory, names):
-                base = Path(directory)
-                return {name for name in names if should_ignore(base / name)}
-
-            # 🔥 CASO ESPECIAL: dst dentro de src
-            if dst.is_relative_to(src):
-                dst.mkdir(parents=True, exist_ok=True)
-
-                for item in src.iterdir():
-                    if should_ignore(item):
-                        continue
+            copy_fn = self.copy_fn
+            manifest = CopyManifest(self.manifest, dst) if self.manifest else None
+            if manifest is not None:
+                copy_fn = functools.partial(manifest.copy, copy_fn=self.copy_fn)
 
-                    target = dst / item.name
+            self.stats = copy_files(self._walk(src, dst), copy_fn)
 
-                    if item.is_dir():
-                        shutil.copytree(
-                            item, target, dirs_exist_ok=True, ignore=ignore, copy_function=self.copy_fn
-                        )
-                    else:
-                        self.copy_fn(item, target)
-
-            # 🚀 CASO NORMAL
-            else:
-                shutil.copytree(src, dst, dirs_exist_ok=True, ignore=ignore, copy_function=self.copy_fn)
+            if manifest is not None:
+                for rel in manifest.prune(src):
+                    print(f"🗑️  REMOVIDO: {rel}")
+                manifest.save()
 
         # 2. Se a origem for um objeto Traversable não-Path (recurso empacotado)
         elif isinstance(self.src, Traversable):
-            self.copy_traversable_recursively_delegate(self.src, self.dst)
+            self.stats = copy_files(self._walk_traversable(self.src, self.dst), self._copy_traversable_file)
 
         else:
             raise TypeError(f"Tipo de origem não suportado: {type(self.src)}")
 
-    def copy_traversable_recursively_delegate(
-        self, src_traversable: Traversable, dst_path: Path
-    ):
-        """Copia recursivamente, delegando sub-diretórios para novas CopyTree Tasks."""
-
-        # 1. Cria o diretório de destino
-        dst_path.mkdir(parents=True, exist_ok=True)
-
-        for item in src_traversable.iterdir():
-            # 🔥 CORREÇÃO 3: Bloqueia as pastas indesejadas também no modo Traversable
-            if item.name in ("build", "__pycache__", ".git"):
-                continue
-
-            item_dst = dst_path / item.name
-
-            if item.is_file():
-                if self.ignore_tex and item.name.endswith(".tex"):
+        if self.stats.files:
+            print(f"📦 {self.dst.name}: {self.stats}")
+
+    def _should_ignore(self, path: Path) -> bool:
+        if path.name in EXCLUDED_NAMES or self._excluded(path.name):
+            return True
+
+        if self.ignore_tex and path.suffix == ".tex":
+            if path.name in self.tex_whitelist:
+                print(f"✅ LIBERADO: {path.name}")
+                return False  # Não ignora se estiver na whitelist
+            if self.tex_whitelist:
+                print(f"🚫 IGNORADO: {path.name} (não está na whitelist {set(self.tex_whitelist)})")
+            return True  # Ignora os demais
+
+        return False
+
+    def _excluded(self, name: str) -> bool:
+        return any(fnmatch.fnmatch(name, pattern) for pattern in self.exclude)
+
+    def _walk(self, src: Path, dst: Path) -> list[tuple[Path, Path]]:
+        """Cria as pastas de destino e lista os pares (origem, destino) a copiar.
+
+        Substitui o shutil.copytree: a árvore é percorrida uma vez só, na
+        thread da tarefa, e as cópias em si vão para o pool de copy_files.
+        """
+        pairs = []
+        for dirpath, dirnames, filenames in os.walk(src, followlinks=True):
+            base = Path(dirpath)
+            target = dst / base.relative_to(src)
+            target.mkdir(parents=True, exist_ok=True)
+            # 🔥 Evita o loop infinito garantindo que a pasta de destino
+            # jamais seja copiada para dentro dela mesma (dst dentro de src).
+            dirnames[:] = [
+                d for d in dirnames
+                if not self._should_ignore(base / d) and (base / d).resolve() != dst
+            ]
+            pairs.extend(
+                (base / f, target / f) for f in filenames if not self._should_ignore(base / f)
+            )
+        return pairs
+
+    def _walk_traversable(self, src: Traversable, dst: Path) -> list[tuple[Traversable, Path]]:
+        """Versão de _walk para recursos empacotados (sem os.walk)."""
+        pairs = []
+        stack = [(src, dst)]
+        while stack:
+            directory, target = stack.pop()
+            target.mkdir(parents=True, exist_ok=True)
+            for item in directory.iterdir():
+                # 🔥 Bloqueia as pastas indesejadas também no modo Traversable
+                if item.name in EXCLUDED_NAMES or self._excluded(item.name):
                     continue
+                if item.is_file():
+                    if self.ignore_tex and item.name.endswith(".tex"):
+                        continue
+                    pairs.append((item, target / item.name))
+                elif item.is_dir():
+                    stack.append((item, target / item.name))
+        return pairs
 
-                self._copy_traversable_file(item, item_dst)
-
-            elif item.is_dir():
-                # CHAVE: Criar uma nova instância de CopyTree para o subdiretório
-                # O novo item é a nova origem, e item_dst é o novo destino.
-                # Não é mais uma chamada de método, mas uma nova Task.
-
-                # CUIDADO: Se você estiver executando isso dentro de um thread,
-                # a nova Task não será executada imediatamente, mas sim agendada.
-
-                # Se for para execução síncrona/imediata (melhor para recursão):
-                new_copy_task = CopyTree(
-                    src=item, dst=item_dst, ignore_tex=self.ignore_tex, symlink=self.symlink, mode="chain"
-                )
-
-                # Executa a nova sub-tarefa imediatamente
-                new_copy_task.run()
-
-    def _copy_traversable_file(self, item: Traversable, item_dst: Path) -> None:
+    def _copy_traversable_file(self, item: Traversable, item_dst: Path) -> bool:
         # Recursos empacotados sem zip (instalação editável, PyInstaller
         # extraído) são, na prática, PosixPath de verdade: nesse caso
         # reaproveitamos a mesma lógica de symlink/skip-se-igual do Path.
         if isinstance(item, Path):
-            self.copy_fn(item, item_dst)
-            return
+            return self.copy_fn(item, item_dst)
 
         # Fallback genérico (ex: recurso dentro de um zip): sem filesystem
         # real de origem não há como symlinkar, então só evitamos reescrever
         # se o conteúdo já for idêntico.
         data = item.read_bytes()
         if item_dst.exists() and not item_dst.is_symlink() and item_dst.read_bytes() == data:
-            return
+            return False
+        if item_dst.is_symlink():
+            item_dst.unlink()
         item_dst.write_bytes(data)
+        return True
+
+
+class PruneBibliography(Task):
+    """Escreve em `dst` versões dos .bib de `root` só com as entradas citadas.
+
+    `keys` devolve as chaves que o documento usa (ver scripts/citations.py).
+    Elas entram na assinatura da tarefa, então o .bib só é refeito quando
+    as chaves ou os .bib de origem mudam; e o arquivo só é reescrito se o
+    conteúdo mudou, preservando o mtime que o latexmk usa.
+    """
+
+    name = "prune-bibliography"
+
+    def __init__(
+        self,
+        sources: Iterable[Path],
+        root: Path,
+        dst: Path,
+        keys: Callable[[], set[str]],
+        *,
+        mode: Mode = "thread",
+        dependencies: Dependencies = None,
+    ):
+        self.sources = sorted(sources)
+        self.targets = [dst / src.relative_to(root) for src in self.sources]
+        super().__init__(mode=mode, dependencies=dependencies, inputs=self.sources, outputs=self.targets)
+        self.keys = keys
+        self._keys: set[str] | None = None
+
+    def signature(self) -> str:
+        # Calculadas uma vez por build: fingerprint() vem logo antes de run().
+        self._keys = set(self.keys())
+        return hashlib.blake2b("\0".join(sorted(self._keys)).encode("utf-8"), digest_size=16).hexdigest()
+
+    def run(self) -> None:
+        keys = self._keys if self._keys is not None else set(self.keys())
+        for src, target in zip(self.sources, self.targets):
+            # surrogateescape: .bib em latin-1 passa byte a byte.
+            text = src.read_bytes().decode("utf-8", errors="surrogateescape")
+            pruned, kept, total = prune_bib(text, keys)
+            data = pruned.encode("utf-8", errors="surrogateescape")
+            print(f"📚 {src.name}: {kept} de {total} entradas")
+
+            if target.exists() and not target.is_symlink() and target.read_bytes() == data:
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            # Nunca escreve através de um link: o destino pode ser um
+            # hardlink do store de objetos ou um symlink de uma cópia antiga.
+            if target.is_symlink() or target.exists():
+                target.unlink()
+            target.write_bytes(data)
 
 
 class FnTask(Task):
@@ -378,12 +712,17 @@ class FnTask(Task):
         *args,
         mode: Mode = "thread",
         dependencies: Dependencies = None,
+        inputs: Iterable[Path] | None = None,
+        outputs: Iterable[Path] | None = None,
         **kwargs,
     ):
-        super().__init__(mode=mode, dependencies=dependencies)
+        super().__init__(mode=mode, dependencies=dependencies, inputs=inputs, outputs=outputs)
         self.fn = fn
         self.args = args
         self.kw = kwargs
 
+    def signature(self) -> str:
+        return f"{self.fn.__module__}.{self.fn.__qualname__}{self.args!r}{self.kw!r}"
+
     def run(self):
         self.fn(*self.args, **self.kw)
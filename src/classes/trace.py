@@ -0,0 +1,127 @@
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Trace sendo gravado agora (ver recording); None = tracing desligado, e
+# span() não custa nada além deste check.
+_ACTIVE: "Trace | None" = None
+
+
+class Trace:
+    """Linha do tempo de um build no formato Chrome trace (JSON).
+
+    Abre no https://ui.perfetto.dev ou em chrome://tracing. Cada tarefa é
+    um evento "X" (início + duração) na thread/processo que a rodou; as
+    dependências viram setas (eventos de fluxo "s"/"f"). Os tempos vêm de
+    perf_counter, o mesmo relógio monotônico em todos os processos.
+    """
+
+    def __init__(self) -> None:
+        self.origin = time.perf_counter()
+        self.events: list[dict] = []
+        self._named: set[tuple[int, int]] = set()
+        self._flows = 0
+        self._lock = threading.Lock()
+
+    def _us(self, t: float) -> float:
+        return round((t - self.origin) * 1e6, 3)
+
+    def complete(
+        self,
+        name: str,
+        cat: str,
+        start: float,
+        end: float,
+        *,
+        pid: int | None = None,
+        tid: int | None = None,
+        thread_name: str | None = None,
+        args: dict | None = None,
+    ) -> dict:
+        """Registra um trecho [start, end] (em segundos de perf_counter)."""
+        pid = os.getpid() if pid is None else pid
+        if tid is None:
+            tid = threading.get_native_id()
+            thread_name = thread_name or threading.current_thread().name
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": self._us(start),
+            "dur": max(round(self._us(end) - self._us(start), 3), 0),
+            "pid": pid,
+            "tid": tid,
+            "args": args or {},
+        }
+        with self._lock:
+            self.events.append(event)
+            if thread_name and (pid, tid) not in self._named:
+                self._named.add((pid, tid))
+                self.events.append(
+                    {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread_name}}
+                )
+        return event
+
+    def flow(self, src: dict, dst: dict, name: str = "dependência") -> None:
+        """Seta do fim do evento `src` até o início de `dst`."""
+        with self._lock:
+            self._flows += 1
+            flow_id = self._flows
+            # O "s" precisa cair DENTRO do trecho de origem pra se prender a
+            # ele: meio microssegundo antes do fim.
+            src_ts = max(src["ts"], src["ts"] + src["dur"] - 0.5)
+            self.events.append(
+                {"name": name, "cat": "dependency", "ph": "s", "id": flow_id, "ts": src_ts,
+                 "pid": src["pid"], "tid": src["tid"]}
+            )
+            self.events.append(
+                {"name": name, "cat": "dependency", "ph": "f", "bp": "e", "id": flow_id, "ts": dst["ts"],
+                 "pid": dst["pid"], "tid": dst["tid"]}
+            )
+
+    def name_process(self, pid: int, name: str) -> None:
+        with self._lock:
+            self.events.append({"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": name}})
+
+    def save(self, path: Path) -> None:
+        with self._lock:
+            data = {"traceEvents": list(self.events), "displayTimeUnit": "ms"}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data), encoding="utf-8")
+
+
+def current() -> Trace | None:
+    return _ACTIVE
+
+
+@contextlib.contextmanager
+def recording(path: Path):
+    """Grava tudo o que rodar dentro do bloco em `path`, mesmo se falhar."""
+    global _ACTIVE
+    trace = Trace()
+    trace.name_process(os.getpid(), "texflow")
+    previous, _ACTIVE = _ACTIVE, trace
+    try:
+        yield trace
+    finally:
+        _ACTIVE = previous
+        trace.save(Path(path))
+        print(f"🧭 Trace salvo em {path} (abra em https://ui.perfetto.dev)", file=sys.stderr)
+
+
+@contextlib.contextmanager
+def span(name: str, cat: str, **args):
+    """Trecho filho (ex: um arquivo copiado) na thread atual, se houver trace."""
+    trace = _ACTIVE
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.complete(name, cat, start, time.perf_counter(), args=args)
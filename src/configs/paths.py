@@ -1,3 +1,4 @@
+import os
 from importlib.resources import files
 from pathlib import Path
 
@@ -9,4 +10,22 @@ BUILD_DIR = ROOT_DIR / "build" # OK: é diretório do usuário, não do pacote
 ASSETS_DIR = files("assets")
 
 # Diretório de templates empacotados
-TEMPLATE_DIR = ASSETS_DIR.joinpath("templates")
\ No newline at end of file
+TEMPLATE_DIR = ASSETS_DIR.joinpath("templates")
+
+# Cache por usuário (fora de qualquer template), segue o XDG no Linux
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "texflow"
+
+# Socket do daemon: prefere XDG_RUNTIME_DIR (tmpfs, por usuário, limpo no logout)
+DAEMON_SOCKET = Path(os.environ.get("XDG_RUNTIME_DIR") or CACHE_DIR) / "texflow.sock"
+
+# Cache de PDFs endereçado por conteúdo (ver classes/pdf_cache.py)
+PDF_CACHE_DIR = CACHE_DIR / "pdf"
+
+# Store de arquivos do template compartilhado via hardlink (ver classes/object_store.py)
+OBJECTS_DIR = CACHE_DIR / "objects"
+
+# Histórico de builds de todos os templates (ver classes/history.py e --stats)
+HISTORY_DB = CACHE_DIR / "history.sqlite3"
+
+# Configuração opcional por template (ex: engine = "pdflatex"), na raiz dele
+TEMPLATE_CONFIG = "texflow.toml"
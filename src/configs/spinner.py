@@ -1,7 +1,12 @@
 import sys
+import threading
+from contextlib import contextmanager
 
 from scripts.utils import is_tty
 
+# Spinner que recebe progress() em cada thread (ver progress_target).
+_progress = threading.local()
+
 
 class DummySpinner:
     """Substituto sem animação para yaspin quando não há TTY.
@@ -56,3 +61,27 @@ def spinner(*args, **kwargs):
     from yaspin import yaspin
 
     return yaspin(*args, **kwargs)
+
+
+@contextmanager
+def progress_target(sp, prefix: str):
+    """Direciona os progress() desta thread para o texto de `sp`."""
+    previous = getattr(_progress, "target", None)
+    _progress.target = (sp, prefix)
+    try:
+        yield sp
+    finally:
+        _progress.target = previous
+
+
+def progress(text: str) -> None:
+    """Mostra `text` ao lado do spinner ativo (ex: passada/página do LaTeX).
+
+    Sem TTY, ou fora de um progress_target, não faz nada: o progresso é só
+    decoração, e linhas extras atrapalhariam o parsing do LaTeX Workshop.
+    """
+    target = getattr(_progress, "target", None)
+    if target is None or not is_tty():
+        return
+    sp, prefix = target
+    sp.text = f"{prefix} · {text}"
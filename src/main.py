@@ -1,7 +1,17 @@
-from scripts.cli import cli
+import sys
 
 
 def main():
+    # Caminho rápido pro LaTeX Workshop: se houver um daemon rodando, o
+    # build é repassado a ele antes mesmo de importar a CLI completa.
+    from scripts.daemon import client_main
+
+    code = client_main(sys.argv[1:])
+    if code is not None:
+        sys.exit(code)
+
+    from scripts.cli import cli
+
     cli()
 
 if __name__ == "__main__":
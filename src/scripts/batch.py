@@ -0,0 +1,243 @@
+import concurrent.futures
+import functools
+import importlib.resources as res
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from classes.data import Data
+from classes.task import CopyTree
+from scripts import builder, engines
+from scripts.builder import BuildSession
+
+# Pasta (dentro do template) onde cada documento do lote ganha seu próprio
+# build dir. Fica fora de build/ pra não entrar no digest/cópia do build
+# normal, e está em EXCLUDED_NAMES pra não ser copiada de volta.
+BATCH_DIR = "batch-build"
+
+# Marca, dentro de cada build dir, de qual lote ele é: dois documentos do
+# mesmo lote com o mesmo nome ganham -2, -3... sem guardar os nomes em
+# memória, e o build dir de um lote anterior é reaproveitado.
+BATCH_MARKER = ".texflow-batch"
+
+# Documentos com problema listados no report.json; todos estão no report.jsonl.
+REPORT_PROBLEMS = 100
+
+# Relatórios do lote, em BATCH_DIR ao lado dos build dirs: um documento com
+# um desses nomes ganha -2, como qualquer outra colisão.
+REPORT_FILES = ("report.json", "report.jsonl")
+
+Item = tuple[str, Any]
+
+
+def _safe_name(name: str) -> str:
+    return re.sub(r"[^\w.-]+", "_", str(name)).strip("._") or "doc"
+
+
+def iter_payloads(source: Path) -> Iterator[Item]:
+    """Lê os documentos do lote: um array JSON, um .jsonl ou uma pasta de *.json.
+
+    Cada item é `(nome, objeto)`; o nome vem do campo opcional "name" do
+    objeto, do nome do arquivo (pasta) ou da posição no array/linha no
+    .jsonl. Erros de parse viram o próprio objeto do item (uma Exception),
+    pra serem reportados sem abortar o lote.
+
+    Arquivos .jsonl são lidos em streaming (Data.iter_jsonl): só as linhas
+    em processamento ficam em memória, não importa o tamanho do arquivo.
+    """
+    if source.suffix == ".jsonl":
+        for lineno, data in Data.iter_jsonl(source):
+            if isinstance(data, Exception):
+                yield f"linha-{lineno}", type(data)(f"linha {lineno}: {data}")
+            else:
+                yield data.get("name") or f"linha-{lineno}", data
+        return
+
+    if source.is_dir():
+        for path in sorted(source.glob("*.json")):
+            try:
+                raw = json.loads(path.read_text(encoding="utf-8"))
+            except ValueError:
+                yield path.stem, ValueError("JSON inválido")
+                continue
+            yield (raw.get("name") if isinstance(raw, dict) else None) or path.stem, raw
+        return
+
+    try:
+        items = json.loads(source.read_text(encoding="utf-8"))
+    except ValueError:
+        raise ValueError("JSON inválido") from None
+    if not isinstance(items, list):
+        raise TypeError("O lote deve ser um array JSON de objetos {\"payload\": ...}")
+
+    width = len(str(len(items)))
+    for i, raw in enumerate(items, start=1):
+        yield (raw.get("name") if isinstance(raw, dict) else None) or f"{i:0{width}d}", raw
+
+
+def _claim(out_dir: Path, name: str, run_id: str) -> str:
+    """Reserva `out_dir/<nome>` para este lote e devolve o nome usado."""
+    name = _safe_name(name)
+    candidate, n = name, 2
+    while candidate in REPORT_FILES or _claimed(out_dir / candidate, run_id):
+        candidate, n = f"{name}-{n}", n + 1
+    doc_dir = out_dir / candidate
+    doc_dir.mkdir(parents=True, exist_ok=True)
+    (doc_dir / BATCH_MARKER).write_text(run_id, encoding="utf-8")
+    return candidate
+
+
+def _claimed(doc_dir: Path, run_id: str) -> bool:
+    if doc_dir.exists() and not doc_dir.is_dir():
+        return True  # um arquivo qualquer com esse nome: não dá pra virar build dir
+    try:
+        return (doc_dir / BATCH_MARKER).read_text(encoding="utf-8") == run_id
+    except OSError:
+        return False
+
+
+def _prepare(session: BuildSession, raw: Any, doc_dir: Path) -> None:
+    """Valida o payload, renderiza os .tex e copia os arquivos de suporte."""
+    data = raw
+    if not isinstance(data, Data):
+        data = Data()
+        data.load_from_dict(raw)
+
+    doc_dir.mkdir(parents=True, exist_ok=True)
+    for task in session.render_tasks(data.get_payload(), doc_dir):
+        task.run()
+    CopyTree(
+        session.template_path,
+        doc_dir,
+        ignore_tex=True,
+        tex_whitelist=(),
+        manifest=doc_dir / builder.COPY_MANIFEST,
+        store=session.store,
+    ).run()
+    for asset in ("images", "plots"):
+        CopyTree(res.files("assets").joinpath(asset), doc_dir / asset, symlink=True).run()
+
+
+def _compile(doc_dir: Path, use_cache: bool, engine: engines.Engine) -> float:
+    start = time.perf_counter()
+    if use_cache:
+        builder.cached_build_process(doc_dir, engine=engine)
+    else:
+        builder.compile_document(doc_dir, engine)
+    return time.perf_counter() - start
+
+
+def run_batch(
+    source: str,
+    template_folder: str,
+    *,
+    jobs: int | None = None,
+    use_cache: bool = True,
+    link_store: bool = False,
+    engine: str | None = None,
+) -> bool:
+    """Gera um PDF por documento do lote, compilando em paralelo.
+
+    Os .tex do template são compilados pelo Jinja uma vez só e cada documento é
+    renderizado na thread principal; os compiles (cada um um processo
+    latexmk próprio, em `<template>/batch-build/<nome>/`) rodam em até
+    `jobs` workers. A leitura da entrada tem back-pressure: no máximo
+    2×`jobs` documentos ficam em voo, o resto espera na fonte.
+
+    Com `link_store`, os arquivos do template entram uma vez no store de
+    objetos e cada documento recebe hardlinks para eles; ao final, objetos
+    que nenhum build dir usa mais são recolhidos.
+
+    O resultado de cada documento é anexado a `report.jsonl` assim que ele
+    termina, e `report.json` resume o lote (totais + os primeiros
+    REPORT_PROBLEMS documentos que não deram certo): a memória não cresce
+    com o tamanho da entrada. Devolve True se todos deram certo.
+    """
+    session = BuildSession(template_folder, use_cache=use_cache, link_store=link_store, engine=engine)
+    # Falha cedo sem main.tex; os templates compilados ficam no Environment.
+    session.env.get_template("main.tex")
+    out_dir = session.template_path / BATCH_DIR
+    out_dir.mkdir(parents=True, exist_ok=True)
+    jobs = jobs or os.cpu_count() or 1
+
+    counts = {"ok": 0, "invalid": 0, "failed": 0}
+    problems: list[dict] = []
+    run_id = f"{os.getpid()}-{time.time_ns()}"
+    lock = threading.Lock()
+    in_flight = threading.BoundedSemaphore(jobs * 2)
+    started = time.perf_counter()
+
+    with (
+        open(out_dir / REPORT_FILES[1], "w", encoding="utf-8") as log,
+        concurrent.futures.ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="texflow-batch") as pool,
+    ):
+        def record(entry: dict) -> None:
+            with lock:
+                counts[entry["status"]] += 1
+                if entry["status"] != "ok" and len(problems) < REPORT_PROBLEMS:
+                    problems.append(entry)
+                log.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                log.flush()
+            if entry["status"] == "ok":
+                print(f"✔ {entry['name']} ({entry['elapsed']:.2f}s)", file=sys.stderr)
+            else:
+                print(f"✖ {entry['name']}: {entry['error'].splitlines()[0]}", file=sys.stderr)
+
+        def finish(entry: dict, future: concurrent.futures.Future) -> None:
+            in_flight.release()
+            try:
+                entry.update(status="ok", elapsed=round(future.result(), 3), pdf=str(Path(entry["dir"]) / "main.pdf"))
+            except Exception as e:  # noqa: BLE001 - uma falha não derruba o lote
+                entry.update(status="failed", error=str(e).strip() or type(e).__name__)
+            record(entry)
+
+        for name, raw in iter_payloads(Path(source)):
+            if isinstance(raw, Exception):
+                # Sem build dir: uma entrada ilegível não reserva pasta.
+                record({"name": _safe_name(name), "status": "invalid", "error": str(raw)})
+                continue
+
+            name = _claim(out_dir, name, run_id)
+            entry = {"name": name, "dir": str(out_dir / name)}
+
+            in_flight.acquire()  # back-pressure: espera um compile terminar
+            try:
+                _prepare(session, raw, out_dir / name)
+            except Exception as e:  # noqa: BLE001 - payload inválido não derruba o lote
+                in_flight.release()
+                entry.update(status="invalid", error=str(e).strip() or type(e).__name__)
+                record(entry)
+                continue
+
+            future = pool.submit(_compile, out_dir / name, use_cache, session.engine)
+            future.add_done_callback(functools.partial(finish, entry))
+
+    if session.store is not None:
+        session.store.gc()
+
+    total = sum(counts.values())
+    report = {
+        "template": str(session.template_path),
+        "total": total,
+        **counts,
+        "elapsed": round(time.perf_counter() - started, 3),
+        "problems": problems,
+    }
+    omitted = counts["invalid"] + counts["failed"] - len(problems)
+    if omitted:
+        report["problems_omitted"] = omitted
+    report_path = out_dir / REPORT_FILES[0]
+    report_path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    print(
+        f"📚 Lote concluído: {counts['ok']}/{total} documento(s) gerado(s) "
+        f"em {report['elapsed']:.1f}s. Relatório: {report_path}",
+        file=sys.stderr,
+    )
+    return counts["ok"] == total
@@ -1,22 +1,46 @@
+import contextlib
+import functools
+import hashlib
 import importlib.resources as res
+import json
 import os
 import re
+import signal
 import subprocess
 import sys
 import tempfile
-from collections import OrderedDict
+import threading
+import time
+from collections import deque
 from pathlib import Path
 
-from jinja2 import Environment, FileSystemLoader
-from prompt_toolkit.formatted_text import HTML, FormattedText
-from prompt_toolkit.shortcuts import print_formatted_text
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 
+from classes import history, profiler, trace
 from classes.data import Data
-from classes.task import CopyTree, FnTask, RenderTemplate, Task
-from configs.paths import BUILD_DIR
-from configs.spinner import spinner
-from configs.style import STYLE
-from scripts.utils import is_tty
+from classes.fragments import TrackingContext
+from classes.latex_log import LatexLogAnalyzer
+from classes.object_store import ObjectStore
+from classes.pdf_cache import DEFAULT_MAX_BYTES, PdfCache, inputs_digest
+from classes.task import (
+    EXCLUDED_NAMES,
+    CopyTree,
+    FnTask,
+    PruneBibliography,
+    RenderTemplate,
+    Task,
+)
+from configs.paths import (
+    BUILD_DIR,
+    HISTORY_DB,
+    OBJECTS_DIR,
+    PDF_CACHE_DIR,
+    TEMPLATE_CONFIG,
+)
+from configs.spinner import progress, spinner
+from configs.version import __version__
+from scripts import citations, engines, partial
+from scripts.utils import is_tty, load_template_config
 
 
 def check_unresolved_placeholders(tex_file):
@@ -26,8 +50,54 @@ def check_unresolved_placeholders(tex_file):
     if placeholders:
         raise RuntimeError(f"Placeholders não resolvidos encontrados no .tex: {placeholders}")
 
-def run_latex_command(emoji, cmd, cwd=None, env=None):
-    """Executa comando LaTeX com debug detalhado."""
+# Saída completa do último comando LaTeX, gravada em build/ enquanto roda.
+LATEX_OUTPUT_FILE = ".texflow-latexmk.log"
+
+# Intervalo (s) entre as leituras do .log do engine durante a compilação.
+PROGRESS_INTERVAL = 0.25
+
+
+def _fail_fast() -> bool:
+    return bool(os.getenv("TEXFLOW_FAIL_FAST"))
+
+
+def _kill(proc: subprocess.Popen) -> None:
+    """Mata o latexmk E o engine que ele disparou (mesmo grupo de processos)."""
+    if os.name == "posix":
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+            return
+        except OSError:
+            pass
+    proc.kill()
+
+
+def _reap(proc: subprocess.Popen, usage: dict) -> None:
+    """Espera o processo via wait4, guardando o rusage dele pro --profile.
+
+    O rusage de um filho colhido inclui os netos que ele esperou: o do
+    latexmk cobre o xelatex e o biber. Sem wait4 (Windows), só espera.
+    """
+    if not hasattr(os, "wait4"):
+        proc.wait()
+        return
+    try:
+        _, status, usage["rusage"] = os.wait4(proc.pid, 0)
+    except ChildProcessError:
+        proc.wait()  # já colhido pelo próprio Popen (ex: poll() do kill)
+        return
+    proc.returncode = os.waitstatus_to_exitcode(status)
+
+def run_latex_command(emoji, cmd, cwd=None, env=None, *, log_file=None, fail_fast=None):
+    """Executa comando LaTeX com debug detalhado.
+
+    A saída do processo é lida enquanto ele roda e gravada em disco
+    (build/.texflow-latexmk.log), não acumulada em memória. Em paralelo, o
+    .log do engine é lido incrementalmente pra mostrar passada/página no
+    spinner e, com `fail_fast` (ou TEXFLOW_FAIL_FAST), matar a compilação
+    no primeiro erro fatal em vez de esperar o latexmk (com -f) terminar.
+    """
+    fail_fast = _fail_fast() if fail_fast is None else fail_fast
     
     # tenta identificar o arquivo .tex no comando
     tex_file = None
@@ -44,6 +114,13 @@ def run_latex_command(emoji, cmd, cwd=None, env=None):
     # estilo do prompt_toolkit corromperiam esse parsing, então usamos texto
     # puro nesse caso.
     if is_tty():
+        # Import tardio: o prompt_toolkit custa ~100ms de startup e só serve
+        # pra colorir o terminal (ver configs/spinner.py, que faz o mesmo).
+        from prompt_toolkit.formatted_text import HTML
+        from prompt_toolkit.shortcuts import print_formatted_text
+
+        from configs.style import STYLE
+
         print_formatted_text(
             HTML(f'<cmd> {emoji} </cmd> <sub-msg> Executando: {' '.join(cmd)} (cwd={cwd or os.getcwd()})" </sub-msg>'),
             style=STYLE,
@@ -53,113 +130,203 @@ def run_latex_command(emoji, cmd, cwd=None, env=None):
         print(f"{emoji} Executando: {' '.join(cmd)} (cwd={cwd or os.getcwd()})", file=sys.stderr)
         sys.stderr.flush()
 
-    # cria log temporário
-    # Garante que o diretório de log temporário exista e o arquivo seja gravado
-    log_temp_path = None
     debug_mode = os.getenv("TEXFLOW_DEBUG")
+    log_file = Path(log_file) if log_file else (tex_file.with_suffix(".log") if tex_file else None)
+    if cwd:
+        output_path = Path(cwd) / LATEX_OUTPUT_FILE
+    else:
+        fd, name = tempfile.mkstemp(suffix=".log")
+        os.close(fd)
+        output_path = Path(name)
 
     # Execução do processo
-    # capture_output só intercepta o stdout/stderr do PROCESSO latexmk — o
+    # Só o stdout/stderr do PROCESSO latexmk passa por aqui — o
     # build/main.log continua sendo escrito em disco por ele normalmente
     # (é isso que o LaTeX Workshop lê pra popular erros/SyncTeX), mesmo em
     # caso de falha, então esse tratamento customizado não interfere nele.
-    result = subprocess.run(
+    output = LatexLogAnalyzer()
+    engine_log = LatexLogAnalyzer()
+    tail: deque[str] = deque(maxlen=10)
+    # Folga: o mtime do filesystem usa um relógio mais grosso que time_ns().
+    started = time.time_ns() - 50_000_000
+    spawned = time.perf_counter()
+    proc = subprocess.Popen(
         cmd,
         cwd=cwd,
         env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
         text=True,
-        capture_output=True, # Sempre capturamos para poder processar o erro
-        check=False
+        errors="replace",
+        # Grupo próprio: o fail-fast mata o engine junto com o latexmk.
+        start_new_session=os.name == "posix",
     )
 
-    if result.returncode != 0:
-        # 1. Tenta extrair um resumo útil
-        # O LaTeX costuma colocar o erro no stdout, não no stderr
-        summary = summarize_latex_log(result.stdout)
-        
-        # 2. Se o resumo for vazio, tenta pegar as últimas linhas do stdout
-        if not summary.strip():
-            lines = result.stdout.splitlines()
-            summary = "\n".join(lines[-10:]) # Pega as últimas 10 linhas como contexto
-
-        # 3. Salva o log completo para inspeção profunda
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".log", mode="w") as f:
-            f.write("--- STDOUT ---\n")
-            f.write(result.stdout or "")
-            f.write("\n--- STDERR ---\n")
-            f.write(result.stderr or "")
-            log_temp_path = f.name
-
-        print(f"\n❌ Erro na execução! Log detalhado: {log_temp_path}", file=sys.stderr)
+    def pump() -> None:
+        with open(output_path, "w", encoding="utf-8") as out:
+            for line in proc.stdout:
+                out.write(line)
+                output.feed(line)
+                tail.append(line.rstrip("\n"))
+                if debug_mode:
+                    print(line, end="")
+
+    reader = threading.Thread(target=pump, name="texflow-latex-output", daemon=True)
+    reader.start()
+
+    usage: dict = {}
+    waiter = threading.Thread(target=_reap, args=(proc, usage), name="texflow-latex-wait", daemon=True)
+    waiter.start()
+
+    passes = 0
+    killed = False
+
+    def poll() -> None:
+        nonlocal passes
+        # Um .log anterior a este comando é de outro build: ignora até o
+        # engine recriá-lo.
+        try:
+            if log_file is None or log_file.stat().st_mtime_ns < started:
+                return
+        except OSError:
+            return
+        if engine_log.feed_file(log_file):
+            passes += 1
+        progress(f"passada {passes} · página {engine_log.pages}")
+
+    while True:
+        waiter.join(PROGRESS_INTERVAL)
+        if not waiter.is_alive():
+            break
+        poll()
+        if fail_fast and not killed and (engine_log.fatal or output.fatal):
+            _kill(proc)
+            killed = True
+
+    reader.join()
+    poll()
+    output.close()
+    engine_log.close()
+
+    record = history.current()
+    if record is not None:
+        # Passadas vistas pelo poll do .log (ao menos a que acabou de rodar).
+        record.latex_run(max(passes, 1), int(engine_log.output[1]) if engine_log.output else None)
+
+    profile = profiler.current()
+    if profile is not None:
+        profile.child(cmd, time.perf_counter() - spawned, usage.get("rusage"), proc.returncode)
+
+    timeline = trace.current()
+    if timeline is not None:
+        # O processo do engine ganha uma trilha própria (pelo pid dele) na
+        # linha do tempo, fora das threads do TeXFlow.
+        timeline.name_process(proc.pid, cmd[0])
+        timeline.complete(
+            " ".join(cmd), "latex", spawned, time.perf_counter(), pid=proc.pid, tid=proc.pid,
+            thread_name=cmd[0], args={"cwd": str(cwd or os.getcwd()), "returncode": proc.returncode},
+        )
+
+    if proc.returncode != 0:
+        # 1. Tenta extrair um resumo útil: primeiro do que o processo
+        # escreveu, depois do .log do engine (com -silent, os erros só
+        # aparecem lá), e por fim as últimas linhas de saída.
+        summary = output.summary()
+        if not (output.errors or output.placeholders) and engine_log.errors:
+            summary = engine_log.summary()
+        if not summary.strip() or summary.startswith("Nenhuma indicação"):
+            summary = "\n".join(tail) or summary
+
+        print(f"\n❌ Erro na execução! Log detalhado: {output_path}", file=sys.stderr)
         sys.stderr.flush()
 
-        # 4. O RAISE: Passamos o resumo para a mensagem principal
-        # Usamos 'from None' se não quiser o traceback do subprocess, 
-        # ou 'from e' para manter a cadeia.
+        header = (
+            "Compilação LaTeX abortada no primeiro erro fatal (fail-fast)"
+            if killed
+            else f"Falha na Compilação LaTeX (Código {proc.returncode})"
+        )
         raise RuntimeError(
-            f"Falha na Compilação LaTeX (Código {result.returncode})\n"
+            f"{header}\n"
             f"--------------------------------------------------\n"
             f"{summary}\n"
             f"--------------------------------------------------\n"
-            f"Log completo em: {log_temp_path}"
+            f"Log completo em: {output_path}"
         )
 
-    # Se chegou aqui, deu certo. Se quiser ver o output em modo debug:
-    if debug_mode:
-        print(result.stdout)
+def latexmk_command() -> list[str]:
+    """Linha de comando do latexmk usada no build padrão (latexmk-xelatex)."""
+    return engines.get_engine(engines.DEFAULT_ENGINE).command()
 
-def latexmk_build_process(build_dir: Path):
-    """Compila via latexmk, que decide sozinho (por mtime/dependência de cada
-    \\input, não um hash global) o que precisa ser reprocessado. Cache
-    incremental nativo dele vive em build/.fdb_latexmk e build/*.fls e não é
-    apagado entre builds — por isso RenderTemplate/CopyTree evitam tocar o
-    mtime de arquivos cujo conteúdo não mudou (ver classes/task.py)."""
-
-    env = os.environ.copy()
-
-    # 🔥 TEXINPUTS correto
-    env["TEXINPUTS"] = f"{build_dir}{os.pathsep}{env.get('TEXINPUTS','')}"
-
-    cmd = [
-        "latexmk",
-        "-xelatex",
-        "-pdfxe",
-        # -f: continua processando mesmo se um passo (ex: uma xelatex run)
-        # reportar erro, pra maximizar o que fica atualizado e pra sempre
-        # gerar main.log/main.pdf parciais que o LaTeX Workshop possa ler.
-        # NÃO é o mesmo que -g (que força rebuild completo ignorando
-        # timestamps) — -f não invalida o cache incremental do latexmk.
-        "-f",
-        "-interaction=nonstopmode", # Evita travar pedindo input
-        "-silent",                  # 🔥 Substitui o -quiet e silencia o log
-        "-synctex=1",
-        "-file-line-error"
-    ]
+def compile_document(build_dir: Path, engine: engines.Engine | None = None):
+    """Compila build/main.tex com `engine` (padrão: latexmk-xelatex).
 
-    if os.getenv("TEXFLOW_DEBUG"):
-        cmd.append("-verbose")
-    else:
-        cmd.append("-quiet")
+    O latexmk decide sozinho (por mtime/dependência de cada \\input, não um
+    hash global) o que precisa ser reprocessado. Cache incremental nativo
+    dele vive em build/.fdb_latexmk e build/*.fls e não é apagado entre
+    builds — por isso RenderTemplate/CopyTree evitam tocar o mtime de
+    arquivos cujo conteúdo não mudou (ver classes/task.py)."""
+    (engine or engines.get_engine()).run(build_dir)
+
+def draft_build_process(build_dir: Path, engine: engines.Engine | None = None):
+    """Rascunho rápido pra edição: build/main-draft.pdf, sem cache de PDFs.
+
+    Job separado (main-draft.*), então o main.pdf de qualidade final e os
+    auxiliares dele continuam intactos.
+    """
+    (engine or engines.get_engine()).run(build_dir, draft=True)
+
+def only_build_process(build_dir: Path, selector: str, engine: engines.Engine | None = None):
+    """Compila só as seções escolhidas por `selector` em build/main-only.pdf.
+
+    Usa \\includeonly (ver scripts/partial.py): as seções de fora não são
+    tipografadas, mas os .aux delas mantêm referências e números de página.
+    """
+    partial.prepare(build_dir, selector)
+    (engine or engines.get_engine()).run(build_dir, root=partial.JOBNAME)
 
-    cmd.append("main.tex")
+def latexmk_build_process(build_dir: Path):
+    """Compila via latexmk + xelatex (ver compile_document)."""
+    compile_document(build_dir, engines.get_engine("latexmk-xelatex"))
 
-    # 🔥 cwd dinâmico (adeus "build" hardcoded)
-    run_latex_command("⚡", cmd, cwd=str(build_dir), env=env)
+def cached_build_process(build_dir: Path, cache: PdfCache | None = None, engine: engines.Engine | None = None):
+    """Compila consultando antes o cache de PDFs endereçado por conteúdo.
+
+    Se exatamente essas entradas (main.tex renderizado, arquivos de suporte,
+    imagens, comandos do engine) já foram compiladas antes — ex: voltando pra
+    um branch ou versão de payload anterior — restaura main.pdf/.log/
+    .synctex.gz em milissegundos em vez de rodar o latexmk.
+    """
+    engine = engine or engines.get_engine()
+    cache = cache or PdfCache(PDF_CACHE_DIR, _pdf_cache_max_bytes())
+    commands = [" ".join(cmd) for cmd in engine.commands()]
+    digest = inputs_digest(build_dir, extra=[__version__, *commands])
+
+    record = history.current()
+    if cache.restore(digest, build_dir):
+        print(f"♻️  PDF restaurado do cache ({digest[:12]})", file=sys.stderr)
+        if record is not None:
+            record.pdf_cache = "hit"
+            log = LatexLogAnalyzer()
+            log.feed_file(build_dir / "main.log")
+            log.close()
+            record.latex_run(0, int(log.output[1]) if log.output else None)
+        return
+
+    if record is not None:
+        record.pdf_cache = "miss"
+    compile_document(build_dir, engine)
+    cache.store(digest, build_dir)
+
+def _pdf_cache_max_bytes() -> int:
+    try:
+        return int(os.environ["TEXFLOW_PDF_CACHE_MB"]) * 1024 * 1024
+    except (KeyError, ValueError):
+        return DEFAULT_MAX_BYTES
 
 def xelatex_build_process():
-    # Setup do ambiente
-    env = os.environ.copy()
-    env["TEXINPUTS"] = f"{BUILD_DIR}:{env.get('TEXINPUTS','')}"
-
-    commands_to_run = [
-        ("🐢", ["xelatex", "-interaction=nonstopmode", "main.tex"], "build"),
-        ("🚀", ["biber", "main"], "build"),
-        ("🐢", ["xelatex", "-interaction=nonstopmode", "main.tex"], "build")
-    ]
-    
+    """xelatex → biber → xelatex em ./build, sem latexmk (engine "xelatex")."""
     try:
-        for emoji, cmd, cwd in commands_to_run:
-            run_latex_command(emoji, cmd, cwd=cwd, env=env)
+        engines.get_engine("xelatex").run(BUILD_DIR)
         
     except RuntimeError as e:
         print(f"\n❌ Erro crítico: {e}", file=sys.stderr)
@@ -167,87 +334,25 @@ def xelatex_build_process():
         sys.exit(1)
 
 def summarize_latex_log(stdout: str, stderr: str | None = None, max_examples: int = 6) -> str:
-    s = (stdout or "") + ("\n" + stderr if stderr else "")
-    s.splitlines()
-
-    # 1) Erros LaTeX (linhas que começam com "!")
-    errors = []
-    for m in re.finditer(r'(?m)^! (.+)$', s):
-        msg = m.group(1).strip()
-        # tenta achar trecho "l.<num> ..." perto do erro
-        tail = s[m.end(): m.end() + 600]
-        lm = re.search(r'l\.(\d+)\s*(.*)', tail)
-        if not lm:
-            # procura a última ocorrência de l.<num> antes do erro
-            prev = s[:m.start()]
-            prev_l = re.findall(r'l\.(\d+)\s*(.*)', prev)
-            if prev_l:
-                ln, snippet = prev_l[-1]
-            else:
-                ln, snippet = None, ""
-        else:
-            ln, snippet = lm.group(1), lm.group(2).strip()
-        errors.append({'msg': msg, 'line': ln, 'snippet': snippet})
-    # 2) Placeholders <<...>>
-    placeholders = re.findall(r'<<\s*([^<>]+?)\s*>>', s)
-    placeholders = list(OrderedDict.fromkeys(placeholders))  # uniq preserve order
-
-    # 3) Missing characters
-    missing_chars = re.findall(r'Missing character: There is no (.+?) in font (.+?)!', s)
-    # 4) Citations undefined
-    cites = re.findall(r"LaTeX Warning: Citation '([^']+)' .*undefined(?: on input line (\d+))?", s)
-    cite_keys = list(OrderedDict.fromkeys([c[0] for c in cites]))
-    # 5) References undefined
-    refs = re.findall(r"LaTeX Warning: Reference `([^`]+)' .* undefined(?: on input line (\d+))?", s)
-    ref_keys = list(OrderedDict.fromkeys([r[0] for r in refs]))
-    # 6) No .bbl / empty bibliography / biblatex asks to run Biber
-    no_bbl = re.findall(r'No file ([\w\./-]+)\.', s)
-    empty_bib = 'LaTeX Warning: Empty bibliography' in s
-    ask_biber = 'Please (re)run Biber' in s or 'Please (re)run Biber' in s or 'Please (re)run Biber' in s
-    # 7) Overfull boxes
-    overfull = re.findall(r'Overfull \\hbox.*', s)
-    # 8) Output written
-    out_written = re.search(r'Output written on (.+?) \((\d+) pages\)\.', s)
-
-    parts = []
-    if errors:
-        parts.append("Erros LaTeX (primeiros):")
-        for e in errors[:max_examples]:
-            if e['line']:
-                parts.append(f" • linha {e['line']}: {e['msg']}  — trecho: {e['snippet']!s}")
-            else:
-                parts.append(f" • {e['msg']}")
-    if placeholders:
-        parts.append("Placeholders não resolvidos:")
-        parts.append(" • " + ", ".join(placeholders[:max_examples]))
-    if missing_chars:
-        groups = {}
-        for ch, font in missing_chars:
-            groups.setdefault(font.strip(), set()).add(ch.strip())
-        parts.append("Caracteres faltando (provavelmente por math-mode):")
-        for font, chars in groups.items():
-            parts.append(f" • {font}: {', '.join(list(chars)[:10])}")
-    if cite_keys:
-        parts.append(f"Citações não encontradas ({len(cite_keys)}):")
-        parts.append(" • " + ", ".join(cite_keys[:max_examples]))
-        if len(cite_keys) > max_examples:
-            parts.append(f" • ... +{len(cite_keys)-max_examples} outros")
-    if ref_keys:
-        parts.append(f"Referências não resolvidas ({len(ref_keys)}):")
-        parts.append(" • " + ", ".join(ref_keys[:max_examples]))
-    if no_bbl:
-        parts.append(f"Aviso: arquivo(s) de bibliografia ausente(s): {', '.join(no_bbl[:max_examples])}")
-    if empty_bib:
-        parts.append("Bibliografia vazia.")
-    if ask_biber:
-        parts.append("biblatex pede: rodar `biber output` e recompilar (biber + 2x xelatex).")
-    if overfull:
-        parts.append(f"Overfull \\hbox: {len(overfull)} ocorrência(s) (avisos de layout).")
-    if out_written:
-        parts.append(f"PDF gerado: {out_written.group(1)} ({out_written.group(2)} páginas).")
-    if not parts:
-        return "Nenhuma indicação clara de erro encontrada no stdout."
-    return "\n".join(parts)
+    """Resumo legível de um build que falhou (ver classes/latex_log.py)."""
+    analyzer = LatexLogAnalyzer()
+    analyzer.feed(stdout or "")
+    if stderr:
+        analyzer.feed("\n" + stderr)
+    analyzer.close()
+    return analyzer.summary(max_examples)
+
+def _bytecode_cache_dir(template_path: Path) -> Path:
+    """Pasta do cache de templates compilados, em build/.
+
+    O Jinja já invalida cada entrada pelo checksum do fonte do template (e
+    pela versão do Python, no cabeçalho do arquivo); a versão do jinja2 no
+    nome da pasta cobre o que sobra: bytecode gerado por outra versão nunca
+    é reaproveitado.
+    """
+    import jinja2
+
+    return template_path / "build" / ".texflow-jinja" / jinja2.__version__
 
 def _jinja_env(template_arg: str) -> Environment:
     
@@ -255,8 +360,13 @@ def _jinja_env(template_arg: str) -> Environment:
 
     # Caso 1 — usuário passou caminho real
     if p.exists() and p.is_dir():
-        return Environment(
+        # Bytecode persistente: o lex/parse/compilação de um main.tex grande
+        # é pago uma vez por edição do template, não uma vez por build.
+        cache_dir = _bytecode_cache_dir(p.resolve())
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        env = Environment(
             loader=FileSystemLoader(str(p)),
+            bytecode_cache=FileSystemBytecodeCache(str(cache_dir)),
             variable_start_string="<<",
             variable_end_string=">>",
             block_start_string="<<%",
@@ -265,87 +375,287 @@ def _jinja_env(template_arg: str) -> Environment:
             trim_blocks=True,
             lstrip_blocks=True,
         )
+        # Anota quais chaves do payload cada {% block %} lê, pro render
+        # incremental por fragmento (classes/fragments.py).
+        env.context_class = TrackingContext
+        return env
     else:
         raise FileNotFoundError("Default template não encontrado.\n")
 
-def build(data_path: str, template_folder: str):
+def precompile_templates(template_folder: str) -> list[str]:
+    """Compila de antemão todos os .tex do template pro cache em build/.
+
+    Útil depois de trocar de branch ou num CI: o primeiro build já encontra
+    o bytecode pronto. Devolve os nomes dos templates compilados.
     """
-    Cria o arquivo .tex com as variáveis passadas
+    env = _jinja_env(template_folder)
+    names = [
+        name for name in env.list_templates(extensions=["tex"])
+        if not EXCLUDED_NAMES.intersection(Path(name).parts)
+    ]
+    for name in names:
+        env.get_template(name)
+    return names
+
+# Etapas do pipeline de build. O watch mode (scripts/watcher.py) usa esses
+# nomes pra re-rodar só o que foi afetado por uma mudança.
+STAGES = ("render", "copy-assets", "copy-files", "compile")
+
+# Fingerprints das tarefas do último build (ver Task.runner), em build/.
+STATE_FILE = ".texflow-state.json"
+
+# Saída de cada {% block %} do último render (ver classes/fragments.py).
+FRAGMENTS_FILE = ".texflow-fragments.json"
+
+# O que o copy-files já copiou pra build/ (ver classes/manifest.py).
+COPY_MANIFEST = ".texflow-copy-files.json"
+
+# Idem para cada pasta de assets (images/, plots/): com manifest, a cópia
+# pode ser pulada quando está em dia e não segura o compile em todo build.
+ASSET_MANIFEST = ".texflow-copy-{}.json"
+
+
+class BuildSession:
+    """Estado "quente" de um template entre builds no mesmo processo.
+
+    Guarda o Environment do Jinja e o payload já parseado, recarregando o
+    JSON só quando o arquivo muda no disco. O FileSystemLoader do Jinja já
+    revalida o mtime de cada template em get_template(), então reaproveitar
+    o Environment entre builds é seguro.
     """
-    
-    print = print_formatted_text
-    with spinner(color="magenta") as sp:
-        
-        try:
-            
-            template_path = Path(template_folder).resolve()
-            build_dir = template_path / "build"
-            build_dir.mkdir(parents=True, exist_ok=True)
 
-            # --- Data ---
+    def __init__(
+        self,
+        template_folder: str,
+        *,
+        use_cache: bool = True,
+        link_store: bool = False,
+        engine: str | None = None,
+        draft: bool = False,
+        prune_bib: bool | None = None,
+        only: str | None = None,
+    ):
+        self.template_path = Path(template_folder).resolve()
+        self.use_cache = use_cache
+        self.draft = draft
+        self.only = only
+        # --engine > `engine` do texflow.toml do template > latexmk-xelatex
+        config = load_template_config(self.template_path)
+        self.engine = engines.get_engine(engine or config.get("engine"))
+        # --prune-bib > `prune_bibliography` do texflow.toml > desligado
+        self.prune_bib = bool(config.get("prune_bibliography", False)) if prune_bib is None else prune_bib
+        # Com link_store, os arquivos do template viram hardlinks para um
+        # store compartilhado em vez de cópias (ver classes/object_store.py).
+        self.store = ObjectStore(OBJECTS_DIR) if link_store else None
+        self.build_dir = self.template_path / "build"
+        self.env = _jinja_env(str(self.template_path))
+        self._data_key: tuple | None = None
+        self._context: dict | None = None
+
+    def context(self, data_path: Path) -> dict:
+        stat = data_path.stat()
+        key = (str(data_path.resolve()), stat.st_mtime_ns, stat.st_size)
+        if key != self._data_key or self._context is None:
             data = Data()
-            data.load_from_file(Path(data_path))
-            context = data.get_payload()
-            
-            # --- Jinja ---
-            env = _jinja_env(template_folder)
-            template = env.get_template("main.tex")
-            
-            # --- Tasks ---
-            tasks: list[Task] = []
-            render  = RenderTemplate(        
-                template=template,
-                context=context,
-                output=build_dir / "main.tex",
-                dependencies=[]
-            )
+            data.load_from_file(data_path)
+            self._context = data.get_payload()
+            self._data_key = key
+        return self._context
+
+    def tasks(self, context: dict, stages=STAGES) -> list[Task]:
+        build_dir = self.build_dir
+        tasks: dict[str, Task] = {}
+
+        def upstream(*names):
+            # "render" cobre todas as tarefas "render:<arquivo>".
+            return [t for key, t in tasks.items() if key.split(":", 1)[0] in names]
+
+        if "render" in stages:
+            for task in self.render_tasks(context, build_dir, fragment_cache=build_dir / FRAGMENTS_FILE):
+                tasks[f"render:{task.output.relative_to(build_dir).as_posix()}"] = task
+        if "copy-assets" in stages:
             # 🔥 symlink em vez de cópia física: são assets binários que
             # raramente mudam entre builds, então não há por que duplicá-los
             # em build/ a cada save.
-            copy_images = CopyTree(
+            tasks["copy-images"] = CopyTree(
                 res.files('assets').joinpath('images'),
                 build_dir / "images",
                 symlink=True,
-                dependencies = [render]
+                manifest=build_dir / ASSET_MANIFEST.format("images"),
             )
-            copy_plots  = CopyTree(
+            tasks["copy-plots"] = CopyTree(
                 res.files('assets').joinpath('plots'),
                 build_dir / "plots",
                 symlink=True,
-                dependencies = [render]
+                manifest=build_dir / ASSET_MANIFEST.format("plots"),
             )
-            copy_files = CopyTree(
-                Path(template_folder),
+        if "copy-files" in stages:
+            tasks["copy-files"] = CopyTree(
+                self.template_path,
                 build_dir,
-                ignore_tex=True, 
-                dependencies=[render]
+                ignore_tex=True,
+                tex_whitelist=(),  # todos os .tex passam pelo render
+                manifest=build_dir / COPY_MANIFEST,
+                store=self.store,
+                # Com o corte da bibliografia, os .bib chegam em build/ pela
+                # tarefa prune-bibliography, não como cópia.
+                exclude=("*.bib",) if self.prune_bib else (),
             )
-
-            compile_pdf = FnTask(
-                latexmk_build_process,
+        if "compile" in stages and self.prune_bib:
+            # Parte do compile (roda sempre antes dele): as chaves citadas
+            # mudam com o render, não só quando um .bib muda.
+            bibs = self.template_files(".bib")
+            if bibs:
+                tasks["bibliography"] = PruneBibliography(
+                    bibs,
+                    self.template_path,
+                    build_dir,
+                    functools.partial(citations.used_keys, build_dir),
+                    dependencies=upstream("render", "copy-files"),
+                )
+        if "compile" in stages:
+            args = ()
+            if self.only:
+                compile_fn, pdf, args = only_build_process, f"{partial.JOBNAME}.pdf", (self.only,)
+            elif self.draft:
+                compile_fn, pdf = draft_build_process, f"{engines.DRAFT_JOBNAME}.pdf"
+            else:
+                compile_fn, pdf = (cached_build_process if self.use_cache else compile_document), "main.pdf"
+            tasks["compile"] = FnTask(
+                compile_fn,
                 build_dir,
+                *args,
+                engine=self.engine,
                 mode="chain",
-                dependencies=[render, copy_images, copy_plots, copy_files]
+                # Com tudo em dia (nenhuma dependência rodou, main.tex igual
+                # e o PDF presente), o latexmk nem é chamado.
+                inputs=[build_dir / "main.tex"],
+                outputs=[build_dir / pdf],
+                dependencies=upstream("render", "copy-images", "copy-plots", "copy-files", "bibliography")
             )
-            tasks.extend([
-                copy_images,
-                copy_plots,
-                copy_files,
-                render,
-                compile_pdf
-            ]) # append tudo numa vez só
-            
-            Task.runner(tasks)
+        return list(tasks.values())
+
+    def render_tasks(self, context: dict, build_dir: Path, *, fragment_cache: Path | None = None) -> list[RenderTemplate]:
+        """Um RenderTemplate por .tex do template, com a saída no mesmo
+        caminho relativo dentro de `build_dir`. Rodam em paralelo no pool de
+        threads, e cada um só reescreve o seu arquivo se o conteúdo mudou."""
+        sources = self.template_sources()
+        names = [src.relative_to(self.template_path).as_posix() for src in sources]
+        if "main.tex" not in names:
+            names.insert(0, "main.tex")  # get_template acusa a falta dele
+        return [
+            RenderTemplate(
+                template=self.env.get_template(name),
+                context=context,
+                output=build_dir / name,
+                # qualquer .tex pode incluir/importar outros do template
+                inputs=sources,
+                fragment_cache=fragment_cache,
+                dependencies=[],
+            )
+            for name in names
+        ]
+
+    def template_sources(self) -> list[Path]:
+        """Todos os .tex do template (fora de build/), entradas do render."""
+        return self.template_files(".tex")
+
+    def template_files(self, suffix: str) -> list[Path]:
+        """Arquivos do template (fora de build/) com a extensão `suffix`."""
+        sources = []
+        for dirpath, dirnames, filenames in os.walk(self.template_path):
+            dirnames[:] = [d for d in dirnames if d not in EXCLUDED_NAMES]
+            sources.extend(Path(dirpath) / f for f in filenames if f.endswith(suffix))
+        return sorted(sources)
+
+    def run(self, data_path: str | Path, stages=STAGES) -> None:
+        self.build_dir.mkdir(parents=True, exist_ok=True)
+        context = self.context(Path(data_path))
+        tasks = self.tasks(context, stages)
+        # Cada build entra no histórico (classes/history.py, --stats).
+        recorded = contextlib.nullcontext()
+        if history.enabled():
+            recorded = history.recording(
+                self.history_record(context), tasks, self.build_dir, history.BuildHistory(HISTORY_DB)
+            )
+        with recorded:
+            Task.runner(tasks, state=self.build_dir / STATE_FILE)
+
+    def history_record(self, context: dict) -> history.BuildRecord:
+        """Registro do histórico: digests dos .tex + texflow.toml e do payload."""
+        h = hashlib.blake2b(digest_size=16)
+        config = self.template_path / TEMPLATE_CONFIG
+        for path in [*self.template_sources(), *([config] if config.exists() else [])]:
+            h.update(path.relative_to(self.template_path).as_posix().encode("utf-8") + b"\0" + path.read_bytes())
+        payload = json.dumps(context, sort_keys=True, default=str).encode("utf-8")
+        return history.BuildRecord(
+            self.template_path,
+            engine=self.engine.name,
+            profile="only" if self.only else "draft" if self.draft else "build",
+            template_digest=h.hexdigest(),
+            payload_digest=hashlib.blake2b(payload, digest_size=16).hexdigest(),
+        )
+
+
+def build(
+    data_path: str,
+    template_folder: str,
+    *,
+    session: BuildSession | None = None,
+    stages=STAGES,
+    use_cache: bool = True,
+    link_store: bool = False,
+    engine: str | None = None,
+    draft: bool = False,
+    prune_bib: bool | None = None,
+    only: str | None = None,
+    profile: bool = False,
+) -> bool:
+    """
+    Cria o arquivo .tex com as variáveis passadas e compila o PDF.
+
+    Devolve True se o build terminou sem erro. Falhas são reportadas no
+    spinner e não propagam, pra que o chamador (CLI, watch mode) decida o
+    que fazer. Com `profile`, o build roda sob cProfile/tracemalloc e o
+    relatório (classes/profiler.py) fica em build/, inclusive se falhar.
+    """
+    
+    with spinner(color="magenta") as sp:
+        
+        try:
             
-            sp.ok("✨ Compilação do documento concluída com sucesso! ✨")
+            session = session or BuildSession(
+                template_folder, use_cache=use_cache, link_store=link_store, engine=engine,
+                draft=draft, prune_bib=prune_bib, only=only,
+            )
+            try:
+                with profiler.recording(session.build_dir) if profile else contextlib.nullcontext():
+                    session.run(data_path, stages)
+            finally:
+                if profile:
+                    sp.write(f"📊 Perfil do build: {session.build_dir / profiler.REPORT_FILE} (+ {profiler.STATS_FILE})")
+
+            if session.only:
+                sp.ok(f"🧩 Compilação parcial pronta: {session.build_dir / partial.JOBNAME}.pdf")
+            elif session.draft:
+                sp.ok(f"✏️  Rascunho pronto: {session.build_dir / engines.DRAFT_JOBNAME}.pdf")
+            else:
+                sp.ok("✨ Compilação do documento concluída com sucesso! ✨")
+            return True
         
         except Exception as e:  # noqa: BLE001 - error boundary do build, precisa reportar qualquer falha
 
             with sp.hidden():
                 if is_tty():
-                    print(FormattedText([("fg:#ff0000 bold", f"✖ Erro: {e}")]), style=STYLE, file=sys.stderr)
+                    from prompt_toolkit.formatted_text import FormattedText
+                    from prompt_toolkit.shortcuts import print_formatted_text
+
+                    from configs.style import STYLE
+
+                    print_formatted_text(FormattedText([("fg:#ff0000 bold", f"✖ Erro: {e}")]), style=STYLE, file=sys.stderr)
                 else:
                     print(f"✖ Erro: {e}", file=sys.stderr)
                     sys.stderr.flush()
 
-            sp.fail("🐛")
\ No newline at end of file
+            sp.fail("🐛")
+            return False
@@ -0,0 +1,77 @@
+import hashlib
+import re
+from pathlib import Path
+
+# Digest da bibliografia na última compilação --draft (ver biber_needed).
+DRAFT_BIB_STATE = ".texflow-draft-bib"
+
+# Chaves registradas pelo LaTeX no .aux (BibTeX e biblatex) e no .bcf.
+_AUX_CITE = re.compile(r"\\(?:citation|abx@aux@cite(?:\{[^}]*\})?)\{([^}]*)\}")
+_BCF_CITE = re.compile(r"<bcf:citekey[^>]*>([^<]+)</bcf:citekey>")
+
+# \cite, \citep, \textcite, \parencite*, \nocite... com até dois [opcionais].
+_CITE = re.compile(r"\\(?:[a-zA-Z]*cite[a-zA-Z]*|nocite)\*?\s*(?:\[[^\]]*\]\s*){0,2}\{([^}]*)\}")
+
+
+def cite_keys(text: str) -> set[str]:
+    """Chaves citadas num trecho de LaTeX (comentários de linha ignorados)."""
+    text = re.sub(r"(?<!\\)%.*", "", text)
+    return {key.strip() for group in _CITE.findall(text) for key in group.split(",") if key.strip()}
+
+
+def _sources(build_dir: Path, suffix: str) -> list[Path]:
+    return sorted(
+        path for path in build_dir.rglob(f"*{suffix}")
+        if not path.relative_to(build_dir).parts[0].startswith(".texflow") and path.is_file()
+    )
+
+
+def document_cite_keys(build_dir: Path) -> set[str]:
+    """Chaves citadas em todos os .tex de build/ (main.tex e os \\input)."""
+    keys: set[str] = set()
+    for path in _sources(build_dir, ".tex"):
+        keys |= cite_keys(path.read_text(encoding="utf-8", errors="replace"))
+    return keys
+
+
+def used_keys(build_dir: Path) -> set[str]:
+    """Chaves que o documento usa: as dos .tex mais as que o LaTeX registrou
+    no .aux/.bcf da última compilação (cobre citações feitas por macros)."""
+    keys = document_cite_keys(build_dir)
+    for path in _sources(build_dir, ".aux"):
+        text = path.read_text(encoding="utf-8", errors="replace")
+        keys |= {k.strip() for group in _AUX_CITE.findall(text) for k in group.split(",") if k.strip()}
+    for path in _sources(build_dir, ".bcf"):
+        text = path.read_text(encoding="utf-8", errors="replace")
+        keys |= {k.strip() for k in _BCF_CITE.findall(text)}
+    return keys
+
+
+def bibliography_digest(build_dir: Path) -> str:
+    """Hash do que o biber lê: as chaves citadas e o conteúdo dos .bib."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update("\0".join(sorted(document_cite_keys(build_dir))).encode("utf-8"))
+    for path in _sources(build_dir, ".bib"):
+        h.update(b"\0" + path.relative_to(build_dir).as_posix().encode("utf-8") + b"\0" + path.read_bytes())
+    return h.hexdigest()
+
+
+def biber_needed(build_dir: Path, digest: str, jobname: str) -> bool:
+    """O biber precisa rodar de novo para `jobname`?
+
+    Não precisa quando o .bbl dele existe e nem as chaves citadas nem os
+    .bib mudaram desde a última compilação bem-sucedida (remember_bibliography).
+    """
+    if not (build_dir / f"{jobname}.bbl").exists():
+        return True
+    try:
+        return (build_dir / DRAFT_BIB_STATE).read_text(encoding="utf-8").strip() != digest
+    except OSError:
+        return True
+
+
+def remember_bibliography(build_dir: Path, digest: str) -> None:
+    try:
+        (build_dir / DRAFT_BIB_STATE).write_text(digest, encoding="utf-8")
+    except OSError:
+        pass  # no pior caso o biber roda de novo no próximo build
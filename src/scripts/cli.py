@@ -1,23 +1,19 @@
 import argparse
+import contextlib
 import os
 import sys
 import time
 from pathlib import Path
 
-from prompt_toolkit.formatted_text import HTML, FormattedText
-from prompt_toolkit.shortcuts import print_formatted_text
-
-from configs.spinner import spinner
-from configs.style import LOGO, LOGO_PALLET, STYLE
 from configs.version import __version__
 
-from .builder import build
-from .init import run_init
-from .updater import run_uninstall, run_update
+from . import engines
 from .utils import is_tty
 
-# override print with feature-rich ``print_formatted_text`` from prompt_toolkit
-print = print_formatted_text
+# Só stdlib (e módulos leves do projeto) aqui no topo: cada ação importa o
+# que usa dentro do próprio ramo em cli(). --version/--help/--init não
+# carregam jinja2 nem prompt_toolkit, e um build sem TTY (LaTeX Workshop a
+# cada Ctrl+S) não carrega prompt_toolkit. tests/test_startup.py vigia isso.
 
 def welcome():
     """
@@ -28,6 +24,12 @@ def welcome():
     if not is_tty():
         return
 
+    from prompt_toolkit.formatted_text import HTML, FormattedText
+    from prompt_toolkit.shortcuts import print_formatted_text
+
+    from configs.spinner import spinner
+    from configs.style import LOGO, LOGO_PALLET, STYLE
+
     # A arte ASCII é dividida em linhas para animar a exibição.
 
     # Limpa o console
@@ -50,7 +52,7 @@ def welcome():
             sp.stop()
         
         except TypeError as e:
-            print(HTML(
+            print_formatted_text(HTML(
                 f'<error> > </error> <error> Erro: </error>'
                 f'<error-msg> {e} </error-msg>'
             ), style=STYLE, file=sys.stderr)
@@ -91,6 +93,36 @@ def cli():
         help="Faz o build com base no template latex. O valor será 'True' se esta flag for usada."
     )
 
+    action_group.add_argument(
+        "-w", "--watch",
+        action="store_true",
+        help="Mantém o processo vivo e recompila a cada mudança no template ou no JSON de input."
+    )
+
+    action_group.add_argument(
+        "--batch",
+        action="store_true",
+        help="Gera um PDF por documento: --input aponta pra um array JSON ou uma pasta de *.json."
+    )
+
+    action_group.add_argument(
+        "--precompile",
+        action="store_true",
+        help="Compila todos os .tex do template (--template) pro cache de bytecode em build/."
+    )
+
+    action_group.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Sobe um daemon residente que atende os builds de `texflow --build` via socket Unix."
+    )
+
+    action_group.add_argument(
+        "--stats",
+        action="store_true",
+        help="Mostra o histórico de builds (tempos, cache, passadas, páginas) e marca os builds bem mais lentos que a mediana recente."
+    )
+
     action_group.add_argument(
         "--update",
         action="store_true",
@@ -132,6 +164,78 @@ def cli():
         help="Mostra logs detalhados"
     )
 
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        help="Quantos compiles rodam em paralelo no --batch (padrão: nº de CPUs)."
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Sempre roda o latexmk, sem consultar o cache de PDFs já compilados."
+    )
+
+    parser.add_argument(
+        "--engine",
+        choices=sorted(engines.ENGINES),
+        help="Backend de compilação (padrão: `engine` do texflow.toml do template, ou latexmk-xelatex)."
+    )
+
+    parser.add_argument(
+        "--draft",
+        action="store_true",
+        help="Rascunho rápido em build/main-draft.pdf (figuras como molduras, sem SyncTeX, biber só se a bibliografia mudou); o main.pdf final fica intacto."
+    )
+
+    parser.add_argument(
+        "--only",
+        metavar="SEÇÃO",
+        help="Compila só uma seção (número, \\label ou parte do título; ou o nome de um \\include) em build/main-only.pdf, via \\includeonly."
+    )
+
+    parser.add_argument(
+        "--prune-bib",
+        action="store_true",
+        help="Copia pra build/ só as entradas citadas dos .bib do template (e os crossref delas), pra o biber não ler milhares de entradas à toa."
+    )
+
+    parser.add_argument(
+        "--fail-fast",
+        action="store_true",
+        help="Mata a compilação no primeiro erro fatal do LaTeX em vez de esperar o latexmk terminar."
+    )
+
+    parser.add_argument(
+        "--preamble-cache",
+        action="store_true",
+        help="Pré-compila o preâmbulo do main.tex num formato (mylatexformat) reaproveitado a cada passada do xelatex."
+    )
+
+    parser.add_argument(
+        "--link-store",
+        action="store_true",
+        help="Usa hardlinks para um store compartilhado (~/.cache/texflow/objects) em vez de copiar os arquivos do template."
+    )
+
+    parser.add_argument(
+        "--trace",
+        metavar="ARQUIVO",
+        help="Grava a linha do tempo do build (tarefas, cópias, latexmk) em JSON Chrome trace, para abrir no Perfetto."
+    )
+
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Roda o --build sob cProfile/tracemalloc e grava em build/ um relatório de CPU e memória por tarefa e por processo filho."
+    )
+
+    parser.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="Faz o build neste processo mesmo que haja um daemon rodando."
+    )
+
     parser.add_argument(
         "-y", "--yes",
         action="store_true",
@@ -140,6 +244,10 @@ def cli():
     
     # 3. Faz o parsing dos argumentos da linha de comando
     args = parser.parse_args()
+    if args.only and args.draft:
+        parser.error("--only e --draft são perfis diferentes: use um de cada vez.")
+    if args.profile and not args.build:
+        parser.error("--profile só vale com --build.")
     
     # Método correto para contar argumentos passados
     def count_passed_args(args, parser):
@@ -156,23 +264,88 @@ def cli():
         
         if args.debug:
             os.environ["TEXFLOW_DEBUG"] = "1"
+        if args.fail_fast:
+            os.environ["TEXFLOW_FAIL_FAST"] = "1"
+        if args.preamble_cache:
+            os.environ["TEXFLOW_PREAMBLE_CACHE"] = "1"
+
+        # --trace: build/batch/watch gravam a linha do tempo ao terminar
+        # (ou falhar, ou no Ctrl+C do watch).
+        timeline = contextlib.nullcontext()
+        if args.trace:
+            from classes import trace
+
+            timeline = trace.recording(Path(args.trace))
     
         if passed_args == 0:
             welcome()
             raise UsageError()
 
+        elif args.precompile:
+            from .builder import precompile_templates
+
+            names = precompile_templates(args.template)
+            print(f"Templates pré-compilados: {', '.join(names) or 'nenhum'}", file=sys.stderr)
+
+        elif args.daemon:
+            from .daemon import serve
+
+            serve()
+
+        elif args.stats:
+            from .stats import show_stats
+
+            # Com -t apontando pra um template existente, só ele; senão todos.
+            template = Path(args.template).resolve()
+            show_stats(str(template) if template.is_dir() else None)
+
         elif args.update:
+            from .updater import run_update
+
             run_update(args.yes)
 
         elif args.uninstall:
+            from .updater import run_uninstall
+
             run_uninstall(args.yes)
 
         elif args.init:
+            from .init import run_init
+
             run_init(args.yes)
 
         elif args.build and args.input:
+            from .builder import build
+
+            welcome()
+            with timeline:
+                build(args.input, args.template, use_cache=not args.no_cache,
+                      link_store=args.link_store, engine=args.engine, draft=args.draft,
+                      prune_bib=args.prune_bib or None, only=args.only, profile=args.profile)
+
+        elif args.batch and args.input:
+            from .batch import run_batch
+
+            welcome()
+            with timeline:
+                ok = run_batch(
+                    args.input,
+                    args.template,
+                    jobs=args.jobs,
+                    use_cache=not args.no_cache,
+                    link_store=args.link_store,
+                    engine=args.engine,
+                )
+            if not ok:
+                sys.exit(1)
+
+        elif args.watch and args.input:
+            from .watcher import watch
+
             welcome()
-            build(args.input, args.template)
+            with timeline:
+                watch(args.input, args.template, link_store=args.link_store, engine=args.engine,
+                      draft=args.draft, prune_bib=args.prune_bib or None, only=args.only)
 
         else:
             raise UsageError("[❌]\n")
@@ -0,0 +1,197 @@
+import argparse
+import contextlib
+import json
+import os
+import socket
+import sys
+import threading
+from pathlib import Path
+
+from configs.paths import DAEMON_SOCKET
+from configs.version import __version__
+
+# Este módulo é importado pelo caminho rápido de main.py ANTES do resto da
+# CLI: só stdlib aqui no topo. Tudo que é pesado (jinja2, prompt_toolkit,
+# builder) é importado dentro de serve(), no processo do daemon.
+
+
+class _SocketStream:
+    """Arquivo "de texto" que encaminha cada write() ao cliente como evento.
+
+    Usado como sys.stderr/sys.stdout durante um build no daemon: tudo o que
+    o build imprimiria no terminal (spinner sem TTY, comando executado,
+    resumo do summarize_latex_log) chega ao cliente em tempo real.
+    """
+
+    def __init__(self, wfile, stream: str):
+        self.wfile = wfile
+        self.stream = stream
+
+    def write(self, text: str) -> int:
+        if text:
+            _send(self.wfile, {"event": "log", "stream": self.stream, "text": text})
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+    def isatty(self) -> bool:
+        return False
+
+
+def _send(wfile, message: dict) -> None:
+    wfile.write((json.dumps(message) + "\n").encode("utf-8"))
+    wfile.flush()
+
+
+def _is_alive(path: Path) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(path))
+        except OSError:
+            return False
+    return True
+
+
+def make_server(path: Path = DAEMON_SOCKET):
+    """Cria (sem iniciar) o servidor do daemon escutando em `path`.
+
+    Mantém uma BuildSession (Environment do Jinja + payload parseado) por
+    pasta de template, então um build vindo do editor paga só o startup do
+    cliente e o trabalho de fato, sem reimportar nada.
+    """
+    import socketserver
+
+    from scripts.builder import BuildSession, build
+
+    if path.exists():
+        if _is_alive(path):
+            raise RuntimeError(f"Já existe um daemon do TexFlow rodando em {path}.")
+        path.unlink()  # socket órfão de um daemon que morreu
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    sessions: dict[Path, BuildSession] = {}
+    # sys.stderr/stdout e os.environ são globais do processo: builds
+    # concorrentes misturariam a saída de clientes diferentes, então o
+    # daemon atende um build por vez.
+    build_lock = threading.Lock()
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            try:
+                request = json.loads(self.rfile.readline())
+            except ValueError:
+                _send(self.wfile, {"event": "done", "ok": False, "error": "Requisição inválida."})
+                return
+
+            if request.get("version") != __version__:
+                # Cliente e daemon de versões diferentes: o cliente cai no
+                # build local em vez de confiar num daemon desatualizado.
+                _send(self.wfile, {"event": "rejected", "version": __version__})
+                return
+
+            template_path = Path(request["template"]).resolve()
+            with build_lock:
+                stderr = _SocketStream(self.wfile, "stderr")
+                stdout = _SocketStream(self.wfile, "stdout")
+                previous_debug = os.environ.pop("TEXFLOW_DEBUG", None)
+                if request.get("debug"):
+                    os.environ["TEXFLOW_DEBUG"] = "1"
+                try:
+                    with contextlib.redirect_stderr(stderr), contextlib.redirect_stdout(stdout):
+                        try:
+                            session = sessions.get(template_path)
+                            if session is None:
+                                session = sessions[template_path] = BuildSession(str(template_path))
+                            ok = build(request["input"], str(template_path), session=session)
+                        except Exception as e:  # noqa: BLE001 - o daemon não pode morrer por causa de um build
+                            print(f"✖ Erro: {e}", file=sys.stderr)
+                            ok = False
+                finally:
+                    os.environ.pop("TEXFLOW_DEBUG", None)
+                    if previous_debug is not None:
+                        os.environ["TEXFLOW_DEBUG"] = previous_debug
+
+            _send(self.wfile, {"event": "done", "ok": ok})
+
+    return socketserver.ThreadingUnixStreamServer(str(path), Handler)
+
+
+def serve(path: Path = DAEMON_SOCKET) -> None:
+    """Sobe o daemon e atende builds até Ctrl+C."""
+    with make_server(path) as server:
+        print(f"🛰  Daemon do TexFlow {__version__} ouvindo em {path} (Ctrl+C para sair)", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\n👋 Daemon encerrado.", file=sys.stderr)
+        finally:
+            path.unlink(missing_ok=True)
+
+
+def request_build(data_path: str, template_folder: str, *, debug: bool = False, path: Path = DAEMON_SOCKET) -> int | None:
+    """Pede um build ao daemon e repassa a saída dele pro stderr local.
+
+    Devolve o exit code do build, ou None se não houver daemon disponível
+    (ou se ele recusar a requisição) — nesse caso o chamador faz o build
+    no próprio processo.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(path))
+    except OSError:
+        sock.close()
+        return None
+
+    request = {
+        "version": __version__,
+        "input": str(Path(data_path).resolve()),
+        "template": str(Path(template_folder).resolve()),
+        "debug": debug,
+    }
+
+    with sock, sock.makefile("rwb") as stream:
+        _send(stream, request)
+        for line in stream:
+            message = json.loads(line)
+            event = message.get("event")
+            if event == "log":
+                out = sys.stdout if message.get("stream") == "stdout" else sys.stderr
+                out.write(message["text"])
+                out.flush()
+            elif event == "done":
+                if message.get("error"):
+                    print(message["error"], file=sys.stderr)
+                return 0 if message.get("ok") else 1
+            elif event == "rejected":
+                return None
+
+    # Conexão caiu no meio do build (daemon morto): deixa o chamador refazer
+    # o build localmente.
+    return None
+
+
+def client_main(argv: list[str]) -> int | None:
+    """Caminho rápido de main.py: repassa `--build` ao daemon, se houver.
+
+    Só trata o caso exato `--build --input X [--template Y] [--debug]`;
+    qualquer outra combinação de flags devolve None e segue pra CLI
+    completa (scripts.cli), que faz o build no próprio processo.
+    """
+    if not DAEMON_SOCKET.exists():
+        return None
+
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("-b", "--build", action="store_true")
+    parser.add_argument("-i", "--input")
+    parser.add_argument("-t", "--template", default="journal")
+    parser.add_argument("--debug", action="store_true")
+    try:
+        args, unknown = parser.parse_known_args(argv)
+    except SystemExit:
+        return None
+
+    if unknown or not args.build or not args.input:
+        return None
+
+    return request_build(args.input, args.template, debug=args.debug)
@@ -0,0 +1,282 @@
+import json
+import os
+import sys
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+from scripts import citations, preamble
+
+# Engine usado quando nem --engine nem o texflow.toml do template escolhem um.
+DEFAULT_ENGINE = "latexmk-xelatex"
+
+# Tempo da última compilação com cada engine, em build/ (ver Engine.run).
+TIMINGS_FILE = ".texflow-engines.json"
+
+# Job do --draft: produtos em build/main-draft.*, sem tocar no main.pdf final.
+DRAFT_JOBNAME = "main-draft"
+
+# Código injetado antes do main.tex no --draft: o graphicx desenha só a
+# moldura de cada figura em vez de ler e embutir a imagem.
+DRAFT_PRETEX = r"\PassOptionsToPackage{draft}{graphicx}"
+
+# Passadas do engine direto, no máximo (o latexmk tem o mesmo teto:
+# $max_repeat = 5). Mais que isso é um documento que nunca estabiliza.
+MAX_PASSES = 5
+
+# Avisos do log que pedem mais uma passada (LaTeX, hyperref, biblatex...).
+RERUN_MARKERS = ("Rerun to get", "Please rerun LaTeX", "Label(s) may have changed")
+
+# Flags do latexmk que escolhem cada engine.
+LATEXMK_FLAGS = {"pdflatex": ["-pdf"], "xelatex": ["-xelatex", "-pdfxe"], "lualatex": ["-lualatex"]}
+
+
+def _env(build_dir: Path) -> dict:
+    env = os.environ.copy()
+    # 🔥 TEXINPUTS correto
+    env["TEXINPUTS"] = f"{build_dir}{os.pathsep}{env.get('TEXINPUTS','')}"
+    return env
+
+
+def _run(emoji: str, cmd: list[str], build_dir: Path, env: dict, jobname: str = "main") -> None:
+    # Import tardio: builder importa este módulo.
+    from scripts import builder
+
+    # 🔥 cwd dinâmico (adeus "build" hardcoded)
+    kwargs = {"log_file": build_dir / f"{jobname}.log"} if jobname != "main" else {}
+    builder.run_latex_command(emoji, cmd, cwd=str(build_dir), env=env, **kwargs)
+
+
+def _read(path: Path) -> bytes | None:
+    try:
+        return path.read_bytes()
+    except OSError:
+        return None
+
+
+def _needs_rerun(build_dir: Path, root: str, aux_before: bytes | None) -> bool:
+    """Se a última passada mudou o .aux (labels, sumário, citações) ou o log
+    pede outra: sem ela, \\ref e \\tableofcontents saem com "??" ou vazios."""
+    if _read(build_dir / f"{root}.aux") != aux_before:
+        return True
+    log = _read(build_dir / f"{root}.log") or b""
+    return any(marker.encode() in log for marker in RERUN_MARKERS)
+
+
+class Engine(ABC):
+    """Backend de compilação: transforma build/main.tex em build/main.pdf."""
+
+    name: str
+    tex: str
+
+    @abstractmethod
+    def commands(self) -> list[list[str]]:
+        """Comandos que o engine roda; também entram no digest do cache de PDFs."""
+
+    @abstractmethod
+    def _compile(self, build_dir: Path, env: dict, root: str = "main") -> None:
+        pass
+
+    @abstractmethod
+    def _compile_draft(self, build_dir: Path, env: dict, biber: bool) -> None:
+        pass
+
+    def run(self, build_dir: Path, *, draft: bool = False, root: str = "main") -> float:
+        """Compila e devolve o tempo gasto, registrado em build/ por engine.
+
+        Com `draft`, gera build/main-draft.pdf: figuras viram molduras, sem
+        SyncTeX, e o biber só roda se as chaves citadas ou os .bib mudaram.
+        `root` compila outro .tex de build/ (ex: o main-only.tex do --only).
+        """
+        label = self.name
+        if draft:
+            label += " (draft)"
+        elif root != "main":
+            label += f" ({root})"
+        env = _env(build_dir)
+        start = time.perf_counter()
+        ok = False
+        try:
+            if draft:
+                digest = citations.bibliography_digest(build_dir)
+                biber = citations.biber_needed(build_dir, digest, DRAFT_JOBNAME)
+                if not biber:
+                    print("📚 Bibliografia sem mudanças: reaproveitando o .bbl do rascunho.", file=sys.stderr)
+                self._compile_draft(build_dir, env, biber)
+                citations.remember_bibliography(build_dir, digest)
+            else:
+                self._compile(build_dir, env, root)
+            ok = True
+        finally:
+            elapsed = time.perf_counter() - start
+            record_timing(build_dir, label, elapsed, ok)
+        print(f"⏱️  {label}: {elapsed:.2f}s", file=sys.stderr)
+        return elapsed
+
+    def __repr__(self) -> str:
+        # Estável entre processos: entra na assinatura da tarefa de compile.
+        return f"Engine({self.name!r})"
+
+
+class LatexmkEngine(Engine):
+    """latexmk dirigindo pdflatex/xelatex/lualatex: decide sozinho quantas
+    passadas e se o biber precisa rodar."""
+
+    def __init__(self, tex: str):
+        self.tex = tex
+        self.name = f"latexmk-{tex}"
+
+    def command(self, *, draft: bool = False, biber: bool = True, root: str = "main") -> list[str]:
+        if draft:
+            return self._draft_command(biber)
+
+        cmd = [
+            "latexmk",
+            *LATEXMK_FLAGS[self.tex],
+            # -f: continua processando mesmo se um passo (ex: uma xelatex run)
+            # reportar erro, pra maximizar o que fica atualizado e pra sempre
+            # gerar main.log/main.pdf parciais que o LaTeX Workshop possa ler.
+            # NÃO é o mesmo que -g (que força rebuild completo ignorando
+            # timestamps) — -f não invalida o cache incremental do latexmk.
+            "-f",
+            "-interaction=nonstopmode", # Evita travar pedindo input
+            "-silent",                  # 🔥 Substitui o -quiet e silencia o log
+            "-synctex=1",
+            "-file-line-error"
+        ]
+
+        if os.getenv("TEXFLOW_DEBUG"):
+            cmd.append("-verbose")
+        else:
+            cmd.append("-quiet")
+
+        cmd.append(f"{root}.tex")
+        return cmd
+
+    def _draft_command(self, biber: bool) -> list[str]:
+        cmd = [
+            "latexmk",
+            *LATEXMK_FLAGS[self.tex],
+            "-f",
+            "-interaction=nonstopmode",
+            "-silent",
+            "-file-line-error",
+            f"-jobname={DRAFT_JOBNAME}",
+            f"-usepretex={DRAFT_PRETEX}",
+        ]
+        if not biber:
+            cmd.append("-bibtex-")  # usa o .bbl que já está em build/
+        cmd.append("-verbose" if os.getenv("TEXFLOW_DEBUG") else "-quiet")
+        cmd.append("main.tex")
+        return cmd
+
+    def commands(self) -> list[list[str]]:
+        return [self.command()]
+
+    def _compile(self, build_dir: Path, env: dict, root: str = "main") -> None:
+        cmd = self.command(root=root)
+        # O formato é o preâmbulo do main.tex: outra raiz (ex: main-only.tex,
+        # com \includeonly no preâmbulo) compila sem ele.
+        use_fmt = preamble.enabled() and root == "main"
+        fmt = preamble.ensure_format(build_dir, env, self.tex) if use_fmt else None
+        if fmt is None:
+            _run("⚡", cmd, build_dir, env, root)
+            return
+
+        # Com o preâmbulo pré-compilado, cada passada do engine carrega o
+        # formato em vez de reexecutar \usepackage por \usepackage.
+        try:
+            fmt_env = preamble.format_env(build_dir, env)
+            _run("⚡", preamble.with_format(cmd, fmt, self.tex), build_dir, fmt_env)
+        except RuntimeError:
+            # Sem o formato: se der certo, o culpado era ele e não é mais usado;
+            # se falhar de novo, o erro é do documento e é esse que sobe.
+            _run("⚡", cmd, build_dir, env)
+            preamble.mark_failed(build_dir, fmt)
+
+    def _compile_draft(self, build_dir: Path, env: dict, biber: bool) -> None:
+        # Sem o formato do preâmbulo: o graphicx dele teria sido carregado
+        # antes do DRAFT_PRETEX, sem a opção draft.
+        _run("✏️", self.command(draft=True, biber=biber), build_dir, env, DRAFT_JOBNAME)
+
+
+class DirectEngine(Engine):
+    """Engine chamado direto, sem latexmk: passada, biber e passadas até o .aux estabilizar.
+
+    Sem a análise de dependências do latexmk, mas também sem o custo dela:
+    em templates simples costuma ser o caminho mais rápido.
+    """
+
+    def __init__(self, tex: str):
+        self.tex = tex
+        self.name = tex
+
+    def _pass(self, root: str = "main") -> list[str]:
+        return [self.tex, "-interaction=nonstopmode", "-synctex=1", "-file-line-error", f"{root}.tex"]
+
+    def _draft_pass(self) -> list[str]:
+        return [
+            self.tex,
+            "-interaction=nonstopmode",
+            "-file-line-error",
+            f"-jobname={DRAFT_JOBNAME}",
+            f"{DRAFT_PRETEX}\\input{{main.tex}}",
+        ]
+
+    def commands(self) -> list[list[str]]:
+        return [self._pass(), ["biber", "main"], self._pass()]
+
+    def _compile(self, build_dir: Path, env: dict, root: str = "main") -> None:
+        # Como o latexmk, repete a passada até o .aux estabilizar: um build
+        # sem nada novo para resolver fica numa passada só.
+        aux = build_dir / f"{root}.aux"
+        before = _read(aux)
+        _run("🐢", self._pass(root), build_dir, env, root)
+        # Só o biblatex gera o .bcf: sem ele não há bibliografia pra processar.
+        rerun = (build_dir / f"{root}.bcf").exists()
+        if rerun:
+            _run("🚀", ["biber", root], build_dir, env, root)
+        passes = 1
+        while passes < MAX_PASSES and (rerun or _needs_rerun(build_dir, root, before)):
+            before = _read(aux)
+            _run("🐢", self._pass(root), build_dir, env, root)
+            passes, rerun = passes + 1, False
+
+    def _compile_draft(self, build_dir: Path, env: dict, biber: bool) -> None:
+        # Uma passada basta pra uma olhada rápida; a segunda só vem quando o
+        # biber gerou um .bbl novo que ainda não foi lido.
+        _run("✏️", self._draft_pass(), build_dir, env, DRAFT_JOBNAME)
+        if not biber or not (build_dir / f"{DRAFT_JOBNAME}.bcf").exists():
+            return
+        _run("🚀", ["biber", DRAFT_JOBNAME], build_dir, env)
+        _run("✏️", self._draft_pass(), build_dir, env, DRAFT_JOBNAME)
+
+
+ENGINES: dict[str, Engine] = {
+    engine.name: engine
+    for tex in ("pdflatex", "xelatex", "lualatex")
+    for engine in (LatexmkEngine(tex), DirectEngine(tex))
+}
+ENGINES["latexmk"] = ENGINES[DEFAULT_ENGINE]
+
+
+def get_engine(name: str | None = None) -> Engine:
+    name = name or DEFAULT_ENGINE
+    try:
+        return ENGINES[name]
+    except KeyError:
+        raise ValueError(f"Engine desconhecido: {name!r}. Opções: {', '.join(sorted(ENGINES))}") from None
+
+
+def record_timing(build_dir: Path, name: str, seconds: float, ok: bool) -> None:
+    """Anota o último tempo de cada engine, pra comparar engines no mesmo template."""
+    path = build_dir / TIMINGS_FILE
+    try:
+        timings = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        timings = {}
+    timings[name] = {"seconds": round(seconds, 3), "ok": ok, "at": int(time.time())}
+    try:
+        path.write_text(json.dumps(timings, indent=2), encoding="utf-8")
+    except OSError:
+        pass  # build/ somente leitura: o tempo já foi mostrado no terminal
@@ -0,0 +1,129 @@
+import re
+import sys
+from pathlib import Path
+
+# Job do --only: build/main-only.tex (+ .pdf/.log/.aux), e as seções dele em
+# build/main-only/NN.tex. O main.pdf completo não é tocado.
+JOBNAME = "main-only"
+PARTS_DIR = JOBNAME
+
+BEGIN_DOCUMENT = "\\begin{document}"
+END_DOCUMENT = "\\end{document}"
+
+_INCLUDE = re.compile(r"^[ \t]*\\include\s*\{([^}]+)\}", re.MULTILINE)
+_HEADING = re.compile(r"^[ \t]*\\(chapter|section)\*?\s*(?:\[[^\]]*\]\s*)?\{", re.MULTILINE)
+_LABEL = re.compile(r"\\label\s*\{([^}]+)\}")
+
+
+class Section:
+    """Um trecho do corpo do documento que vira um \\include próprio."""
+
+    def __init__(self, name: str, title: str, text: str):
+        self.name = name
+        self.title = title
+        self.text = text
+
+    def matches(self, selector: str) -> bool:
+        """Pelo número ("3"), por um \\label dele ou por parte do título."""
+        if selector.isdigit():
+            return int(selector) == int(self.name)
+        return selector in _LABEL.findall(self.text) or selector.casefold() in self.title.casefold()
+
+
+def _braced(text: str, start: int) -> str:
+    """Conteúdo de um {grupo} cuja chave de abertura fica antes de `start`."""
+    depth = 1
+    for i in range(start, len(text)):
+        if text[i] == "{":
+            depth += 1
+        elif text[i] == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:i]
+    return text[start:]
+
+
+def split_sections(body: str) -> tuple[str, list[Section]]:
+    """Divide o corpo em (trecho antes da 1ª seção, seções).
+
+    Corta nos \\chapter, se houver, senão nos \\section — só os que começam
+    uma linha, então um \\verb|\\section{}| no meio do texto não conta.
+    """
+    headings = list(_HEADING.finditer(body))
+    if any(m.group(1) == "chapter" for m in headings):
+        headings = [m for m in headings if m.group(1) == "chapter"]
+    if not headings:
+        return body, []
+
+    sections = []
+    for i, m in enumerate(headings):
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(body)
+        title = " ".join(_braced(body, m.end()).split())
+        sections.append(Section(f"{i + 1:02d}", title, body[m.start():end]))
+    return body[:headings[0].start()], sections
+
+
+def _write_if_changed(path: Path, text: str) -> None:
+    # Preserva o mtime do que não mudou (latexmk decide por mtime).
+    if path.exists() and path.read_text(encoding="utf-8") == text:
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def prepare(build_dir: Path, selector: str) -> list[str]:
+    """Escreve build/main-only.tex compilando só o que `selector` escolhe.
+
+    Se o main.tex renderizado já usa \\include, o seletor é o nome de um
+    desses arquivos e basta um \\includeonly. Senão o corpo é dividido por
+    seção em build/main-only/NN.tex, cada uma num \\include. Os .aux das
+    partes de fora (da última passada que as compilou) seguem valendo para
+    referências cruzadas e números de página.
+
+    Vários seletores podem vir separados por vírgula. Devolve os nomes
+    incluídos; RuntimeError se nada casar.
+    """
+    tex = (build_dir / "main.tex").read_text(encoding="utf-8")
+    begin = tex.find(BEGIN_DOCUMENT)
+    end = tex.rfind(END_DOCUMENT)
+    if begin == -1 or end == -1:
+        raise RuntimeError("--only: main.tex sem \\begin{document}/\\end{document}.")
+    selectors = [s.strip() for s in selector.split(",") if s.strip()]
+    head, body, tail = tex[:begin], tex[begin + len(BEGIN_DOCUMENT):end], tex[end:]
+
+    included = _INCLUDE.findall(body)
+    if included:
+        names = [n for n in included if any(s in (n, Path(n).name) for s in selectors)]
+        if not names:
+            raise RuntimeError(f"--only {selector}: nenhum \\include com esse nome. Opções: {', '.join(included)}")
+        _write_if_changed(build_dir / f"{JOBNAME}.tex", _with_includeonly(head, names) + BEGIN_DOCUMENT + body + tail)
+        return names
+
+    front, sections = split_sections(body)
+    chosen = [s for s in sections if any(s.matches(sel) for sel in selectors)]
+    if not chosen:
+        options = "; ".join(f"{s.name}: {s.title}" for s in sections) or "nenhuma seção encontrada"
+        raise RuntimeError(f"--only {selector}: nenhuma seção casou. Opções: {options}")
+
+    names = [f"{PARTS_DIR}/{s.name}" for s in chosen]
+    # Sem o .aux de alguma parte, as de fora não teriam números nem
+    # rótulos: a primeira passada inclui tudo e gera os .aux de todas.
+    missing = [s for s in sections if not (build_dir / PARTS_DIR / f"{s.name}.aux").exists()]
+    if missing:
+        print("🧩 Primeira compilação parcial: gerando o .aux de todas as seções.", file=sys.stderr)
+        names = [f"{PARTS_DIR}/{s.name}" for s in sections]
+    else:
+        print(f"🧩 Compilando só: {', '.join(f'{s.name} {s.title}' for s in chosen)}", file=sys.stderr)
+
+    for s in sections:
+        _write_if_changed(build_dir / PARTS_DIR / f"{s.name}.tex", s.text)
+    includes = "".join(f"\\include{{{PARTS_DIR}/{s.name}}}\n" for s in sections)
+    _write_if_changed(
+        build_dir / f"{JOBNAME}.tex",
+        _with_includeonly(head, names) + BEGIN_DOCUMENT + front + includes + tail,
+    )
+    return names
+
+
+def _with_includeonly(head: str, names: list[str]) -> str:
+    return head + f"\\includeonly{{{','.join(names)}}}\n"
@@ -0,0 +1,145 @@
+import functools
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+# Formatos pré-compilados, dentro de build/ (prefixo .texflow: fora do
+# digest do cache de PDFs e da cópia do template).
+FORMAT_DIR = ".texflow-fmt"
+
+# Arquivos que o preâmbulo costuma ler: mudar qualquer um deles invalida o
+# formato, mesmo que o texto do preâmbulo em main.tex seja o mesmo.
+PREAMBLE_SUFFIXES = {".sty", ".cls", ".def", ".cfg", ".clo", ".fd", ".ldf"}
+
+BEGIN_DOCUMENT = "\\begin{document}"
+
+
+def enabled() -> bool:
+    return bool(os.getenv("TEXFLOW_PREAMBLE_CACHE"))
+
+
+def static_preamble(tex: str) -> str | None:
+    """Trecho de main.tex que vai pro formato.
+
+    O mylatexformat despeja tudo até \\endofdump (se houver) ou até
+    \\begin{document}. Templates que carregam fontes do sistema (fontspec)
+    devem pôr um \\csname endofdump\\endcsname antes delas: o XeTeX não
+    consegue gravar fontes OpenType num formato, e o que vem depois do
+    marcador roda normalmente a cada passada.
+    """
+    end = tex.find(BEGIN_DOCUMENT)
+    if end == -1:
+        return None
+    preamble = tex[:end]
+    for marker in ("\\endofdump", "\\csname endofdump\\endcsname"):
+        cut = preamble.find(marker)
+        if cut != -1:
+            return preamble[:cut]
+    return preamble
+
+
+@functools.cache
+def engine_version(engine: str = "xelatex") -> str | None:
+    """Primeira linha de `<engine> --version`: formatos não valem entre versões."""
+    try:
+        result = subprocess.run([engine, "--version"], capture_output=True, text=True, check=False)
+    except OSError:
+        return None
+    lines = result.stdout.splitlines()
+    return lines[0].strip() if lines else None
+
+
+def format_key(build_dir: Path, preamble: str, version: str) -> str:
+    h = hashlib.blake2b(digest_size=8)
+    h.update(version.encode("utf-8") + b"\0" + preamble.encode("utf-8"))
+    for path in sorted(build_dir.rglob("*")):
+        rel = path.relative_to(build_dir)
+        if rel.parts[0].startswith(".texflow"):
+            continue
+        if path.suffix in PREAMBLE_SUFFIXES and path.is_file():
+            h.update(b"\0" + rel.as_posix().encode("utf-8") + b"\0" + path.read_bytes())
+    return h.hexdigest()
+
+
+def ensure_format(build_dir: Path, env: dict, engine: str = "xelatex") -> str | None:
+    """Garante o formato do preâmbulo atual; devolve o nome (para -fmt=).
+
+    O formato é gerado uma vez por combinação preâmbulo + arquivos .sty +
+    versão do engine. Devolve None quando não dá pra usar um formato
+    (engine ou mylatexformat ausentes, preâmbulo que não pode ser
+    despejado): o build segue sem ele.
+    """
+    tex_file = build_dir / "main.tex"
+    try:
+        preamble = static_preamble(tex_file.read_text(encoding="utf-8"))
+    except OSError:
+        return None
+    version = engine_version(engine)
+    if preamble is None or version is None:
+        return None
+
+    name = f"preamble-{format_key(build_dir, preamble, version)}"
+    fmt_dir = build_dir / FORMAT_DIR
+    if (fmt_dir / f"{name}.fmt").exists():
+        return name
+    if (fmt_dir / f"{name}.failed").exists():
+        return None  # já tentamos esse preâmbulo e não deu: não paga de novo
+
+    if shutil.which("kpsewhich") and not _kpsewhich("mylatexformat.ltx", env):
+        print("⚠️  mylatexformat não encontrado: seguindo sem preâmbulo pré-compilado.", file=sys.stderr)
+        return None
+
+    # Formatos antigos deste build não servem mais pra nada.
+    if fmt_dir.exists():
+        shutil.rmtree(fmt_dir, ignore_errors=True)
+    fmt_dir.mkdir(parents=True, exist_ok=True)
+
+    print("🧱 Pré-compilando o preâmbulo (mylatexformat)...", file=sys.stderr)
+    cmd = [
+        engine,
+        "-ini",
+        "-interaction=nonstopmode",
+        f"-jobname={name}",
+        f"-output-directory={fmt_dir}",
+        f"&{engine}",
+        "mylatexformat.ltx",
+        "main.tex",
+    ]
+    result = subprocess.run(cmd, cwd=build_dir, env=env, capture_output=True, text=True, errors="replace", check=False)
+    if result.returncode != 0 or not (fmt_dir / f"{name}.fmt").exists():
+        mark_failed(build_dir, name)
+        print("⚠️  Preâmbulo não pôde ser pré-compilado: seguindo sem ele.", file=sys.stderr)
+        return None
+    return name
+
+
+def mark_failed(build_dir: Path, name: str) -> None:
+    """Registra que compilar com este formato não funciona."""
+    fmt_dir = build_dir / FORMAT_DIR
+    fmt_dir.mkdir(parents=True, exist_ok=True)
+    (fmt_dir / f"{name}.fmt").unlink(missing_ok=True)
+    (fmt_dir / f"{name}.failed").touch()
+
+
+def format_env(build_dir: Path, env: dict) -> dict:
+    """Ambiente em que o engine encontra os formatos de build/.texflow-fmt."""
+    env = dict(env)
+    # O separador no fim mantém os caminhos padrão do kpathsea depois do nosso.
+    env["TEXFORMATS"] = f"{build_dir / FORMAT_DIR}{os.pathsep}{env.get('TEXFORMATS', '')}"
+    return env
+
+
+def with_format(cmd: list[str], name: str, engine: str = "xelatex") -> list[str]:
+    """Linha do latexmk que roda o engine carregando o formato `name`."""
+    return [*cmd[:-1], f"-{engine}={engine} %O -fmt={name} %S", cmd[-1]]
+
+
+def _kpsewhich(filename: str, env: dict) -> bool:
+    try:
+        result = subprocess.run(["kpsewhich", filename], capture_output=True, text=True, env=env, check=False)
+    except OSError:
+        return False
+    return bool(result.stdout.strip())
@@ -0,0 +1,84 @@
+import sys
+import time
+from pathlib import Path
+
+from classes.history import BuildHistory, is_regression, median
+from configs.paths import HISTORY_DB
+
+# Builds mostrados por template e janela da tendência.
+SHOWN_BUILDS = 15
+TREND_WINDOW = 10
+
+
+def _bytes(size: int | None) -> str:
+    if not size:
+        return "—"
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            break
+        size /= 1024
+    return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+
+
+def _trend(rows) -> str | None:
+    """Mediana dos TREND_WINDOW builds mais recentes contra a dos anteriores."""
+    seconds = [r["seconds"] for r in rows if r["ok"] and r["pdf_cache"] != "hit"]
+    recent, before = seconds[:TREND_WINDOW], seconds[TREND_WINDOW:2 * TREND_WINDOW]
+    if len(recent) < 3 or len(before) < 3:
+        return None
+    now, then = median(recent), median(before)
+    return f"mediana dos últimos {len(recent)}: {now:.2f}s · dos {len(before)} anteriores: {then:.2f}s ({now / then - 1:+.0%})"
+
+
+def template_report(history: BuildHistory, template: str) -> list[str]:
+    rows = history.builds(template)
+    lines = [f"📈 {template} · {len(rows)} build(s) no histórico"]
+    trend = _trend(rows)
+    if trend:
+        lines.append(f"   Tendência: {trend}")
+    lines.append(
+        f"   {'quando':<16} {'tempo':>8} {'vs mediana':>11}  {'engine':<16} {'perfil':<6} "
+        f"{'passadas':>8} {'págs':>5} {'cache':<5} {'copiado':>9}  template/payload"
+    )
+    for row in rows[:SHOWN_BUILDS]:
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(row["started"]))
+        baseline = history.baseline(row)
+        versus = f"{row['seconds'] / baseline - 1:+.0%}" if baseline else "—"
+        flag = ""
+        if not row["ok"]:
+            flag = "  ❌ falhou"
+        elif baseline is not None and is_regression(row["seconds"], baseline):
+            flag = "  🐢 regressão"
+        lines.append(
+            f"   {when:<16} {row['seconds']:7.2f}s {versus:>11}  {row['engine'] or '—':<16} {row['profile'] or '—':<6} "
+            f"{row['passes'] or 0:>8} {row['pages'] if row['pages'] is not None else '—':>5} "
+            f"{row['pdf_cache'] or '—':<5} {_bytes(row['bytes_copied']):>9}  "
+            f"{(row['template_digest'] or '')[:7]}/{(row['payload_digest'] or '')[:7]}{flag}"
+        )
+
+    last = rows[0] if rows else None
+    if last is not None:
+        slowest = [t for t in history.tasks(last["id"]) if t["seconds"] is not None and not t["skipped"]][:5]
+        if slowest:
+            lines.append("   Tarefas mais lentas no último build: " + ", ".join(
+                f"{t['key']} {t['seconds']:.2f}s" for t in slowest
+            ))
+    return lines
+
+
+def show_stats(template: str | None = None, db: Path = HISTORY_DB) -> None:
+    """Mostra o histórico de builds (--stats): de um template, ou de todos."""
+    history = BuildHistory(db)
+    if not history.path.exists():
+        rows = []
+    else:
+        with history.session():
+            rows = history.builds(template)
+            templates = list(dict.fromkeys(r["template"] for r in rows))
+            reports = [template_report(history, name) for name in templates]
+    if not rows:
+        where = f" de {template}" if template else ""
+        print(f"Nenhum build{where} no histórico ({db}).", file=sys.stderr)
+        return
+
+    print("\n\n".join("\n".join(lines) for lines in reports))
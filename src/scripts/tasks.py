@@ -30,6 +30,11 @@ def test() -> None:
     sys.exit(_run(["pytest"]))
 
 
+def bench() -> None:
+    # Argumentos repassados: `uv run bench render --repeat 3`, `uv run bench compare A B`.
+    sys.exit(_run([sys.executable, "benchmarks/run.py", *sys.argv[1:]]))
+
+
 def build_dist() -> None:
     sys.exit(_run(["uv", "build"]))
 
@@ -2,8 +2,11 @@ import os
 import re
 import sys
 import tempfile
+import tomllib
 from pathlib import Path
 
+from configs.paths import TEMPLATE_CONFIG
+
 
 def debug(msg):
     if os.getenv("TEXFLOW_DEBUG"):
@@ -30,6 +33,17 @@ def is_writable(path: Path) -> bool:
     except OSError:
         return False
 
+def load_template_config(template_path: Path) -> dict:
+    """Lê o texflow.toml do template; sem o arquivo, configuração vazia."""
+    path = Path(template_path) / TEMPLATE_CONFIG
+    try:
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    except FileNotFoundError:
+        return {}
+    except tomllib.TOMLDecodeError as e:
+        raise RuntimeError(f"{TEMPLATE_CONFIG} inválido em {template_path}: {e}") from e
+
 def parse_money(s: str) -> float:
     s = str(s).strip()
     s = re.sub(r"[^\d,.\-]", "", s)  # remove tudo que não é dígito, vírgula, ponto ou sinal
@@ -0,0 +1,126 @@
+import sys
+import time
+from pathlib import Path
+
+from classes.task import EXCLUDED_NAMES
+from scripts.builder import STAGES, BuildSession, build
+
+# Pastas que o próprio build escreve (ou que não interessam): mudanças nelas
+# não podem disparar um novo build, senão o watch entra em loop.
+IGNORED_DIRS = EXCLUDED_NAMES
+
+
+def _snapshot(template_path: Path, data_path: Path) -> dict[Path, tuple[int, int]]:
+    """Mapeia cada arquivo observado para (mtime_ns, tamanho)."""
+    files: dict[Path, tuple[int, int]] = {}
+
+    def visit(path: Path) -> None:
+        try:
+            stat = path.stat()
+        except OSError:
+            return  # removido entre o iterdir() e o stat()
+        files[path] = (stat.st_mtime_ns, stat.st_size)
+
+    stack = [template_path]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = list(directory.iterdir())
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.is_dir():
+                if entry.name not in IGNORED_DIRS:
+                    stack.append(entry)
+            else:
+                visit(entry)
+
+    visit(data_path)
+    return files
+
+
+def _changed(old: dict, new: dict) -> set[Path]:
+    return {p for p in old.keys() | new.keys() if old.get(p) != new.get(p)}
+
+
+def affected_stages(changed: set[Path], template_path: Path, data_path: Path) -> tuple[str, ...]:
+    """Decide quais etapas do pipeline precisam rodar de novo.
+
+    - JSON de input ou qualquer .tex do template → re-renderiza main.tex;
+    - demais arquivos do template (.sty, .bib, figuras...) → copy-files;
+    - o compile roda sempre que alguma etapa anterior rodou.
+
+    Os assets empacotados (images/plots) não mudam durante o watch, então
+    copy-assets só roda no build inicial.
+    """
+    stages = set()
+    for path in changed:
+        if path == data_path or path.suffix == ".tex":
+            stages.add("render")
+        # O input.json costuma morar na pasta do template e, nesse caso,
+        # também é copiado pra build/ junto com os arquivos de suporte.
+        if path.suffix != ".tex" and path.is_relative_to(template_path):
+            stages.add("copy-files")
+
+    if stages:
+        stages.add("compile")
+    return tuple(s for s in STAGES if s in stages)
+
+
+def watch(
+    data_path: str,
+    template_folder: str,
+    *,
+    interval: float = 0.3,
+    debounce: float = 0.2,
+    link_store: bool = False,
+    engine: str | None = None,
+    draft: bool = False,
+    prune_bib: bool | None = None,
+    only: str | None = None,
+) -> None:
+    """Mantém o processo vivo e recompila a cada mudança no template/input.
+
+    Evita pagar, a cada save, o startup do interpretador, os imports de
+    jinja2/prompt_toolkit, a criação do Environment e o parse do JSON: tudo
+    isso fica quente numa BuildSession. Rajadas de escrita (ex: "salvar
+    tudo" no editor) são agrupadas: só rebuilda depois que nada mudou
+    durante `debounce` segundos.
+    """
+    session = BuildSession(template_folder, link_store=link_store, engine=engine, draft=draft, prune_bib=prune_bib, only=only)
+    data = Path(data_path).resolve()
+    template_path = session.template_path
+
+    build(str(data), template_folder, session=session)
+    snapshot = _snapshot(template_path, data)
+    print(f"👀 Observando {template_path} e {data} (Ctrl+C para sair)", file=sys.stderr)
+
+    try:
+        while True:
+            time.sleep(interval)
+            current = _snapshot(template_path, data)
+            changed = _changed(snapshot, current)
+            if not changed:
+                continue
+
+            # Debounce: espera a rajada de escritas terminar.
+            while True:
+                time.sleep(debounce)
+                settled = _snapshot(template_path, data)
+                burst = _changed(current, settled)
+                if not burst:
+                    break
+                changed |= burst
+                current = settled
+
+            snapshot = current
+            stages = affected_stages(changed, template_path, data)
+            if not stages:
+                continue
+
+            names = ", ".join(sorted(p.name for p in changed))
+            print(f"🔁 Mudança detectada ({names}): {' → '.join(stages)}", file=sys.stderr)
+            build(str(data), template_folder, session=session, stages=stages)
+
+    except KeyboardInterrupt:
+        print("\n👋 Watch encerrado.", file=sys.stderr)
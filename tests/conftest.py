@@ -0,0 +1,11 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_user_cache(tmp_path_factory, monkeypatch):
+    """Nenhum teste escreve no ~/.cache/texflow de verdade."""
+    from scripts import builder
+
+    monkeypatch.setattr(builder, "PDF_CACHE_DIR", tmp_path_factory.mktemp("pdf-cache"))
+    monkeypatch.setattr(builder, "OBJECTS_DIR", tmp_path_factory.mktemp("objects"))
+    monkeypatch.setattr(builder, "HISTORY_DB", tmp_path_factory.mktemp("history") / "history.sqlite3")
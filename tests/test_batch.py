@@ -0,0 +1,196 @@
+import json
+
+import pytest
+
+from scripts import builder
+from scripts.batch import BATCH_DIR, iter_payloads, run_batch
+
+
+@pytest.fixture
+def template_dir(tmp_path, monkeypatch):
+    def fake_compile(build_dir, engine=None):
+        text = (build_dir / "main.tex").read_text(encoding="utf-8")
+        if "FALHA" in text:
+            raise RuntimeError("Falha na Compilação LaTeX (Código 12)\ndetalhes")
+        (build_dir / "main.pdf").write_text(text, encoding="utf-8")
+
+    monkeypatch.setattr(builder, "compile_document", fake_compile)
+    template = tmp_path / "tpl"
+    template.mkdir()
+    (template / "main.tex").write_text("Cliente: << cliente >>", encoding="utf-8")
+    (template / "style.sty").write_text("estilo", encoding="utf-8")
+    return template
+
+
+def _report(template_dir):
+    return json.loads((template_dir / BATCH_DIR / "report.json").read_text(encoding="utf-8"))
+
+
+def _documents(template_dir):
+    lines = (template_dir / BATCH_DIR / "report.jsonl").read_text(encoding="utf-8").splitlines()
+    return [json.loads(line) for line in lines]
+
+
+def test_batch_from_json_array(tmp_path, template_dir):
+    source = tmp_path / "lote.json"
+    source.write_text(json.dumps([
+        {"name": "acme", "payload": {"cliente": "ACME"}},
+        {"payload": {"cliente": "Globex"}},
+    ]), encoding="utf-8")
+
+    assert run_batch(str(source), str(template_dir), jobs=2) is True
+
+    out = template_dir / BATCH_DIR
+    assert (out / "acme" / "main.pdf").read_text(encoding="utf-8") == "Cliente: ACME"
+    assert (out / "2" / "main.pdf").read_text(encoding="utf-8") == "Cliente: Globex"
+    assert (out / "acme" / "style.sty").exists()
+    assert _report(template_dir)["ok"] == 2
+
+
+def test_batch_reports_invalid_and_failed_documents(tmp_path, template_dir):
+    source = tmp_path / "lote.json"
+    source.write_text(json.dumps([
+        {"name": "bom", "payload": {"cliente": "ACME"}},
+        {"name": "sem-payload"},
+        {"name": "quebrado", "payload": {"cliente": "FALHA"}},
+    ]), encoding="utf-8")
+
+    assert run_batch(str(source), str(template_dir), jobs=2) is False
+
+    statuses = {d["name"]: d["status"] for d in _documents(template_dir)}
+    assert statuses == {"bom": "ok", "sem-payload": "invalid", "quebrado": "failed"}
+    report = _report(template_dir)
+    assert (report["total"], report["ok"], report["invalid"], report["failed"]) == (3, 1, 1, 1)
+    assert {p["name"] for p in report["problems"]} == {"sem-payload", "quebrado"}
+
+
+def test_iter_payloads_from_directory(tmp_path):
+    (tmp_path / "b.json").write_text(json.dumps({"payload": {}}), encoding="utf-8")
+    (tmp_path / "a.json").write_text("não é json", encoding="utf-8")
+
+    items = list(iter_payloads(tmp_path))
+
+    assert [name for name, _ in items] == ["a", "b"]
+    assert isinstance(items[0][1], ValueError)
+
+
+def test_iter_payloads_rejects_non_array_file(tmp_path):
+    source = tmp_path / "lote.json"
+    source.write_text(json.dumps({"payload": {}}), encoding="utf-8")
+
+    with pytest.raises(TypeError):
+        list(iter_payloads(source))
+
+
+def test_batch_names_are_unique_and_filesystem_safe(tmp_path, template_dir):
+    source = tmp_path / "lote.json"
+    source.write_text(json.dumps([
+        {"name": "a/b", "payload": {"cliente": "1"}},
+        {"name": "a/b", "payload": {"cliente": "2"}},
+    ]), encoding="utf-8")
+
+    run_batch(str(source), str(template_dir), jobs=1)
+    assert [d["name"] for d in _documents(template_dir)] == ["a_b", "a_b-2"]
+
+    # Um novo lote reaproveita os build dirs do anterior, sem virar a_b-3.
+    run_batch(str(source), str(template_dir), jobs=1)
+    assert [d["name"] for d in _documents(template_dir)] == ["a_b", "a_b-2"]
+    assert (template_dir / BATCH_DIR / "a_b-2" / "main.pdf").read_text(encoding="utf-8") == "Cliente: 2"
+
+
+def test_batch_report_keeps_only_the_first_problems(tmp_path, template_dir, monkeypatch):
+    from scripts import batch
+
+    monkeypatch.setattr(batch, "REPORT_PROBLEMS", 2)
+    source = tmp_path / "lote.jsonl"
+    source.write_text("{quebrado\n" * 5 + json.dumps({"payload": {"cliente": "ACME"}}) + "\n", encoding="utf-8")
+
+    assert run_batch(str(source), str(template_dir), jobs=1) is False
+
+    report = _report(template_dir)
+    assert (report["total"], report["ok"], report["invalid"]) == (6, 1, 5)
+    assert [p["name"] for p in report["problems"]] == ["linha-1", "linha-2"]
+    assert report["problems_omitted"] == 3
+    assert len(_documents(template_dir)) == 6
+    # Linhas ilegíveis não reservam build dir.
+    assert not (template_dir / BATCH_DIR / "linha-1").exists()
+
+
+def test_batch_streams_jsonl_and_reports_bad_lines(tmp_path, template_dir):
+    source = tmp_path / "lote.jsonl"
+    source.write_text(
+        json.dumps({"name": "acme", "payload": {"cliente": "ACME"}}) + "\n"
+        + "{quebrado\n"
+        + "\n"
+        + json.dumps({"payload": {"cliente": "Globex"}}) + "\n"
+        + json.dumps({"payload": []}) + "\n",
+        encoding="utf-8",
+    )
+
+    assert run_batch(str(source), str(template_dir), jobs=2) is False
+
+    docs = {d["name"]: d for d in _documents(template_dir)}
+    assert docs["acme"]["status"] == "ok"
+    assert docs["linha-4"]["status"] == "ok"
+    assert docs["linha-2"]["status"] == "invalid"
+    assert "linha 2" in docs["linha-2"]["error"]
+    assert docs["linha-5"]["status"] == "invalid"
+
+
+def test_batch_applies_back_pressure_to_the_source(tmp_path, template_dir, monkeypatch):
+    import threading
+    import time
+
+    from scripts import batch
+
+    release = threading.Event()
+    pulled = []
+
+    def stuck_compile(build_dir, engine=None):
+        release.wait(timeout=5)
+
+    def endless_source(_source):
+        for i in range(50):
+            pulled.append(i)
+            yield str(i), {"payload": {"cliente": str(i)}}
+
+    monkeypatch.setattr(builder, "compile_document", stuck_compile)
+    monkeypatch.setattr(batch, "iter_payloads", endless_source)
+
+    worker = threading.Thread(target=run_batch, args=("lote", str(template_dir)), kwargs={"jobs": 2, "use_cache": False})
+    worker.start()
+    try:
+        # Com os compiles travados, a leitura para em 2×jobs (+1 já lido).
+        time.sleep(0.3)
+        assert len(pulled) <= 2 * 2 + 1
+    finally:
+        release.set()
+        worker.join()
+
+    assert _report(template_dir)["total"] == 50
+
+
+def test_batch_documents_named_like_the_reports_do_not_clobber_them(tmp_path, template_dir):
+    source = tmp_path / "lote.json"
+    source.write_text(json.dumps([
+        {"name": "report.json", "payload": {"cliente": "1"}},
+        {"name": "report.jsonl", "payload": {"cliente": "2"}},
+    ]), encoding="utf-8")
+
+    # Duas vezes: na segunda, os relatórios do primeiro lote já existem.
+    assert run_batch(str(source), str(template_dir), jobs=1) is True
+    assert run_batch(str(source), str(template_dir), jobs=1) is True
+
+    assert [d["name"] for d in _documents(template_dir)] == ["report.json-2", "report.jsonl-2"]
+    assert _report(template_dir)["ok"] == 2
+    assert (template_dir / BATCH_DIR / "report.json-2" / "main.pdf").read_text(encoding="utf-8") == "Cliente: 1"
+
+
+def test_batch_skips_names_taken_by_stray_files(tmp_path, template_dir):
+    (template_dir / BATCH_DIR).mkdir()
+    (template_dir / BATCH_DIR / "notas.txt").write_text("não é um build dir", encoding="utf-8")
+    source = tmp_path / "lote.json"
+    source.write_text(json.dumps([{"name": "notas.txt", "payload": {"cliente": "1"}}]), encoding="utf-8")
+
+    assert run_batch(str(source), str(template_dir), jobs=1) is True
+    assert [d["name"] for d in _documents(template_dir)] == ["notas.txt-2"]
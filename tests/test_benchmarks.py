@@ -0,0 +1,48 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+RUN = Path(__file__).resolve().parent.parent / "benchmarks" / "run.py"
+
+
+def _bench(*args):
+    return subprocess.run([sys.executable, str(RUN), *args], capture_output=True, text=True, check=True)
+
+
+def test_benchmarks_run_at_tiny_scale_and_compare(tmp_path):
+    # Escala mínima: só garante que as cargas e o relatório continuam de pé.
+    first, second = tmp_path / "a.json", tmp_path / "b.json"
+    _bench("--scale", "0.001", "--repeat", "1", "-o", str(first))
+    _bench("runner", "--scale", "0.001", "--repeat", "1", "-o", str(second))
+
+    report = json.loads(first.read_text())
+    assert {"render/loop-cold", "copy/symlink-unchanged", "log/summarize-failing", "data/load-from-file"} <= set(
+        report["results"]
+    )
+    assert not any(name.startswith("compile/") for name in report["results"])
+    assert all(r["median"] > 0 for r in report["results"].values())
+
+    out = _bench("compare", str(first), str(second)).stdout
+    assert "runner/chain" in out and "render/loop-cold" in out
+
+
+def test_compile_benchmark_keeps_caches_and_history_in_its_workdir(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(RUN.parent))
+    import workloads
+
+    from scripts import builder
+
+    def fake_compile(build_dir, engine=None):
+        (build_dir / "main.pdf").write_text("pdf")
+
+    monkeypatch.setattr(builder, "compile_document", fake_compile)
+    user_paths = (builder.PDF_CACHE_DIR, builder.OBJECTS_DIR, builder.HISTORY_DB)
+
+    unchanged = {b.name: b for b in workloads.compile_journal(tmp_path, 1)}["compile/journal-unchanged"]
+    unchanged.run()
+
+    assert (tmp_path / "cache" / "history.sqlite3").exists()
+    assert any((tmp_path / "cache" / "pdf-cache").iterdir())
+    assert (builder.PDF_CACHE_DIR, builder.OBJECTS_DIR, builder.HISTORY_DB) == user_paths
+    assert not user_paths[2].exists()
@@ -0,0 +1,48 @@
+from classes.bibliography import parse_bib, prune_bib
+from scripts import citations
+
+BIB = """% Encoding: UTF-8
+@string{jnl = {The Journal}}
+
+@article{filho,
+  title   = {Capítulo {com {chaves}} aninhadas},
+  crossref = {pai},
+  journal = jnl,
+}
+
+@book(pai,
+  title = {Livro (segunda edição)},
+  xdata = {editora},
+)
+
+@xdata{editora, publisher = {Editora}}
+@comment{lixo}
+@misc{solta, note = "x"}
+"""
+
+
+def test_parse_bib_finds_entry_boundaries():
+    entries = parse_bib(BIB)
+    assert [(e.kind, e.key) for e in entries] == [
+        ("string", None), ("article", "filho"), ("book", "pai"), ("xdata", "editora"), ("misc", "solta"),
+    ]
+    assert entries[2].text.endswith("xdata = {editora},\n)")  # ")" dentro de {} não fecha
+
+
+def test_prune_keeps_cited_entries_parents_and_strings():
+    pruned, kept, total = prune_bib(BIB, {"filho", "inexistente"})
+
+    assert (kept, total) == (3, 4)
+    assert [e.key for e in parse_bib(pruned)] == [None, "filho", "pai", "editora"]
+
+
+def test_nocite_star_keeps_everything():
+    assert prune_bib(BIB, {"*"})[0] == BIB
+
+
+def test_used_keys_reads_aux_and_bcf(tmp_path):
+    (tmp_path / "main.tex").write_text("\\cite{a}")
+    (tmp_path / "main.aux").write_text("\\citation{b,c}\n\\abx@aux@cite{0}{d}\n")
+    (tmp_path / "main.bcf").write_text('<bcf:citekey order="1">e</bcf:citekey>')
+
+    assert citations.used_keys(tmp_path) == {"a", "b", "c", "d", "e"}
@@ -3,10 +3,12 @@ import json
 import shutil
 import subprocess
 import sys
+import time
 
 import pytest
 
-from scripts.builder import summarize_latex_log
+from scripts import builder
+from scripts.builder import BuildSession, summarize_latex_log
 
 _HAS_LATEX = shutil.which("latexmk") is not None and shutil.which("xelatex") is not None
 
@@ -143,3 +145,233 @@ def test_output_written_success_message():
 def test_stderr_is_included_in_analysis():
     result = summarize_latex_log("", stderr="! Emergency stop.\n")
     assert "Emergency stop." in result
+
+
+def test_build_session_reuses_payload_until_input_changes(tmp_path):
+    (tmp_path / "main.tex").write_text("<< author >>", encoding="utf-8")
+    data_path = tmp_path / "input.json"
+    data_path.write_text(json.dumps({"payload": {"author": "A"}}), encoding="utf-8")
+
+    session = BuildSession(str(tmp_path))
+    first = session.context(data_path)
+    assert session.context(data_path) is first
+
+    data_path.write_text(json.dumps({"payload": {"author": "Outro autor"}}), encoding="utf-8")
+    assert session.context(data_path) == {"author": "Outro autor"}
+
+
+def test_build_session_runs_only_selected_stages(tmp_path):
+    (tmp_path / "main.tex").write_text("Olá, << author >>!", encoding="utf-8")
+    (tmp_path / "style.sty").write_text("estilo", encoding="utf-8")
+    data_path = tmp_path / "input.json"
+    data_path.write_text(json.dumps({"payload": {"author": "Mundo"}}), encoding="utf-8")
+
+    BuildSession(str(tmp_path)).run(data_path, stages=("render",))
+
+    build_dir = tmp_path / "build"
+    assert (build_dir / "main.tex").read_text(encoding="utf-8") == "Olá, Mundo!"
+    assert not (build_dir / "style.sty").exists()
+
+
+def test_build_session_renders_every_tex_file(tmp_path):
+    (tmp_path / "main.tex").write_text("\\input{capitulos/um}", encoding="utf-8")
+    (tmp_path / "capitulos").mkdir()
+    (tmp_path / "capitulos" / "um.tex").write_text("Autor: << author >>", encoding="utf-8")
+    (tmp_path / "abstract.tex").write_text("Resumo de << author >>", encoding="utf-8")
+    data_path = tmp_path / "input.json"
+    data_path.write_text(json.dumps({"payload": {"author": "Mundo"}}), encoding="utf-8")
+
+    session = BuildSession(str(tmp_path))
+    session.run(data_path, stages=("render", "copy-files"))
+
+    build_dir = tmp_path / "build"
+    assert (build_dir / "capitulos" / "um.tex").read_text(encoding="utf-8") == "Autor: Mundo"
+    assert (build_dir / "abstract.tex").read_text(encoding="utf-8") == "Resumo de Mundo"
+    renders = [t for t in session.tasks({}, ("render",)) if isinstance(t, builder.RenderTemplate)]
+    assert len(renders) == 3 and all(t.mode == "thread" for t in renders)
+
+
+def test_build_session_skips_compile_when_nothing_changed(tmp_path, monkeypatch):
+    compiled = []
+
+    def fake_compile(build_dir, engine=None):
+        compiled.append(build_dir)
+        (build_dir / "main.pdf").write_text("pdf")
+
+    monkeypatch.setattr(builder, "compile_document", fake_compile)
+    (tmp_path / "main.tex").write_text("Olá, << author >>!", encoding="utf-8")
+    data_path = tmp_path / "input.json"
+    data_path.write_text(json.dumps({"payload": {"author": "Mundo"}}), encoding="utf-8")
+
+    # Sem o cache de PDFs: quem pula o compile aqui é o runner, não um hit.
+    BuildSession(str(tmp_path), use_cache=False).run(data_path)
+    BuildSession(str(tmp_path), use_cache=False).run(data_path)
+    BuildSession(str(tmp_path), use_cache=False).run(data_path)
+    assert len(compiled) == 1
+
+    data_path.write_text(json.dumps({"payload": {"author": "Outro"}}), encoding="utf-8")
+    BuildSession(str(tmp_path), use_cache=False).run(data_path)
+    assert len(compiled) == 2
+
+
+def test_build_session_restores_copied_file_deleted_from_build_dir(tmp_path, monkeypatch):
+    compiled = []
+
+    def fake_compile(build_dir, engine=None):
+        compiled.append((build_dir / "style.sty").read_text(encoding="utf-8"))
+        (build_dir / "main.pdf").write_text("pdf")
+
+    monkeypatch.setattr(builder, "compile_document", fake_compile)
+    template = tmp_path / "template"
+    template.mkdir()
+    (template / "main.tex").write_text("Olá, << author >>!", encoding="utf-8")
+    (template / "style.sty").write_text("estilo", encoding="utf-8")
+    # Fora do template: só o payload muda, a origem da cópia fica igual.
+    data_path = tmp_path / "input.json"
+    data_path.write_text(json.dumps({"payload": {"author": "Mundo"}}), encoding="utf-8")
+
+    BuildSession(str(template)).run(data_path)
+    (template / "build" / "style.sty").unlink()
+    data_path.write_text(json.dumps({"payload": {"author": "Outro"}}), encoding="utf-8")
+    BuildSession(str(template)).run(data_path)
+
+    assert compiled == ["estilo", "estilo"]
+
+
+def test_prune_bib_writes_only_cited_entries_and_reruns_on_new_citations(tmp_path, monkeypatch):
+    compiled = []
+
+    def fake_compile(build_dir, engine=None):
+        compiled.append((build_dir / "refs.bib").read_text(encoding="utf-8"))
+        (build_dir / "main.pdf").write_text("pdf")
+
+    monkeypatch.setattr(builder, "compile_document", fake_compile)
+    (tmp_path / "texflow.toml").write_text("prune_bibliography = true\n")
+    (tmp_path / "main.tex").write_text("\\cite{<< chave >>}", encoding="utf-8")
+    (tmp_path / "refs.bib").write_text("@book{a, title={A}}\n@book{b, title={B}}\n", encoding="utf-8")
+    data_path = tmp_path / "input.json"
+    data_path.write_text(json.dumps({"payload": {"chave": "a"}}), encoding="utf-8")
+
+    BuildSession(str(tmp_path)).run(data_path)
+    BuildSession(str(tmp_path)).run(data_path)
+    data_path.write_text(json.dumps({"payload": {"chave": "b"}}), encoding="utf-8")
+    BuildSession(str(tmp_path)).run(data_path)
+
+    assert compiled == ["@book{a, title={A}}\n", "@book{b, title={B}}\n"]
+
+
+def test_cached_build_process_restores_previous_pdf(tmp_path, monkeypatch):
+    compiled = []
+
+    def fake_compile(build_dir, engine=None):
+        compiled.append(build_dir)
+        (build_dir / "main.pdf").write_text((build_dir / "main.tex").read_text())
+
+    monkeypatch.setattr(builder, "compile_document", fake_compile)
+    build_dir = tmp_path / "build"
+    build_dir.mkdir()
+    cache = builder.PdfCache(tmp_path / "cache")
+
+    (build_dir / "main.tex").write_text("versão A")
+    builder.cached_build_process(build_dir, cache)
+    (build_dir / "main.tex").write_text("versão B")
+    builder.cached_build_process(build_dir, cache)
+    (build_dir / "main.tex").write_text("versão A")
+    builder.cached_build_process(build_dir, cache)
+
+    assert len(compiled) == 2
+    assert (build_dir / "main.pdf").read_text() == "versão A"
+
+
+def test_jinja_env_persists_compiled_templates(tmp_path):
+    (tmp_path / "main.tex").write_text("Olá, << author >>!", encoding="utf-8")
+
+    builder._jinja_env(str(tmp_path)).get_template("main.tex")
+
+    cache_dir = builder._bytecode_cache_dir(tmp_path.resolve())
+    assert list(cache_dir.glob("*.cache"))
+
+
+def test_precompile_templates_skips_build_dir(tmp_path):
+    (tmp_path / "main.tex").write_text("<< a >>", encoding="utf-8")
+    (tmp_path / "chapters").mkdir()
+    (tmp_path / "chapters" / "intro.tex").write_text("<< b >>", encoding="utf-8")
+    (tmp_path / "build").mkdir()
+    (tmp_path / "build" / "main.tex").write_text("renderizado", encoding="utf-8")
+
+    names = builder.precompile_templates(str(tmp_path))
+
+    assert sorted(names) == ["chapters/intro.tex", "main.tex"]
+    assert len(list(builder._bytecode_cache_dir(tmp_path.resolve()).glob("*.cache"))) == 2
+
+
+def test_build_session_renders_blocks_incrementally(tmp_path):
+    (tmp_path / "main.tex").write_text(
+        "<<% block title %>><< title >><<% endblock %>>|<<% block body %>><< body >><<% endblock %>>",
+        encoding="utf-8",
+    )
+    data_path = tmp_path / "input.json"
+    data_path.write_text(json.dumps({"payload": {"title": "T", "body": "B"}}), encoding="utf-8")
+
+    BuildSession(str(tmp_path)).run(data_path, stages=("render",))
+
+    build_dir = tmp_path / "build"
+    assert (build_dir / "main.tex").read_text(encoding="utf-8") == "T|B"
+    fragments = json.loads((build_dir / builder.FRAGMENTS_FILE).read_text(encoding="utf-8"))
+    blocks = next(iter(fragments.values()))["blocks"]
+    assert blocks["body"]["keys"] == ["body"]
+
+
+# Engine falso: escreve main.log aos poucos, como o xelatex, e imprime no stdout.
+FAKE_ENGINE = """
+import sys, time
+with open("main.log", "w") as log:
+    log.write("This is XeTeX, Version 3.14\\n[1] [2]\\n")
+    log.flush()
+    print("Latexmk: saída do processo", flush=True)
+    time.sleep(0.6)
+    log.write(sys.argv[1] + "\\n")
+    log.flush()
+    time.sleep(float(sys.argv[2]))
+sys.exit(1)
+"""
+
+
+def _fake_engine(tmp_path, log_line, sleep):
+    (tmp_path / "main.tex").write_text("sem placeholders", encoding="utf-8")
+    return [sys.executable, "-c", FAKE_ENGINE, log_line, str(sleep), "main.tex"]
+
+
+def test_run_latex_command_spools_output_and_summarizes_engine_log(tmp_path):
+    cmd = _fake_engine(tmp_path, "! Undefined control sequence.", 0)
+
+    with pytest.raises(RuntimeError) as excinfo:
+        builder.run_latex_command("⚡", cmd, cwd=str(tmp_path), fail_fast=False)
+
+    message = str(excinfo.value)
+    assert "Código 1" in message
+    assert "Undefined control sequence." in message  # veio do main.log
+    spooled = tmp_path / builder.LATEX_OUTPUT_FILE
+    assert "Latexmk: saída do processo" in spooled.read_text(encoding="utf-8")
+
+
+def test_run_latex_command_reports_pass_and_page_progress(tmp_path, monkeypatch):
+    updates = []
+    monkeypatch.setattr(builder, "progress", updates.append)
+    cmd = _fake_engine(tmp_path, "[3]", 0)
+
+    with pytest.raises(RuntimeError):
+        builder.run_latex_command("⚡", cmd, cwd=str(tmp_path), fail_fast=False)
+
+    assert "passada 1 · página 2" in updates
+    assert updates[-1] == "passada 1 · página 3"
+
+
+def test_run_latex_command_fail_fast_kills_on_fatal_error(tmp_path):
+    cmd = _fake_engine(tmp_path, "! Emergency stop.", 30)
+
+    start = time.monotonic()
+    with pytest.raises(RuntimeError, match="fail-fast"):
+        builder.run_latex_command("⚡", cmd, cwd=str(tmp_path), fail_fast=True)
+
+    assert time.monotonic() - start < 10
@@ -0,0 +1,29 @@
+from scripts import citations
+
+
+def test_cite_keys_handles_variants_options_and_comments():
+    tex = (
+        "\\cite{a, b} \\parencite[p.~3]{c} \\textcite*[veja][]{d}\n"
+        "\\nocite{e} % \\cite{comentada}\n"
+        "50\\% \\autocite{f}\n"
+    )
+    assert citations.cite_keys(tex) == {"a", "b", "c", "d", "e", "f"}
+
+
+def test_biber_needed_only_when_keys_or_bib_change(tmp_path):
+    (tmp_path / "main.tex").write_text("\\cite{a}")
+    (tmp_path / "refs.bib").write_text("@book{a,}")
+    digest = citations.bibliography_digest(tmp_path)
+
+    assert citations.biber_needed(tmp_path, digest, "main-draft")  # sem .bbl
+    (tmp_path / "main-draft.bbl").write_text("")
+    citations.remember_bibliography(tmp_path, digest)
+    assert not citations.biber_needed(tmp_path, digest, "main-draft")
+
+    (tmp_path / "main.tex").write_text("\\cite{a} texto novo")
+    assert citations.bibliography_digest(tmp_path) == digest
+    (tmp_path / "main.tex").write_text("\\cite{a,b}")
+    assert citations.bibliography_digest(tmp_path) != digest
+    (tmp_path / "main.tex").write_text("\\cite{a}")
+    (tmp_path / "refs.bib").write_text("@book{a, title={Outro}}")
+    assert citations.bibliography_digest(tmp_path) != digest
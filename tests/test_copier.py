@@ -0,0 +1,175 @@
+import errno
+import os
+import threading
+import zipfile
+
+import pytest
+
+from classes import copier, object_store
+from classes.copier import copy_files, fast_copy
+from classes.object_store import ObjectStore
+from classes.task import CopyTree
+
+
+def test_fast_copy_copies_content_and_metadata(tmp_path):
+    src = tmp_path / "font.otf"
+    src.write_bytes(os.urandom(300_000))
+    os.utime(src, ns=(1_000_000_000, 1_000_000_000))
+    dst = tmp_path / "copy.otf"
+
+    fast_copy(src, dst)
+
+    assert dst.read_bytes() == src.read_bytes()
+    assert dst.stat().st_mtime_ns == src.stat().st_mtime_ns
+
+
+def test_fast_copy_falls_back_to_userspace_copy(tmp_path, monkeypatch):
+    src = tmp_path / "a.bin"
+    src.write_bytes(b"x" * 5000)
+    dst = tmp_path / "b.bin"
+
+    def unsupported(*args, **kwargs):
+        raise OSError("sem suporte")
+
+    monkeypatch.setattr(copier, "_reflink", lambda fsrc, fdst: False)
+    monkeypatch.setattr(copier.os, "copy_file_range", unsupported, raising=False)
+    monkeypatch.setattr(copier.os, "sendfile", unsupported, raising=False)
+
+    fast_copy(src, dst)
+
+    assert dst.read_bytes() == src.read_bytes()
+
+
+def test_fast_copy_replaces_symlink_instead_of_writing_through_it(tmp_path):
+    original = tmp_path / "asset.png"
+    original.write_text("original")
+    src = tmp_path / "new.png"
+    src.write_text("novo")
+    dst = tmp_path / "dst.png"
+    dst.symlink_to(original)
+
+    fast_copy(src, dst)
+
+    assert not dst.is_symlink()
+    assert dst.read_text() == "novo"
+    assert original.read_text() == "original"
+
+
+def test_copy_files_runs_copies_in_parallel_and_counts_bytes(tmp_path):
+    pairs = []
+    for i in range(8):
+        src = tmp_path / f"src{i}.txt"
+        src.write_text("a" * 10)
+        pairs.append((src, tmp_path / f"dst{i}.txt"))
+    threads = set()
+
+    def copy(src, dst):
+        threads.add(threading.current_thread().name)
+        fast_copy(src, dst)
+
+    stats = copy_files(pairs, copy, jobs=4)
+
+    assert (stats.files, stats.bytes, stats.skipped) == (8, 80, 0)
+    assert all(name.startswith("texflow-copy") for name in threads)
+
+
+def test_copy_files_propagates_errors(tmp_path):
+    pairs = [(tmp_path / f"missing{i}", tmp_path / f"dst{i}") for i in range(3)]
+
+    with pytest.raises(FileNotFoundError):
+        copy_files(pairs, fast_copy, jobs=2)
+
+
+def test_copy_tree_reports_copied_and_skipped_files(tmp_path):
+    src_dir = tmp_path / "src"
+    (src_dir / "figs" / "deep").mkdir(parents=True)
+    (src_dir / "style.sty").write_text("sty")
+    (src_dir / "figs" / "deep" / "plot.pdf").write_text("pdf!")
+    dst_dir = tmp_path / "dst"
+
+    first = CopyTree(src=src_dir, dst=dst_dir)
+    first.run()
+    second = CopyTree(src=src_dir, dst=dst_dir)
+    second.run()
+
+    assert (first.stats.files, first.stats.bytes) == (2, 7)
+    assert (second.stats.files, second.stats.skipped) == (0, 2)
+    assert (dst_dir / "figs" / "deep" / "plot.pdf").read_text() == "pdf!"
+
+
+def test_copy_tree_copies_nested_traversable_directories(tmp_path):
+    # zipfile.Path é um Traversable que não é Path (recurso dentro de um zip).
+    archive = tmp_path / "assets.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("images/logo.png", "logo")
+        zf.writestr("images/icons/a.png", "a")
+    dst = tmp_path / "dst"
+
+    task = CopyTree(src=zipfile.Path(archive, "images/"), dst=dst)
+    task.run()
+
+    assert (dst / "logo.png").read_text() == "logo"
+    assert (dst / "icons" / "a.png").read_text() == "a"
+    assert task.stats.files == 2
+
+
+def test_object_store_links_identical_files_to_one_object(tmp_path):
+    store = ObjectStore(tmp_path / "objects")
+    a = tmp_path / "a" / "logo.png"
+    b = tmp_path / "b" / "logo.png"
+    for path in (a, b):
+        path.parent.mkdir()
+        path.write_bytes(b"mesmo logo")
+    dst_a, dst_b = tmp_path / "dst-a.png", tmp_path / "dst-b.png"
+
+    assert store.link(a, dst_a) is True
+    assert store.link(b, dst_b) is True
+    assert store.link(a, dst_a) is False  # já aponta pro objeto certo
+
+    assert os.path.samefile(dst_a, dst_b)
+    assert dst_a.stat().st_nlink == 3  # objeto + dois build dirs
+    assert not dst_a.stat().st_mode & 0o222  # objetos são somente leitura
+
+
+def test_object_store_falls_back_to_copy_across_filesystems(tmp_path, monkeypatch):
+    store = ObjectStore(tmp_path / "objects")
+    src = tmp_path / "refs.bib"
+    src.write_text("@book{x}")
+    dst = tmp_path / "dst.bib"
+
+    def exdev(*args):
+        raise OSError(errno.EXDEV, "cross-device link")
+
+    monkeypatch.setattr(object_store.os, "link", exdev)
+    store.link(src, dst)
+
+    assert dst.read_text() == "@book{x}"
+    assert dst.stat().st_nlink == 1
+
+
+def test_object_store_gc_removes_only_unreferenced_objects(tmp_path):
+    store = ObjectStore(tmp_path / "objects")
+    for name in ("keep", "drop"):
+        src = tmp_path / f"{name}.sty"
+        src.write_text(name)
+        store.link(src, tmp_path / f"{name}-build.sty")
+    (tmp_path / "drop-build.sty").unlink()
+
+    assert store.gc(grace=0) == 1
+    assert (tmp_path / "keep-build.sty").read_text() == "keep"
+
+
+def test_copy_tree_never_writes_through_a_shared_hardlink(tmp_path):
+    store = ObjectStore(tmp_path / "objects")
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    (src_dir / "style.sty").write_text("v1")
+    linked, copied = tmp_path / "linked", tmp_path / "copied"
+    CopyTree(src=src_dir, dst=linked, store=store).run()
+    CopyTree(src=src_dir, dst=copied, store=store).run()
+
+    (src_dir / "style.sty").write_text("v2")
+    CopyTree(src=src_dir, dst=copied).run()  # sem store: cópia comum
+
+    assert (copied / "style.sty").read_text() == "v2"
+    assert (linked / "style.sty").read_text() == "v1"
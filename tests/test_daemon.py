@@ -0,0 +1,89 @@
+import json
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from scripts import builder, daemon
+from scripts.daemon import client_main, make_server, request_build
+
+
+@pytest.fixture
+def running_daemon(tmp_path, monkeypatch):
+    compiled = []
+    monkeypatch.setattr(builder, "compile_document", lambda build_dir, engine=None: compiled.append(build_dir))
+
+    sock_path = tmp_path / "texflow.sock"
+    server = make_server(sock_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield sock_path, compiled
+    server.shutdown()
+    server.server_close()
+
+
+def _template(tmp_path):
+    template_dir = tmp_path / "tpl"
+    template_dir.mkdir()
+    (template_dir / "main.tex").write_text("Olá, << author >>!", encoding="utf-8")
+    data_path = template_dir / "input.json"
+    data_path.write_text(json.dumps({"payload": {"author": "Mundo"}}), encoding="utf-8")
+    return template_dir, data_path
+
+
+def _client(data_path, template_dir, sock_path):
+    # O daemon redireciona o sys.stderr do PROCESSO durante o build: o
+    # cliente precisa rodar em outro processo, como na vida real.
+    script = (
+        "import sys\n"
+        "from pathlib import Path\n"
+        "from scripts.daemon import request_build\n"
+        f"code = request_build({str(data_path)!r}, {str(template_dir)!r}, path=Path({str(sock_path)!r}))\n"
+        "sys.exit(3 if code is None else code)\n"
+    )
+    return subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=False)
+
+
+def test_request_build_returns_none_without_daemon(tmp_path):
+    assert request_build("input.json", "tpl", path=tmp_path / "nada.sock") is None
+
+
+def test_client_main_ignores_non_build_invocations(tmp_path, monkeypatch):
+    sock_path = tmp_path / "texflow.sock"
+    sock_path.touch()
+    monkeypatch.setattr(daemon, "DAEMON_SOCKET", sock_path)
+
+    assert client_main(["--init"]) is None
+    assert client_main(["--build", "--input", "x.json", "--no-daemon"]) is None
+
+
+def test_daemon_builds_and_streams_output(tmp_path, running_daemon):
+    sock_path, compiled = running_daemon
+    template_dir, data_path = _template(tmp_path)
+
+    proc = _client(data_path, template_dir, sock_path)
+
+    assert proc.returncode == 0
+    assert compiled == [template_dir / "build"]
+    assert (template_dir / "build" / "main.tex").read_text(encoding="utf-8") == "Olá, Mundo!"
+    assert "concluída com sucesso" in proc.stderr
+
+
+def test_daemon_reports_failed_build(tmp_path, running_daemon):
+    sock_path, _ = running_daemon
+    template_dir, data_path = _template(tmp_path)
+    data_path.write_text("não é json", encoding="utf-8")
+
+    proc = _client(data_path, template_dir, sock_path)
+
+    assert proc.returncode == 1
+    assert "JSON inválido" in proc.stderr
+
+
+def test_daemon_rejects_other_versions(tmp_path, running_daemon, monkeypatch):
+    sock_path, _ = running_daemon
+    template_dir, data_path = _template(tmp_path)
+    monkeypatch.setattr(daemon, "__version__", "0.0.0-outro")
+
+    assert _client(data_path, template_dir, sock_path).returncode == 3
@@ -48,3 +48,30 @@ def test_get_payload_before_load_raises_runtime_error():
     d = Data()
     with pytest.raises(RuntimeError):
         d.get_payload()
+
+
+def test_load_from_dict_validates_like_other_loaders():
+    d = Data()
+    d.load_from_dict({"payload": {"a": 1}})
+    assert d.get_payload() == {"a": 1}
+
+    with pytest.raises(ValueError):
+        Data().load_from_dict({"outro": {}})
+
+
+def test_iter_jsonl_validates_each_line(tmp_path):
+    file_path = tmp_path / "lote.jsonl"
+    file_path.write_text(
+        '{"payload": {"a": 1}}\n'
+        "\n"
+        "não é json\n"
+        '{"payload": []}\n',
+        encoding="utf-8",
+    )
+
+    items = list(Data.iter_jsonl(file_path))
+
+    assert [lineno for lineno, _ in items] == [1, 3, 4]
+    assert items[0][1].get_payload() == {"a": 1}
+    assert isinstance(items[1][1], ValueError)
+    assert isinstance(items[2][1], TypeError)
@@ -0,0 +1,155 @@
+import json
+
+import pytest
+
+from scripts import builder, engines
+from scripts.builder import BuildSession
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = []
+
+    def run(emoji, cmd, cwd=None, env=None, **kwargs):
+        calls.append(cmd)
+
+    monkeypatch.setattr(builder, "run_latex_command", run)
+    return calls
+
+
+def test_get_engine_rejects_unknown_names():
+    assert engines.get_engine() is engines.get_engine("latexmk-xelatex")
+    assert engines.get_engine("latexmk") is engines.get_engine("latexmk-xelatex")
+    with pytest.raises(ValueError, match="pdflatex"):
+        engines.get_engine("word")
+
+
+def test_latexmk_engines_pick_the_tex_engine():
+    assert engines.get_engine("latexmk-pdflatex").command()[:2] == ["latexmk", "-pdf"]
+    assert engines.get_engine("latexmk-lualatex").command()[:2] == ["latexmk", "-lualatex"]
+    assert builder.latexmk_command() == engines.get_engine("latexmk-xelatex").command()
+
+
+def test_direct_engine_runs_biber_only_with_biblatex(tmp_path, calls):
+    engines.get_engine("pdflatex").run(tmp_path)
+    assert [cmd[0] for cmd in calls] == ["pdflatex"]
+
+    calls.clear()
+    (tmp_path / "main.bcf").write_text("")
+    engines.get_engine("pdflatex").run(tmp_path)
+    assert [cmd[0] for cmd in calls] == ["pdflatex", "biber", "pdflatex"]
+
+
+def test_direct_engine_reruns_until_cross_references_settle(tmp_path, monkeypatch):
+    passes = []
+    total = []
+
+    def run(emoji, cmd, cwd=None, env=None, **kwargs):
+        passes.append(cmd[0])
+        total.append(cmd[0])
+        # Só a partir da segunda passada o .aux sai completo.
+        (tmp_path / "main.aux").write_text("\\newlabel{fig}{{1}{1}}" if len(total) > 1 else "")
+
+    monkeypatch.setattr(builder, "run_latex_command", run)
+    engines.get_engine("xelatex").run(tmp_path)
+    assert passes == ["xelatex", "xelatex", "xelatex"]
+
+    # Nada novo no .aux: uma passada basta.
+    passes.clear()
+    engines.get_engine("xelatex").run(tmp_path)
+    assert passes == ["xelatex"]
+
+
+def test_direct_engine_reruns_when_the_log_asks_and_stops_at_the_limit(tmp_path, monkeypatch):
+    passes = []
+
+    def run(emoji, cmd, cwd=None, env=None, **kwargs):
+        passes.append(cmd[0])
+        (tmp_path / "main.log").write_text("LaTeX Warning: Label(s) may have changed. Rerun to get cross-references right.")
+
+    monkeypatch.setattr(builder, "run_latex_command", run)
+    engines.get_engine("pdflatex").run(tmp_path)
+
+    assert len(passes) == engines.MAX_PASSES
+
+
+def test_latexmk_draft_uses_own_job_and_skips_unchanged_bibliography(tmp_path, calls):
+    engine = engines.get_engine("latexmk-xelatex")
+    (tmp_path / "main.tex").write_text("\\cite{a}")
+
+    engine.run(tmp_path, draft=True)
+    (tmp_path / "main-draft.bbl").write_text("")
+    engine.run(tmp_path, draft=True)
+
+    first, second = calls
+    assert "-jobname=main-draft" in first and "-synctex=1" not in first
+    assert any("{draft}{graphicx}" in arg for arg in first)
+    assert "-bibtex-" not in first and "-bibtex-" in second
+
+
+def test_direct_draft_runs_biber_only_when_bibliography_changed(tmp_path, calls):
+    engine = engines.get_engine("xelatex")
+    (tmp_path / "main.tex").write_text("\\cite{a}")
+    (tmp_path / "main-draft.bcf").write_text("")
+
+    engine.run(tmp_path, draft=True)
+    assert [cmd[0] for cmd in calls] == ["xelatex", "biber", "xelatex"]
+
+    calls.clear()
+    (tmp_path / "main-draft.bbl").write_text("")
+    engine.run(tmp_path, draft=True)
+    assert [cmd[0] for cmd in calls] == ["xelatex"]
+
+
+def test_draft_session_keeps_final_pdf(tmp_path, monkeypatch):
+    def fake_draft(build_dir, engine=None):
+        (build_dir / "main-draft.pdf").write_text("rascunho")
+
+    monkeypatch.setattr(builder, "draft_build_process", fake_draft)
+    (tmp_path / "main.tex").write_text("Oi", encoding="utf-8")
+    (tmp_path / "build").mkdir()
+    (tmp_path / "build" / "main.pdf").write_text("final")
+    data_path = tmp_path / "input.json"
+    data_path.write_text(json.dumps({"payload": {}}), encoding="utf-8")
+
+    BuildSession(str(tmp_path), draft=True).run(data_path)
+
+    assert (tmp_path / "build" / "main-draft.pdf").read_text() == "rascunho"
+    assert (tmp_path / "build" / "main.pdf").read_text() == "final"
+
+
+def test_engine_run_records_timings(tmp_path, calls):
+    engines.get_engine("xelatex").run(tmp_path)
+    engines.get_engine("latexmk-xelatex").run(tmp_path)
+
+    timings = json.loads((tmp_path / engines.TIMINGS_FILE).read_text())
+    assert set(timings) == {"xelatex", "latexmk-xelatex"}
+    assert timings["xelatex"]["ok"] is True
+
+
+def test_engine_comes_from_cli_then_template_config(tmp_path):
+    assert BuildSession(str(tmp_path)).engine.name == engines.DEFAULT_ENGINE
+
+    (tmp_path / "texflow.toml").write_text('engine = "lualatex"\n')
+    assert BuildSession(str(tmp_path)).engine.name == "lualatex"
+    assert BuildSession(str(tmp_path), engine="latexmk-pdflatex").engine.name == "latexmk-pdflatex"
+
+
+def test_pdf_cache_is_per_engine(tmp_path, monkeypatch):
+    compiled = []
+
+    def fake_compile(build_dir, engine=None):
+        compiled.append(engine.name)
+        (build_dir / "main.pdf").write_text(engine.name)
+
+    monkeypatch.setattr(builder, "compile_document", fake_compile)
+    build_dir = tmp_path / "build"
+    build_dir.mkdir()
+    (build_dir / "main.tex").write_text("igual")
+    cache = builder.PdfCache(tmp_path / "cache")
+
+    for name in ("xelatex", "lualatex", "xelatex"):
+        builder.cached_build_process(build_dir, cache, engines.get_engine(name))
+
+    assert compiled == ["xelatex", "lualatex"]
+    assert (build_dir / "main.pdf").read_text() == "xelatex"
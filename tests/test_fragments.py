@@ -0,0 +1,111 @@
+from jinja2 import DictLoader, Environment
+
+from classes.fragments import FragmentCache, TrackingContext
+
+
+def _env(source, calls):
+    env = Environment(loader=DictLoader({"main.tex": source}))
+    env.context_class = TrackingContext
+
+    def heavy(value):
+        calls.append(value)
+        return value
+
+    env.filters["heavy"] = heavy
+    return env
+
+
+def _render(tmp_path, env, context, salt="v1"):
+    cache = FragmentCache(tmp_path / "fragments.json", "main.tex", salt)
+    out = cache.render(env.get_template("main.tex"), context)
+    cache.save()
+    return out, cache
+
+
+SOURCE = (
+    "{% block title %}{{ title }}{% endblock %}\n"
+    "{% block tables %}{% for r in rows %}{{ r | heavy }};{% endfor %}{% endblock %}"
+)
+
+
+def test_unchanged_blocks_are_reused(tmp_path):
+    calls = []
+    env = _env(SOURCE, calls)
+
+    first, _ = _render(tmp_path, env, {"title": "A", "rows": [1, 2]})
+    second, cache = _render(tmp_path, env, {"title": "B", "rows": [1, 2]})
+
+    assert first == "A\n1;2;"
+    assert second == "B\n1;2;"
+    assert calls == [1, 2]  # a tabela não foi re-renderizada
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_blocks_rerender_when_their_keys_change(tmp_path):
+    calls = []
+    env = _env(SOURCE, calls)
+
+    _render(tmp_path, env, {"title": "A", "rows": [1]})
+    out, _ = _render(tmp_path, env, {"title": "A", "rows": [1, 3]})
+
+    assert out == "A\n1;3;"
+    assert calls == [1, 1, 3]
+
+
+def test_template_edit_invalidates_everything(tmp_path):
+    calls = []
+    env = _env(SOURCE, calls)
+
+    _render(tmp_path, env, {"title": "A", "rows": [1]}, salt="v1")
+    _, cache = _render(tmp_path, env, {"title": "A", "rows": [1]}, salt="v2")
+
+    assert cache.hits == 0
+
+
+def test_blocks_using_top_level_macros_follow_root_keys(tmp_path):
+    calls = []
+    source = (
+        "{% macro sig() %}{{ author }}{% endmacro %}"
+        "{% block body %}{{ sig() | heavy }}{% endblock %}"
+    )
+    env = _env(source, calls)
+
+    _render(tmp_path, env, {"author": "Ana"})
+    out, _ = _render(tmp_path, env, {"author": "Bia"})
+
+    assert out == "Bia"
+    assert calls == ["Ana", "Bia"]
+
+
+def test_nested_blocks_propagate_dependencies(tmp_path):
+    calls = []
+    source = "{% block outer %}[{% block inner %}{{ x | heavy }}{% endblock %}]{% endblock %}"
+    env = _env(source, calls)
+
+    _render(tmp_path, env, {"x": 1})
+    out, _ = _render(tmp_path, env, {"x": 2})
+
+    assert out == "[2]"
+
+
+def test_scoped_block_inside_loop_is_not_cached(tmp_path):
+    calls = []
+    source = "{% for it in items %}{% block row scoped %}ROW {{ it | heavy }}\n{% endblock %}{% endfor %}"
+    env = _env(source, calls)
+
+    first, cache = _render(tmp_path, env, {"items": [1, 2, 3]})
+    second, _ = _render(tmp_path, env, {"items": [1, 2, 3]})
+
+    assert first == second == "ROW 1\nROW 2\nROW 3\n"
+    assert cache.hits == 0
+
+
+def test_scoped_block_using_top_level_set_follows_root_keys(tmp_path):
+    calls = []
+    source = "{% set who = author %}{% block body scoped %}{{ who | heavy }}{% endblock %}"
+    env = _env(source, calls)
+
+    _render(tmp_path, env, {"author": "Ana"})
+    out, _ = _render(tmp_path, env, {"author": "Bia"})
+
+    assert out == "Bia"
@@ -0,0 +1,156 @@
+import json
+import sys
+import time
+
+import pytest
+
+from classes import history
+from classes.history import BuildHistory, BuildRecord
+from scripts import builder
+from scripts.builder import BuildSession
+from scripts.stats import show_stats
+
+
+@pytest.fixture
+def template(tmp_path, monkeypatch):
+    # Um "engine" de verdade (processo filho) pra passar por run_latex_command,
+    # que é quem conta passadas e páginas.
+    script = (
+        "open('main.log', 'w').write('Output written on main.pdf (7 pages).\\n'); "
+        "open('main.pdf', 'w').write('pdf')"
+    )
+
+    def fake_compile(build_dir, engine=None):
+        builder.run_latex_command("⚡", [sys.executable, "-c", script], cwd=str(build_dir), log_file=build_dir / "main.log")
+
+    monkeypatch.setattr(builder, "compile_document", fake_compile)
+    (tmp_path / "main.tex").write_text("Oi << nome >>", encoding="utf-8")
+    (tmp_path / "logo.png").write_bytes(b"x" * 2048)
+    data_path = tmp_path / "input.json"
+    data_path.write_text(json.dumps({"payload": {"nome": "Mundo"}}), encoding="utf-8")
+    return tmp_path, data_path
+
+
+def _record(template="/tpl", seconds=1.0, started=0.0, pdf_cache="miss", ok=True):
+    record = BuildRecord(template, engine="latexmk-xelatex", profile="build", template_digest="t", payload_digest="p")
+    record.started, record.seconds, record.pdf_cache, record.ok = started, seconds, pdf_cache, ok
+    return record
+
+
+def test_each_build_is_recorded_with_tasks_cache_and_pages(template):
+    tmp_path, data_path = template
+    db = BuildHistory(builder.HISTORY_DB)
+
+    BuildSession(str(tmp_path)).run(data_path)
+    (tmp_path / "build" / "main.pdf").unlink()  # força o compile: restaura do cache de PDFs
+    BuildSession(str(tmp_path)).run(data_path)
+
+    second, first = db.builds(str(tmp_path))
+    assert (first["pdf_cache"], second["pdf_cache"]) == ("miss", "hit")
+    assert first["pages"] == second["pages"] == 7
+    assert first["passes"] >= 1 and second["passes"] == 0
+    assert first["ok"] == 1 and first["profile"] == "build" and first["engine"] == "latexmk-xelatex"
+    assert first["bytes_copied"] >= 2048 and first["files_copied"] >= 1
+    assert second["tasks_skipped"] > 0
+    assert first["template_digest"] == second["template_digest"]
+
+    keys = {t["key"] for t in db.tasks(first["id"])}
+    assert "render-template:build/main.tex" in keys
+    assert all(t["seconds"] is not None for t in db.tasks(first["id"]))
+
+
+def test_payload_digest_follows_the_payload_and_failures_are_recorded(template, monkeypatch):
+    tmp_path, data_path = template
+    BuildSession(str(tmp_path)).run(data_path)
+
+    def broken(build_dir, engine=None):
+        raise RuntimeError("latexmk falhou")
+
+    monkeypatch.setattr(builder, "compile_document", broken)
+    data_path.write_text(json.dumps({"payload": {"nome": "Outro"}}), encoding="utf-8")
+    with pytest.raises(RuntimeError):
+        BuildSession(str(tmp_path)).run(data_path)
+
+    failed, ok = BuildHistory(builder.HISTORY_DB).builds(str(tmp_path))
+    assert failed["ok"] == 0 and ok["ok"] == 1
+    assert failed["payload_digest"] != ok["payload_digest"]
+
+
+def test_history_can_be_disabled(template, monkeypatch):
+    tmp_path, data_path = template
+    monkeypatch.setenv("TEXFLOW_HISTORY", "0")
+    BuildSession(str(tmp_path)).run(data_path)
+    assert BuildHistory(builder.HISTORY_DB).builds() == []
+
+
+def test_slowdown_against_comparable_recent_builds(tmp_path):
+    db = BuildHistory(tmp_path / "h.sqlite3")
+    for i, seconds in enumerate([2.0, 2.2, 1.9]):
+        db.add(_record(seconds=seconds, started=i))
+    # Hits do cache de PDFs e builds que falharam não entram na mediana.
+    db.add(_record(seconds=0.01, started=3, pdf_cache="hit"))
+    db.add(_record(seconds=0.2, started=4, ok=False))
+
+    assert db.baseline(_record(started=10)) == 2.0
+    assert db.slowdown(_record(seconds=2.6, started=10)) is None
+    ratio, median = db.slowdown(_record(seconds=4.5, started=10))
+    assert median == 2.0 and ratio == pytest.approx(2.25)
+    # Sem builds anteriores suficientes, não há comparação.
+    assert db.slowdown(_record(template="/outro", seconds=99, started=10)) is None
+
+
+def test_regression_is_announced_after_the_build(tmp_path, capsys, monkeypatch):
+    monkeypatch.setattr(history, "MIN_SLOWDOWN", 0)
+    db = BuildHistory(tmp_path / "h.sqlite3")
+    for i in range(3):
+        db.add(_record(seconds=0.001, started=i))
+
+    # recording mede o próprio bloco: 50ms contra uma mediana de 1ms.
+    record = _record(started=5)
+    with history.recording(record, [], tmp_path, db):
+        time.sleep(0.05)
+
+    assert record.ok and record.seconds >= 0.05
+    assert "🐢 Build" in capsys.readouterr().err
+    assert len(db.builds("/tpl")) == 4
+
+
+def test_stats_shows_trend_and_flags_regressions(tmp_path, capsys):
+    db_path = tmp_path / "h.sqlite3"
+    db = BuildHistory(db_path)
+    for i in range(10):
+        db.add(_record(seconds=1.0, started=i))
+    for i in range(10, 13):
+        db.add(_record(seconds=1.1, started=i))
+    db.add(_record(seconds=3.5, started=20))
+
+    show_stats(db=db_path)
+    out = capsys.readouterr().out
+    assert "📈 /tpl · 14 build(s)" in out
+    assert "Tendência:" in out
+    assert out.count("🐢 regressão") == 1
+
+    show_stats("/nenhum", db=db_path)
+    assert "Nenhum build de /nenhum" in capsys.readouterr().err
+
+
+def test_stats_reads_everything_through_one_connection(tmp_path, capsys, monkeypatch):
+    db_path = tmp_path / "h.sqlite3"
+    db = BuildHistory(db_path)
+    for i in range(5):
+        db.add(_record(template=f"/tpl{i % 2}", started=i))
+
+    connects = []
+    real_connect = history.sqlite3.connect
+    monkeypatch.setattr(history.sqlite3, "connect", lambda *a, **kw: connects.append(a) or real_connect(*a, **kw))
+    show_stats(db=db_path)
+
+    assert "📈 /tpl0" in capsys.readouterr().out
+    assert len(connects) == 1
+
+
+def test_median_matches_the_statistics_module():
+    import statistics
+
+    for values in ([3.0], [1.0, 5.0], [4.0, 1.0, 9.0], [2.0, 8.0, 1.0, 7.0]):
+        assert history.median(values) == statistics.median(values)
@@ -0,0 +1,76 @@
+from classes.latex_log import LatexLogAnalyzer
+from scripts.builder import summarize_latex_log
+
+LOG = (
+    "This is XeTeX, Version 3.141592653\n"
+    "! Undefined control sequence.\n"
+    "l.12 \\foobar\n"
+    "            {texto}\n"
+    "LaTeX Warning: Citation 'silva2020' on page 3 undefined on input line 42.\n"
+    "Output written on main.pdf (3 pages).\n"
+)
+
+
+def _summary(*chunks: str) -> str:
+    analyzer = LatexLogAnalyzer()
+    for chunk in chunks:
+        analyzer.feed(chunk)
+    analyzer.close()
+    return analyzer.summary()
+
+
+def test_analyzer_matches_summarize_latex_log():
+    assert _summary(LOG) == summarize_latex_log(LOG)
+
+
+def test_analyzer_gives_same_summary_for_arbitrary_chunks():
+    chunks = [LOG[i:i + 7] for i in range(0, len(LOG), 7)]
+    assert _summary(*chunks) == _summary(LOG)
+
+
+def test_error_without_following_line_number_uses_previous_one():
+    log = "l.3 \\textbf{x}\ntexto\n" + "y" * 700 + "\n! Emergency stop.\n" + "z" * 700 + "\n"
+    assert " • linha 3: Emergency stop.  — trecho: \\textbf{x}" in _summary(log)
+
+
+def test_line_number_at_end_of_line_takes_snippet_from_next_line():
+    log = "! Missing $ inserted.\nl.8\n    $x^2\n"
+    assert "linha 8: Missing $ inserted.  — trecho: $x^2" in _summary(log)
+
+
+def test_feed_file_reads_only_appended_bytes(tmp_path):
+    log = tmp_path / "main.log"
+    log.write_text("LaTeX Warning: Citation 'a' on page 1 undefined.\nmeia lin", encoding="utf-8")
+    analyzer = LatexLogAnalyzer()
+
+    analyzer.feed_file(log)
+    first_offset = analyzer.offset
+    with open(log, "a", encoding="utf-8") as f:
+        f.write("ha\nLaTeX Warning: Citation 'b' on page 2 undefined.\n")
+    analyzer.feed_file(log)
+
+    assert first_offset == log.read_text().index("meia")  # a linha incompleta espera
+    assert list(analyzer.cite_keys) == ["a", "b"]
+    assert analyzer.offset == log.stat().st_size
+
+
+def test_feed_file_restarts_when_log_is_truncated(tmp_path):
+    log = tmp_path / "main.log"
+    log.write_text("! Primeira passada.\n" + "x" * 100 + "\n", encoding="utf-8")
+    analyzer = LatexLogAnalyzer()
+    analyzer.feed_file(log)
+
+    log.write_text("! Segunda.\n", encoding="utf-8")  # nova passada do engine
+    analyzer.feed_file(log)
+    analyzer.close()
+
+    assert [e["msg"] for e in analyzer.errors] == ["Segunda."]
+
+
+def test_analyzer_tracks_pages_and_fatal_errors():
+    analyzer = LatexLogAnalyzer()
+    analyzer.feed("[1] [2{/usr/share/pdftex.map}]\n [3]\n")
+    assert (analyzer.pages, analyzer.fatal) == (3, False)
+
+    analyzer.feed("! Emergency stop.\n")
+    assert analyzer.fatal
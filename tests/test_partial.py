@@ -0,0 +1,55 @@
+import pytest
+
+from scripts import builder, engines, partial
+from scripts.builder import BuildSession
+
+TEX = (
+    "\\documentclass{article}\n"
+    "\\begin{document}\n"
+    "\\maketitle\n"
+    "\\section{Introdução}\n\\label{sec:intro}\nTexto \\verb|\\section{}|.\n"
+    "% \\section{Comentada}\n"
+    "\\section[Curto]{Métodos {e} Materiais}\nMais.\n"
+    "\\end{document}\n"
+)
+
+
+def test_split_sections_cuts_only_at_line_start_headings():
+    front, sections = partial.split_sections(TEX.split("\\begin{document}")[1].split("\\end{document}")[0])
+    assert front == "\n\\maketitle\n"
+    assert [(s.name, s.title) for s in sections] == [("01", "Introdução"), ("02", "Métodos {e} Materiais")]
+
+
+def test_prepare_includes_everything_until_each_section_has_an_aux(tmp_path):
+    (tmp_path / "main.tex").write_text(TEX, encoding="utf-8")
+
+    assert partial.prepare(tmp_path, "métodos") == ["main-only/01", "main-only/02"]
+    for name in ("01", "02"):
+        (tmp_path / "main-only" / f"{name}.aux").write_text("")
+    assert partial.prepare(tmp_path, "métodos") == ["main-only/02"]
+    assert partial.prepare(tmp_path, "sec:intro") == ["main-only/01"]
+
+    only = (tmp_path / "main-only.tex").read_text(encoding="utf-8")
+    assert "\\includeonly{main-only/01}\n\\begin{document}" in only
+    assert "\\include{main-only/01}\n\\include{main-only/02}\n\\end{document}" in only
+    assert (tmp_path / "main.tex").read_text(encoding="utf-8") == TEX
+
+
+def test_prepare_uses_existing_includes(tmp_path):
+    tex = "\\begin{document}\n\\include{capitulos/um}\n\\include{capitulos/dois}\n\\end{document}\n"
+    (tmp_path / "main.tex").write_text(tex, encoding="utf-8")
+
+    assert partial.prepare(tmp_path, "dois") == ["capitulos/dois"]
+    with pytest.raises(RuntimeError, match="capitulos/um"):
+        partial.prepare(tmp_path, "tres")
+
+
+def test_only_build_compiles_main_only(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(builder, "run_latex_command", lambda emoji, cmd, **kwargs: calls.append(cmd))
+    (tmp_path / "main.tex").write_text(TEX, encoding="utf-8")
+
+    builder.only_build_process(tmp_path, "1", engines.get_engine("latexmk-pdflatex"))
+
+    assert calls[0][-1] == "main-only.tex"
+    assert BuildSession(str(tmp_path), only="1").tasks({})[-1].outputs == [tmp_path / "build" / "main-only.pdf"]
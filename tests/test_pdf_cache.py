@@ -0,0 +1,87 @@
+import os
+
+from classes.pdf_cache import PdfCache, inputs_digest
+
+
+def _build_dir(tmp_path):
+    build_dir = tmp_path / "build"
+    build_dir.mkdir()
+    (build_dir / "main.tex").write_text("\\documentclass{article}")
+    (build_dir / "style.sty").write_text("estilo")
+    return build_dir
+
+
+def test_digest_ignores_compile_products(tmp_path):
+    build_dir = _build_dir(tmp_path)
+    before = inputs_digest(build_dir)
+
+    (build_dir / "main.pdf").write_text("pdf")
+    (build_dir / "main.aux").write_text("aux")
+    (build_dir / "chapter.aux").write_text("aux")
+    (build_dir / ".texflow-state.json").write_text("{}")
+
+    assert inputs_digest(build_dir) == before
+
+
+def test_digest_changes_with_inputs_and_extra(tmp_path):
+    build_dir = _build_dir(tmp_path)
+    before = inputs_digest(build_dir)
+
+    assert inputs_digest(build_dir, extra=["-pdflatex"]) != before
+    (build_dir / "style.sty").write_text("outro estilo")
+    assert inputs_digest(build_dir) != before
+
+
+def test_digest_keeps_figures_that_are_pdfs(tmp_path):
+    build_dir = _build_dir(tmp_path)
+    (build_dir / "images").mkdir()
+    before = inputs_digest(build_dir)
+
+    (build_dir / "images" / "fig.pdf").write_text("figura")
+
+    assert inputs_digest(build_dir) != before
+
+
+def test_store_and_restore_roundtrip(tmp_path):
+    build_dir = _build_dir(tmp_path)
+    (build_dir / "main.pdf").write_text("pdf v1")
+    (build_dir / "main.log").write_text("log v1")
+    cache = PdfCache(tmp_path / "cache")
+
+    cache.store("abc", build_dir)
+    (build_dir / "main.pdf").write_text("pdf v2")
+    (build_dir / "main.synctex.gz").write_text("synctex v2")
+
+    assert cache.restore("abc", build_dir) is True
+    assert (build_dir / "main.pdf").read_text() == "pdf v1"
+    assert (build_dir / "main.log").read_text() == "log v1"
+    assert not (build_dir / "main.synctex.gz").exists()
+
+
+def test_restore_misses_unknown_digest(tmp_path):
+    assert PdfCache(tmp_path / "cache").restore("nada", _build_dir(tmp_path)) is False
+
+
+def test_evicts_least_recently_used_entries(tmp_path):
+    build_dir = _build_dir(tmp_path)
+    (build_dir / "main.pdf").write_bytes(b"x" * 100)
+    cache = PdfCache(tmp_path / "cache", max_bytes=250)
+
+    cache.store("old", build_dir)
+    cache.store("used", build_dir)
+    os.utime(cache.root / "old", (1, 1))
+    os.utime(cache.root / "used", (2, 2))
+    cache.restore("used", build_dir)  # vira o mais recente
+    cache.store("new", build_dir)
+
+    assert sorted(p.name for p in cache.root.iterdir()) == ["new", "used"]
+
+
+def test_digest_ignores_texflow_internal_dirs(tmp_path):
+    build_dir = _build_dir(tmp_path)
+    before = inputs_digest(build_dir)
+
+    (build_dir / ".texflow-jinja" / "3.1.6").mkdir(parents=True)
+    (build_dir / ".texflow-jinja" / "3.1.6" / "abc.cache").write_bytes(b"bytecode")
+
+    assert inputs_digest(build_dir) == before
@@ -0,0 +1,66 @@
+import pytest
+
+from scripts import builder, preamble
+
+TEX = "\\documentclass{article}\n\\usepackage{style}\n<<marker>>\\begin{document}\nOi\n\\end{document}\n"
+
+
+def test_static_preamble_stops_at_begin_document():
+    assert preamble.static_preamble(TEX.replace("<<marker>>", "")) == "\\documentclass{article}\n\\usepackage{style}\n"
+    assert preamble.static_preamble("sem documento") is None
+
+
+def test_static_preamble_honors_endofdump_marker():
+    tex = TEX.replace("<<marker>>", "\\csname endofdump\\endcsname\n\\setmainfont{Inter}\n")
+    assert preamble.static_preamble(tex) == "\\documentclass{article}\n\\usepackage{style}\n"
+
+
+def test_format_key_covers_preamble_sty_files_and_engine_version(tmp_path):
+    (tmp_path / "style.sty").write_text("v1")
+    key = preamble.format_key(tmp_path, "pre", "XeTeX 3.14")
+
+    assert preamble.format_key(tmp_path, "pre", "XeTeX 3.15") != key
+    assert preamble.format_key(tmp_path, "outro", "XeTeX 3.14") != key
+    (tmp_path / "style.sty").write_text("v2")
+    assert preamble.format_key(tmp_path, "pre", "XeTeX 3.14") != key
+
+
+def test_ensure_format_without_engine_falls_back(tmp_path):
+    (tmp_path / "main.tex").write_text(TEX)
+    assert preamble.ensure_format(tmp_path, {}, engine="texflow-engine-inexistente") is None
+
+
+def test_with_format_overrides_engine_command():
+    cmd = preamble.with_format(["latexmk", "-xelatex", "main.tex"], "preamble-abc")
+    assert cmd == ["latexmk", "-xelatex", "-xelatex=xelatex %O -fmt=preamble-abc %S", "main.tex"]
+
+
+def test_latexmk_build_retries_without_format_and_stops_using_it(tmp_path, monkeypatch):
+    monkeypatch.setenv("TEXFLOW_PREAMBLE_CACHE", "1")
+    monkeypatch.setattr(preamble, "ensure_format", lambda build_dir, env, engine: "preamble-abc")
+    calls = []
+
+    def run(emoji, cmd, cwd=None, env=None, **kwargs):
+        calls.append(cmd)
+        if any("-fmt=" in arg for arg in cmd):
+            raise RuntimeError("formato quebrado")
+
+    monkeypatch.setattr(builder, "run_latex_command", run)
+    builder.latexmk_build_process(tmp_path)
+
+    assert len(calls) == 2 and calls[1] == builder.latexmk_command()
+    assert (tmp_path / preamble.FORMAT_DIR / "preamble-abc.failed").exists()
+
+
+def test_latexmk_build_reports_document_errors_even_with_format(tmp_path, monkeypatch):
+    monkeypatch.setenv("TEXFLOW_PREAMBLE_CACHE", "1")
+    monkeypatch.setattr(preamble, "ensure_format", lambda build_dir, env, engine: "preamble-abc")
+
+    def run(emoji, cmd, cwd=None, env=None, **kwargs):
+        raise RuntimeError("erro no documento")
+
+    monkeypatch.setattr(builder, "run_latex_command", run)
+    with pytest.raises(RuntimeError, match="erro no documento"):
+        builder.latexmk_build_process(tmp_path)
+
+    assert not (tmp_path / preamble.FORMAT_DIR / "preamble-abc.failed").exists()
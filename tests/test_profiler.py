@@ -0,0 +1,63 @@
+import json
+import pstats
+import sys
+
+from classes import profiler
+from scripts import builder
+from scripts.builder import build
+
+# Filho que aloca ~64 MiB: aparece no RSS máx do rusage.
+HUNGRY = "x = bytearray(64 * 1024 * 1024); x[::4096] = b'1' * len(x[::4096])"
+
+
+def _template(tmp_path):
+    (tmp_path / "main.tex").write_text("Oi << nome >>", encoding="utf-8")
+    data_path = tmp_path / "input.json"
+    data_path.write_text(json.dumps({"payload": {"nome": "Mundo"}}), encoding="utf-8")
+    return data_path
+
+
+def test_profile_writes_report_and_pstats_with_tasks_and_children(tmp_path, monkeypatch):
+    def fake_compile(build_dir, engine=None):
+        builder.run_latex_command("⚡", [sys.executable, "-c", HUNGRY], cwd=str(build_dir))
+        (build_dir / "main.pdf").write_text("pdf")
+
+    monkeypatch.setattr(builder, "compile_document", fake_compile)
+    data_path = _template(tmp_path)
+
+    assert build(str(data_path), str(tmp_path), use_cache=False, profile=True)
+
+    build_dir = tmp_path / "build"
+    report = (build_dir / profiler.REPORT_FILE).read_text(encoding="utf-8")
+    assert "render-template:build/main.tex" in report
+    assert "copy-tree:build/images" in report
+    assert "Funções mais caras" in report
+    # O cProfile cobre as threads do executor, não só a principal.
+    stats = pstats.Stats(str(build_dir / profiler.STATS_FILE)).stats
+    assert any(func == "run" and filename.endswith("task.py") for filename, _, func in stats)
+    assert profiler.current() is None
+
+
+def test_child_rusage_is_collected_per_command(tmp_path):
+    with profiler.recording(tmp_path) as profile:
+        builder.run_latex_command("⚡", [sys.executable, "-c", HUNGRY], cwd=str(tmp_path))
+
+    (child,) = profile.children
+    assert child.returncode == 0
+    maxrss = child.rusage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    assert maxrss > 64 * 1024 * 1024
+    assert child.rusage.ru_utime + child.rusage.ru_stime > 0
+
+
+def test_profile_is_saved_even_when_the_build_fails(tmp_path, monkeypatch):
+    def failing_compile(build_dir, engine=None):
+        builder.run_latex_command("⚡", [sys.executable, "-c", "import sys; sys.exit(3)"], cwd=str(build_dir))
+
+    monkeypatch.setattr(builder, "compile_document", failing_compile)
+    data_path = _template(tmp_path)
+
+    assert not build(str(data_path), str(tmp_path), use_cache=False, profile=True)
+
+    report = (tmp_path / "build" / profiler.REPORT_FILE).read_text(encoding="utf-8")
+    assert f"{sys.executable} -c import sys; sys.exit(3)"[:48] in report
+    assert "fn-task:" in report
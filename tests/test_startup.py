@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Teto do tempo de import de scripts.cli (cumulativo, -X importtime). Bem
+# folgado pra não falhar em CI lento; TEXFLOW_STARTUP_BUDGET_MS ajusta.
+STARTUP_BUDGET_MS = float(os.getenv("TEXFLOW_STARTUP_BUDGET_MS", "150"))
+
+HEAVY = ("prompt_toolkit", "jinja2", "urllib.request")
+
+
+def _python(*args):
+    # Processo novo: sys.modules limpo, como cada Ctrl+S do LaTeX Workshop.
+    env = os.environ.copy()
+    env["PYTHONPATH"] = os.pathsep.join(p for p in sys.path if p)
+    return subprocess.run([sys.executable, *args], capture_output=True, text=True, check=True, env=env)
+
+
+def _loaded(code):
+    script = f"import sys\n{code}\nprint('loaded:', *(m for m in {HEAVY!r} if m in sys.modules))\n"
+    return _python("-c", script).stdout.splitlines()[-1].split()[1:]
+
+
+def test_version_loads_no_heavy_modules():
+    code = (
+        "from scripts.cli import cli\n"
+        "sys.argv = ['texflow', '--version']\n"
+        "try:\n"
+        "    cli()\n"
+        "except SystemExit:\n"
+        "    pass\n"
+    )
+    assert _loaded(code) == []
+
+
+@pytest.mark.parametrize("module", ["scripts.cli", "scripts.builder", "scripts.batch", "scripts.watcher"])
+def test_build_path_never_imports_prompt_toolkit(module):
+    assert "prompt_toolkit" not in _loaded(f"import {module}")
+
+
+def test_cli_import_time_within_budget():
+    stderr = _python("-X", "importtime", "-c", "import scripts.cli").stderr
+    cumulative = {}
+    for line in stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            cumulative[parts[2].strip()] = int(parts[1])
+    elapsed_ms = cumulative["scripts.cli"] / 1000
+    assert elapsed_ms < STARTUP_BUDGET_MS, (
+        f"import de scripts.cli levou {elapsed_ms:.0f}ms (teto {STARTUP_BUDGET_MS:.0f}ms): "
+        "algum import pesado voltou pro topo da CLI?"
+    )
@@ -1,9 +1,12 @@
+import json
 import os
+import threading
 import time
 from pathlib import Path
 
 import pytest
 
+from classes import manifest as manifest_module
 from classes import task as task_module
 from classes.task import CleanBuild, CopyTree, FnTask, RenderTemplate, Task
 
@@ -123,6 +126,91 @@ def test_copy_tree_directory_skips_unchanged_files(tmp_path):
     assert (dst_dir / "keep.txt").stat().st_mtime_ns == original_mtime
 
 
+def test_copy_tree_manifest_skips_unchanged_files_without_reading_them(tmp_path, monkeypatch):
+    src_dir = tmp_path / "src"
+    dst_dir = tmp_path / "dst"
+    src_dir.mkdir()
+    (src_dir / "keep.sty").write_text("mesmo conteúdo")
+    manifest = dst_dir / ".texflow-copy.json"
+
+    CopyTree(src=src_dir, dst=dst_dir, manifest=manifest).run()
+    assert manifest.exists()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("arquivo sem mudança não deveria ser lido")
+
+    monkeypatch.setattr(task_module.filecmp, "cmp", fail)
+    monkeypatch.setattr(manifest_module, "_hash", fail)
+    CopyTree(src=src_dir, dst=dst_dir, manifest=manifest).run()
+
+
+def test_copy_tree_manifest_touch_does_not_rewrite_destination(tmp_path):
+    src_dir = tmp_path / "src"
+    dst_dir = tmp_path / "dst"
+    src_dir.mkdir()
+    (src_dir / "keep.sty").write_text("mesmo conteúdo")
+    manifest = dst_dir / ".texflow-copy.json"
+
+    CopyTree(src=src_dir, dst=dst_dir, manifest=manifest).run()
+    original_mtime = (dst_dir / "keep.sty").stat().st_mtime_ns
+
+    time.sleep(0.01)
+    (src_dir / "keep.sty").touch()
+    CopyTree(src=src_dir, dst=dst_dir, manifest=manifest).run()
+
+    assert (dst_dir / "keep.sty").stat().st_mtime_ns == original_mtime
+
+
+def test_copy_tree_manifest_copies_changed_and_removes_deleted_files(tmp_path):
+    src_dir = tmp_path / "src"
+    dst_dir = tmp_path / "dst"
+    (src_dir / "fonts").mkdir(parents=True)
+    (src_dir / "refs.bib").write_text("v1")
+    (src_dir / "fonts" / "old.otf").write_text("fonte")
+    manifest = dst_dir / ".texflow-copy.json"
+
+    CopyTree(src=src_dir, dst=dst_dir, manifest=manifest).run()
+    (dst_dir / "main.pdf").write_text("gerado pelo compile")
+
+    (src_dir / "refs.bib").write_text("v2 maior")
+    (src_dir / "fonts" / "old.otf").unlink()
+    CopyTree(src=src_dir, dst=dst_dir, manifest=manifest).run()
+
+    assert (dst_dir / "refs.bib").read_text() == "v2 maior"
+    assert not (dst_dir / "fonts").exists()
+    # Só o que o próprio CopyTree copiou é apagado.
+    assert (dst_dir / "main.pdf").exists()
+
+
+def test_copy_tree_manifest_keeps_files_that_became_ignored(tmp_path):
+    src_dir = tmp_path / "src"
+    dst_dir = tmp_path / "dst"
+    src_dir.mkdir()
+    (src_dir / "abstract.tex").write_text("copiado")
+    manifest = dst_dir / ".texflow-copy.json"
+
+    CopyTree(src=src_dir, dst=dst_dir, ignore_tex=True, manifest=manifest).run()
+    (dst_dir / "abstract.tex").write_text("renderizado")
+    CopyTree(src=src_dir, dst=dst_dir, ignore_tex=True, tex_whitelist=(), manifest=manifest).run()
+
+    # Continua na origem: agora é de outra tarefa, não é apagado.
+    assert (dst_dir / "abstract.tex").read_text() == "renderizado"
+
+
+def test_copy_tree_manifest_repairs_destination_edited_by_hand(tmp_path):
+    src_dir = tmp_path / "src"
+    dst_dir = tmp_path / "dst"
+    src_dir.mkdir()
+    (src_dir / "style.sty").write_text("original")
+    manifest = dst_dir / ".texflow-copy.json"
+
+    CopyTree(src=src_dir, dst=dst_dir, manifest=manifest).run()
+    (dst_dir / "style.sty").write_text("editado em build/")
+    CopyTree(src=src_dir, dst=dst_dir, manifest=manifest).run()
+
+    assert (dst_dir / "style.sty").read_text() == "original"
+
+
 def test_copy_tree_symlink_mode_links_single_file(tmp_path):
     src = tmp_path / "src.txt"
     src.write_text("conteúdo")
@@ -267,3 +355,159 @@ def test_runner_raises_on_circular_dependency():
 
     with pytest.raises(RuntimeError):
         Task.runner([a, b])
+
+
+def test_runner_starts_tasks_as_soon_as_their_own_dependencies_finish():
+    # t1 só termina quando t2 roda; t2 depende de uma tarefa "chain". Num
+    # runner por ondas, t1 bloquearia a onda e t2 nunca começaria.
+    released = threading.Event()
+
+    t1 = FnTask(lambda: released.wait(timeout=2) or pytest.fail("t2 não rodou em paralelo"), mode="thread")
+    chain = FnTask(lambda: None, mode="chain")
+    t2 = FnTask(released.set, mode="thread", dependencies=[chain])
+
+    Task.runner([t1, chain, t2])
+
+    assert released.is_set()
+
+
+def test_runner_propagates_task_errors():
+    def boom():
+        raise ValueError("falhou")
+
+    after = []
+    failing = FnTask(boom, mode="thread")
+    dependent = FnTask(lambda: after.append("rodou"), mode="chain", dependencies=[failing])
+
+    with pytest.raises(ValueError, match="falhou"):
+        Task.runner([failing, dependent])
+
+    assert after == []
+
+
+def test_runner_reuses_long_lived_executors():
+    assert task_module._executor("thread") is task_module._executor("thread")
+
+
+def _tracked_task(tmp_path, calls, **kwargs):
+    src = tmp_path / "in.txt"
+    out = tmp_path / "out.txt"
+
+    def work():
+        calls.append("rodou")
+        out.write_text(src.read_text())
+
+    return FnTask(work, mode="chain", inputs=[src], outputs=[out], **kwargs)
+
+
+def test_runner_skips_up_to_date_tasks(tmp_path):
+    (tmp_path / "in.txt").write_text("a")
+    state = tmp_path / "state.json"
+    calls = []
+
+    Task.runner([_tracked_task(tmp_path, calls)], state=state)
+    Task.runner([_tracked_task(tmp_path, calls)], state=state)
+
+    assert calls == ["rodou"]
+
+
+def test_runner_reruns_when_inputs_change(tmp_path):
+    src = tmp_path / "in.txt"
+    src.write_text("a")
+    state = tmp_path / "state.json"
+    calls = []
+
+    Task.runner([_tracked_task(tmp_path, calls)], state=state)
+    src.write_text("outro conteúdo")
+    Task.runner([_tracked_task(tmp_path, calls)], state=state)
+
+    assert calls == ["rodou", "rodou"]
+    assert (tmp_path / "out.txt").read_text() == "outro conteúdo"
+
+
+def test_runner_reruns_when_outputs_are_missing(tmp_path):
+    (tmp_path / "in.txt").write_text("a")
+    state = tmp_path / "state.json"
+    calls = []
+
+    Task.runner([_tracked_task(tmp_path, calls)], state=state)
+    (tmp_path / "out.txt").unlink()
+    Task.runner([_tracked_task(tmp_path, calls)], state=state)
+
+    assert calls == ["rodou", "rodou"]
+
+
+def test_runner_reruns_dependents_of_tasks_that_ran(tmp_path):
+    (tmp_path / "in.txt").write_text("a")
+    state = tmp_path / "state.json"
+    calls = []
+
+    def pipeline():
+        upstream = FnTask(lambda: calls.append("upstream"), mode="chain")  # sem outputs: sempre roda
+        return [upstream, _tracked_task(tmp_path, calls, dependencies=[upstream])]
+
+    Task.runner(pipeline(), state=state)
+    Task.runner(pipeline(), state=state)
+
+    assert calls == ["upstream", "rodou", "upstream", "rodou"]
+
+
+def test_runner_forgets_fingerprint_of_failed_task(tmp_path):
+    (tmp_path / "in.txt").write_text("a")
+    (tmp_path / "out.txt").write_text("velho")
+    state = tmp_path / "state.json"
+
+    def boom():
+        raise RuntimeError("falhou")
+
+    failing = FnTask(boom, mode="chain", inputs=[tmp_path / "in.txt"], outputs=[tmp_path / "out.txt"])
+    with pytest.raises(RuntimeError):
+        Task.runner([failing], state=state)
+
+    assert json.loads(state.read_text()) == {}
+
+
+def test_runner_restores_copied_file_deleted_from_destination(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "style.sty").write_text("estilo")
+    (src / "logo.txt").write_text("logo")
+    dst = tmp_path / "build"
+    state = dst / "state.json"
+
+    def copy():
+        return CopyTree(src, dst, manifest=dst / "manifest.json")
+
+    Task.runner([copy()], state=state)
+    skipped = copy()
+    Task.runner([skipped], state=state)
+    assert skipped.skipped
+
+    (dst / "style.sty").unlink()
+    restored = copy()
+    Task.runner([restored], state=state)
+
+    assert not restored.skipped
+    assert (dst / "style.sty").read_text() == "estilo"
+
+
+def test_copy_tree_directory_without_manifest_always_runs(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "a.txt").write_text("a")
+    dst = tmp_path / "dst"
+    state = tmp_path / "state.json"
+
+    Task.runner([CopyTree(src, dst)], state=state)
+    (dst / "a.txt").unlink()
+    Task.runner([CopyTree(src, dst)], state=state)
+
+    assert (dst / "a.txt").read_text() == "a"
+
+
+def test_render_template_fingerprint_covers_context(tmp_path):
+    render = RenderTemplate(template=FakeTemplate("{name}"), context={"name": "a"}, output=tmp_path / "out.tex")
+    before = render.fingerprint()
+    render.context = {"name": "b"}
+
+    assert render.fingerprint() != before
@@ -0,0 +1,99 @@
+import json
+import sys
+import time
+
+from classes import trace
+from classes.copier import copy_files, fast_copy
+from classes.task import FnTask, Task
+from scripts import builder
+from scripts.builder import BuildSession
+
+
+def _tasks(events):
+    return {e["name"]: e for e in events if e.get("ph") == "X" and e["cat"] == "fn-task"}
+
+
+def test_runner_records_real_durations_threads_and_dependencies(tmp_path):
+    root = FnTask(time.sleep, 0.01, mode="chain")
+    left = FnTask(time.sleep, 0.2, dependencies=[root])
+    right = FnTask(time.sleep, 0.2, dependencies=[root])
+    # Chaves distintas (a key vem dos outputs): uma por tarefa no trace.
+    for i, t in enumerate((root, left, right)):
+        t.outputs = [tmp_path / f"t{i}"]
+
+    with trace.recording(tmp_path / "trace.json"):
+        Task.runner([root, left, right])
+
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    spans = _tasks(events)
+    r, a, b = (spans[t.key] for t in (root, left, right))
+
+    # Medido no worker: as duas tarefas "thread" duram o sleep delas e se
+    # sobrepõem, em threads diferentes da principal.
+    assert a["dur"] >= 200_000 and b["dur"] >= 200_000
+    assert a["ts"] < b["ts"] + b["dur"] and b["ts"] < a["ts"] + a["dur"]
+    assert a["tid"] != r["tid"] and b["tid"] != r["tid"]
+    assert a["args"]["dependencies"] == [root.key]
+
+    flows = [e for e in events if e.get("cat") == "dependency"]
+    assert len(flows) == 4  # um "s" e um "f" por aresta
+    assert {e["tid"] for e in flows if e["ph"] == "f"} == {a["tid"], b["tid"]}
+    assert any(e["name"] == "thread_name" for e in events)
+
+
+def test_copy_files_traces_each_file_only_when_recording(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    pairs = []
+    for i in range(3):
+        (src / f"f{i}.txt").write_text(str(i))
+        pairs.append((src / f"f{i}.txt", tmp_path / f"f{i}.txt"))
+
+    copy_files(pairs, fast_copy)
+    with trace.recording(tmp_path / "trace.json") as recorded:
+        assert trace.current() is recorded
+        copy_files(pairs, fast_copy)
+    assert trace.current() is None
+
+    copies = [e for e in recorded.events if e.get("cat") == "copy-file"]
+    assert sorted(e["name"] for e in copies) == ["f0.txt", "f1.txt", "f2.txt"]
+
+
+def test_latex_subprocess_gets_its_own_track(tmp_path):
+    with trace.recording(tmp_path / "trace.json") as recorded:
+        builder.run_latex_command("⚡", [sys.executable, "-c", "pass"], cwd=str(tmp_path))
+
+    (latex,) = [e for e in recorded.events if e.get("cat") == "latex"]
+    assert latex["pid"] != recorded.events[0]["pid"]
+    assert latex["args"]["returncode"] == 0
+    assert {"name": "process_name", "ph": "M", "pid": latex["pid"], "tid": 0,
+            "args": {"name": sys.executable}} in recorded.events
+
+
+def test_build_trace_covers_every_stage(tmp_path, monkeypatch):
+    monkeypatch.setattr(builder, "compile_document", lambda build_dir, engine=None: (build_dir / "main.pdf").write_text("pdf"))
+    (tmp_path / "main.tex").write_text("Oi << nome >>", encoding="utf-8")
+    data_path = tmp_path / "input.json"
+    data_path.write_text(json.dumps({"payload": {"nome": "Mundo"}}), encoding="utf-8")
+
+    with trace.recording(tmp_path / "trace.json"):
+        BuildSession(str(tmp_path), use_cache=False).run(data_path)
+
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    cats = {e["cat"] for e in events if e.get("ph") == "X"}
+    assert {"render-template", "copy-tree", "fn-task"} <= cats
+
+
+def test_failed_task_still_shows_up_in_trace(tmp_path):
+    def boom():
+        raise RuntimeError("latexmk falhou")
+
+    task = FnTask(boom, mode="chain")
+    with trace.recording(tmp_path / "trace.json") as recorded:
+        try:
+            Task.runner([task])
+        except RuntimeError:
+            pass
+
+    (span,) = [e for e in recorded.events if e.get("cat") == "fn-task"]
+    assert "latexmk falhou" in span["args"]["error"]
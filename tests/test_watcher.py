@@ -0,0 +1,43 @@
+from scripts.watcher import _changed, _snapshot, affected_stages
+
+
+def test_snapshot_ignores_build_dir(tmp_path):
+    (tmp_path / "main.tex").write_text("tex")
+    (tmp_path / "build").mkdir()
+    (tmp_path / "build" / "main.pdf").write_text("pdf")
+    data = tmp_path / "input.json"
+    data.write_text("{}")
+
+    files = _snapshot(tmp_path, data)
+
+    assert set(files) == {tmp_path / "main.tex", data}
+
+
+def test_changed_detects_added_removed_and_modified(tmp_path):
+    a, b, c = tmp_path / "a", tmp_path / "b", tmp_path / "c"
+    old = {a: (1, 1), b: (1, 1)}
+    new = {a: (1, 1), b: (2, 1), c: (1, 1)}
+
+    assert _changed(old, new) == {b, c}
+
+
+def test_tex_change_triggers_render_and_compile(tmp_path):
+    stages = affected_stages({tmp_path / "main.tex"}, tmp_path, tmp_path / "input.json")
+    assert stages == ("render", "compile")
+
+
+def test_support_file_change_triggers_copy_and_compile(tmp_path):
+    stages = affected_stages({tmp_path / "style.sty"}, tmp_path, tmp_path / "input.json")
+    assert stages == ("copy-files", "compile")
+
+
+def test_input_inside_template_triggers_render_and_copy(tmp_path):
+    data = tmp_path / "input.json"
+    stages = affected_stages({data}, tmp_path, data)
+    assert stages == ("render", "copy-files", "compile")
+
+
+def test_input_outside_template_only_renders(tmp_path):
+    data = tmp_path.parent / "dados.json"
+    stages = affected_stages({data}, tmp_path, data)
+    assert stages == ("render", "compile")